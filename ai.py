@@ -0,0 +1,155 @@
+"""
+Time-sliced AI decisions.
+
+Steering runs every tick, but decisions (chase or wander, new wander
+heading, who goes for a humanoid) don't need to. TimeSlicer deals them out
+round-robin so each enemy decides once every few ticks, and caps how many
+decisions happen in one tick so a wave of state changes can't spike a frame.
+
+FireScheduler does the same for shooting: enemies near the camera shoot on
+their own staggered timers, under a cap on live enemy bullets.
+"""
+
+import collections
+import random
+import typing
+
+import numpy as np
+
+import projectiles
+
+from constants import *
+
+
+class TimeSlicer(object):
+    """Round-robin decision scheduler with a per-tick budget.
+
+    Members of a group (rows 0..n-1 of a steering.Flock, say) are split into
+    `buckets` slices, and one slice is due each tick, so everyone gets a
+    decision every `buckets` ticks. One-off jobs (`defer`) share the same
+    budget and go first.
+
+    Attributes:
+        buckets (int): Ticks it takes to get round everyone once (when the budget allows).
+        budget (int): Most decisions per tick, jobs + rows together.
+        remaining (int): Budget left this tick.
+        cursors (dict[typing.Hashable, int]): Next row due, per group.
+        jobs (collections.deque): Deferred decisions waiting for budget.
+        decisions (int): Decisions made in the last tick (metric).
+    """
+
+    def __init__(self, buckets: int = AI_BUCKETS, budget: int = AI_DECISION_BUDGET) -> None:
+        self.buckets: int = buckets
+        self.budget: int = budget
+        self.remaining: int = budget
+        self.cursors: dict[typing.Hashable, int] = {}
+        self.jobs: collections.deque[typing.Callable[[], None]] = collections.deque()
+        self.decisions: int = 0
+
+    def begin_tick(self) -> None:
+        """Refills the budget and runs whatever deferred jobs fit in it."""
+        self.remaining = self.budget
+        self.decisions = 0
+
+        while self.jobs and self.remaining > 0:
+            self.jobs.popleft()()
+            self._spend(1)
+
+    def defer(self, job: typing.Callable[[], None]) -> None:
+        """Queues a one-off decision for the next tick with budget left."""
+        self.jobs.append(job)
+
+    def due(self, group: typing.Hashable, count: int) -> np.ndarray:
+        """Rows of `group` (out of `count`) that get to decide this tick.
+
+        Walks a cursor round the group, one slice (count / buckets rows, at
+        least 1) per tick, cut short if the budget runs out. Rows that get
+        swapped around in between just get their turn a little early or late.
+        """
+        if count <= 0 or self.remaining <= 0:
+            return np.zeros(0, dtype=np.intp)
+
+        size = min(count, self.remaining, -(-count // self.buckets))
+        cursor = self.cursors.get(group, 0) % count
+        self.cursors[group] = (cursor + size) % count
+        self._spend(size)
+
+        return (cursor + np.arange(size)) % count
+
+    def _spend(self, amount: int) -> None:
+        self.remaining -= amount
+        self.decisions += amount
+
+
+class FireScheduler(object):
+    """Which enemies get to shoot, and when.
+
+    Only enemies within `fire_range` of the camera shoot (anything further
+    would just be culled off screen). Each one has its own timer, starting
+    at a random phase, so shots spread over frames instead of all landing
+    on the same one. Nobody shoots while `cap` enemy bullets are alive, a
+    held shot goes as soon as there's room. How often an enemy type shoots
+    is its class's `fire_interval` (None = never).
+
+    Attributes:
+        fire_range (float): Furthest from the camera (x) an enemy can shoot from.
+        cap (int): Most live enemy bullets.
+        camera_x (float): Camera position at the last `update`.
+        live (int): Live enemy bullets, counted at the last `update` plus shots since.
+        fired (int): Shots fired in the last tick (metric).
+        held (int): Shots held back by the cap in the last tick (metric).
+    """
+
+    def __init__(self, fire_range: float = ENEMY_FIRE_RANGE, cap: int = ENEMY_BULLET_CAP) -> None:
+        self.fire_range: float = fire_range
+        self.cap: int = cap
+        self.camera_x: float = 0.0
+        self.live: int = 0
+        self.fired: int = 0
+        self.held: int = 0
+
+    def allow(self, shooter) -> bool:
+        """Whether `shooter` may fire right now (able to, in range, under the cap). Counts the shot if so."""
+        if not shooter.can_fire() or abs(shooter.pos.x - self.camera_x) > self.fire_range:
+            return False
+        if self.live >= self.cap:
+            self.held += 1
+            return False
+        self.live += 1
+        self.fired += 1
+        return True
+
+    def update(self, flocks: dict[type, typing.Any], bullets: projectiles.BulletStore,
+               target: typing.Any, camera_x: float, dt: float) -> None:
+        """Runs the in-range enemies' timers and fires whoever's due at `target`. Once per tick."""
+        self.camera_x = camera_x
+        self.live = int(np.count_nonzero(bullets.owner[:bullets.count] == projectiles.ENEMY))
+        self.fired = 0
+        self.held = 0
+
+        for kind, flock in flocks.items():
+            interval = getattr(kind, "fire_interval", None)
+            if interval is None or not flock.members:
+                continue
+
+            # range gate for the whole type at once, only those near the camera tick
+            near = np.flatnonzero(np.abs(flock.positions()[:, 0] - camera_x) <= self.fire_range)
+            for row in near.tolist():
+                shooter = flock.members[row]
+                if shooter.fire_cooldown is None:
+                    shooter.fire_cooldown = random.uniform(0.0, interval) # first time in range, random phase
+
+                shooter.fire_cooldown -= dt
+                if shooter.fire_cooldown > 0:
+                    continue
+                # a lander carrying a humanoid off holds its shot (and doesn't take a slot under the cap)
+                if not shooter.can_fire():
+                    continue
+                if self.live >= self.cap:
+                    self.held += 1
+                    continue
+
+                shooter.fire_bullet(target.x, target.y)
+                shooter.fire_cooldown = interval
+                self.live += 1
+                self.fired += 1
@@ -0,0 +1,106 @@
+"""
+Allocations-per-frame counter.
+
+Wraps the update path (the simulation ticks of one frame) and counts the
+memory blocks Python's allocator holds at the end of it versus the start
+(`sys.getallocatedblocks`). Steady play should average ~0: anything the
+update path builds and keeps (new Vector2s / Rects stored on entities,
+growing lists, ...) shows up as a positive count.
+
+Temporaries that are freed again within the frame cancel out in that
+count, so with `trace` on, tracemalloc also reports each frame's peak
+bytes above the starting point, which a burst of temporaries does raise.
+tracemalloc slows everything down a lot, only turn it on to measure.
+
+Enabled with `--count-allocs` (see main.parse_args). Off, `begin`/`end`
+return straight away.
+"""
+
+import collections
+import sys
+import tracemalloc
+
+from constants import FRAMES_PER_SECOND
+
+
+class AllocationCounter(object):
+    """Net allocated blocks (and peak traced bytes) per frame, over a rolling window.
+
+    Attributes:
+        enabled (bool): Counting at all.
+        trace (bool): Also tracking peak bytes with tracemalloc.
+        blocks (collections.deque[int]): Net new blocks, one per frame (last `window` frames).
+        peaks (collections.deque[int]): Peak bytes above the frame's start, one per frame (trace only).
+        frames (int): Frames counted since the last `reset`.
+        total (int): Net new blocks since the last `reset`.
+    """
+
+    def __init__(self, enabled: bool = False, trace: bool = False, window: int = FRAMES_PER_SECOND) -> None:
+        self.enabled: bool = enabled
+        self.trace: bool = enabled and trace
+        self.blocks: collections.deque[int] = collections.deque(maxlen=window)
+        self.peaks: collections.deque[int] = collections.deque(maxlen=window)
+        self.frames: int = 0
+        self.total: int = 0
+        self._start_blocks: int = 0
+        self._start_bytes: int = 0
+
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self) -> None:
+        """Start of the measured part of a frame."""
+        if not self.enabled:
+            return
+        if self.trace:
+            tracemalloc.reset_peak()
+            self._start_bytes = tracemalloc.get_traced_memory()[0]
+        self._start_blocks = sys.getallocatedblocks()
+
+    def end(self) -> None:
+        """End of the measured part, records this frame."""
+        if not self.enabled:
+            return
+        blocks = sys.getallocatedblocks() - self._start_blocks
+        self.blocks.append(blocks)
+        self.total += blocks
+        self.frames += 1
+        if self.trace:
+            self.peaks.append(tracemalloc.get_traced_memory()[1] - self._start_bytes)
+
+    def reset(self) -> None:
+        self.blocks.clear()
+        self.peaks.clear()
+        self.frames = 0
+        self.total = 0
+
+    @property
+    def per_frame(self) -> float:
+        """Average net new blocks per frame over the window."""
+        return sum(self.blocks) / len(self.blocks) if self.blocks else 0.0
+
+    def report(self) -> str:
+        text = f"allocations: {self.per_frame:+.1f} blocks/frame (last {len(self.blocks)}), {self.total:+d} over {self.frames} frames"
+        if self.peaks:
+            text += f", peak {max(self.peaks)} B above frame start"
+        return text
+
+
+if __name__ == "__main__":
+    # a loop that keeps what it builds versus one that only updates in place
+    import pygame as pg
+
+    positions = [pg.Vector2(i, i) for i in range(1000)]
+    velocities = [pg.Vector2(1, 0.5) for _ in range(1000)]
+    kept: list = []
+
+    for name, step in (
+        ("rebuilding", lambda: kept.extend(pos + vel for pos, vel in zip(positions, velocities))),
+        ("in place", lambda: [pos.update(pos.x + vel.x, pos.y + vel.y) for pos, vel in zip(positions, velocities)]),
+    ):
+        counter = AllocationCounter(enabled=True, trace=True)
+        for _ in range(60):
+            counter.begin()
+            step()
+            counter.end()
+        print(f"{name:10}: {counter.report()}")
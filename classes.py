@@ -1,14 +1,26 @@
+import bisect
+import itertools
 import math
 import random
 import typing
 
 from enum import Enum, auto
 
+import numpy as np
 import pygame as pg
 from pygame.math import Vector2
 
+import ai
+import ecs
 import misc
+import pools
+import projectiles
+import render
+import sectors
 import sound
+import spawning
+import steering
+import timestep
 
 from constants import *
 
@@ -33,7 +45,7 @@ class Player(pg.sprite.Sprite):
         direction (int): The direction the player is facing (0 for left, 1 for right).
             - yes i know this is crap
         
-        bullets (typing.List[PlayerBullet]): List of bullets fired by the player.
+        bullets (projectiles.BulletStore): Where the player's bullets go (the game shares one store with the enemies).
         bullet_cooldown_ms (float): Cooldown time in milliseconds between firing bullets.
         cooldown_timer (int): Timer to track bullet cooldown.
     """
@@ -46,6 +58,7 @@ class Player(pg.sprite.Sprite):
         super().__init__()
         self.rect: pg.Rect = pg.Rect(x, y, width, height)
         self.pos: Vector2 = Vector2(x, y)
+        self.prev_pos: Vector2 = self.pos.copy() # position at the previous simulation tick, for drawing
 
         self.health: int = 100
         self.smart_bombs: int = 3
@@ -58,44 +71,43 @@ class Player(pg.sprite.Sprite):
         self.max_speed_y: int = 7
         self.accel_rate: int = 50
 
-        self.draw_x = x
-
         # careful that drag does not exceed accel_rate
         self.drag_x: int = 1 
         self.drag_y: int = 50
 
         self.direction = 0  # left:0, right:1
 
-        self.bullets: typing.List[PlayerBullet] = []
+        self.bullets: projectiles.BulletStore = projectiles.BulletStore()
         self.bullet_cooldown_ms: float = 100
         self.cooldown_timer: int = 0
         self.bullet_speed: int = 30
 
         self.lookahead_compensation: float = 0.0
 
-        # given positions are defaulted
-        self.hitbox_top = pg.Rect(self.draw_x + self.rect.width // 7, self.pos.y, self.rect.width // 4, self.rect.height * 2 // 3,)
-        self.hitbox_bottom = pg.Rect(self.draw_x + self.rect.width // 7, self.pos.y + self.rect.height * 2 // 3, self.rect.width * 6 // 7, self.rect.height // 4)
+        # rect before a dash teleported the ship, so the dash path can be swept for collisions
+        self.dash_from: pg.Rect | None = None
+
+        # given positions are defaulted (world space, like everything else)
+        # kept up to date by _update_hitboxes in the update step, never in draw
+        self.hitbox_top = pg.Rect(self.pos.x + self.rect.width // 7, self.pos.y, self.rect.width // 4, self.rect.height * 2 // 3,)
+        self.hitbox_bottom = pg.Rect(self.pos.x + self.rect.width // 7, self.pos.y + self.rect.height * 2 // 3, self.rect.width * 6 // 7, self.rect.height // 4)
         
         #player states
         self.state = Player.States.IDLE
 
-        self.idle_sprite = pg.image.load(os.path.join("images", "player", "idle.png")).convert_alpha()
-        self.idle_sprite = pg.transform.scale(self.idle_sprite, (width, self.idle_sprite.get_height() / self.idle_sprite.get_width() * width))
+        self.idle_sprite = render.load_sprite(os.path.join("images", "player", "idle.png"), width)
 
-        self.move_sprites = [pg.image.load(os.path.join("images", "player", "moving1.png")).convert_alpha(),
-                             pg.image.load(os.path.join("images", "player", "moving2.png")).convert_alpha(),
-                             pg.image.load(os.path.join("images", "player", "moving3.png")).convert_alpha(),
+        self.move_sprites = [render.load_sprite(os.path.join("images", "player", "moving1.png"), width),
+                             render.load_sprite(os.path.join("images", "player", "moving2.png"), width),
+                             render.load_sprite(os.path.join("images", "player", "moving3.png"), width),
                              ]
         
-        for i, sprite in enumerate(self.move_sprites):
-            self.move_sprites[i] = pg.transform.scale(sprite, (width, sprite.get_height() / sprite.get_width() * width))
-        
         self.move_sprites_pointer: int = 0
         self.move_sprites_timer: float = 0.0
         
         # current image!
         self.image = self.idle_sprite
+        self.mask: pg.mask.Mask = render.sprite_mask(self.image)
         self.smart_bomb_image = pg.image.load(os.path.join("images", "player", "smart_bomb.png")).convert_alpha()
 
         self.smart_bomb_height: int = TOP_WIDGET_HEIGHT // 8
@@ -111,7 +123,7 @@ class Player(pg.sprite.Sprite):
         self.invul_timer: float = 0.0
         self.INVUL_DURATION: float = 2.0
 
-    def health_indicator(self, offset_x: float) -> pg.sprite.Group | None:
+    def health_indicator(self) -> pg.sprite.Group | None:
         if self.state == Player.States.DEAD:
             return None
         
@@ -123,7 +135,7 @@ class Player(pg.sprite.Sprite):
                 for _ in range(intensity):
 
                     # smoke/sparks
-                    return misc.explosion_effect(Vector2(self.hitbox_top.x - offset_x, self.hitbox_top.y + 20),
+                    return misc.explosion_effect(Vector2(self.hitbox_top.x, self.hitbox_top.y + 20),
                                         number = 7, 
                                         min_lifetime=0.2, 
                                         max_lifetime=0.7,
@@ -194,7 +206,9 @@ class Player(pg.sprite.Sprite):
         # clamp to max y-axis speed
         self.velocity.y = max(-self.max_speed_y, min(self.velocity.y, self.max_speed_y))
 
-        self.pos += self.velocity
+        frames = timestep.frames(dt)
+        self.pos.x += self.velocity.x * frames
+        self.pos.y += self.velocity.y * frames
 
         # world border clamp
         if self.pos.x < -WORLD_WIDTH // 2:
@@ -203,11 +217,21 @@ class Player(pg.sprite.Sprite):
         elif self.pos.x > WORLD_WIDTH // 2:
             self.pos.x = WORLD_WIDTH // 2
             self.velocity.x = 0
-        self.rect.x = int(self.pos.x)
 
+        self.rect.topleft = (int(self.pos.x), int(self.pos.y))
+        self._update_hitboxes()
 
-        # assigns Vector2 to Tuple[int, int], but works
-        self.rect.center = self.pos # type: ignore
+    def _update_hitboxes(self) -> None:
+        """Moves the hitboxes (in place) and picks the mask for the current frame + facing."""
+        width, height = self.rect.width, self.rect.height
+        if self.direction == 0:
+            self.hitbox_top.update(self.pos.x + width // 7, self.pos.y, width // 4, height * 2 // 3)
+            self.hitbox_bottom.update(self.pos.x + width // 7, self.pos.y + height * 2 // 3, width * 6 // 7, height // 4)
+            self.mask = render.sprite_mask(self.image)
+        else:
+            self.hitbox_top.update(self.pos.x + width * 6 // 7 - width // 4, self.pos.y, width // 4, height * 2 // 3)
+            self.hitbox_bottom.update(self.pos.x, self.pos.y + height * 2 // 3, width * 6 // 7, height // 4)
+            self.mask = render.sprite_mask(render.flipped(self.image))
 
     def fire_bullet(self) -> None:
         """Fires a bullet."""
@@ -218,8 +242,10 @@ class Player(pg.sprite.Sprite):
         if self.cooldown_timer > self.bullet_cooldown_ms:
             
             self.cooldown_timer = 0
-            bullet = PlayerBullet(self.rect.x + (self.rect.width // 2), self.rect.y + (self.rect.height // 2), width=10, height=10, angle = self.direction * -180, speed=self.bullet_speed)
-            self.bullets.append(bullet)
+            # 10x10 bullet with its top left corner on the middle of the ship
+            self.bullets.fire(self.rect.x + (self.rect.width // 2) + 5, self.rect.y + (self.rect.height // 2) + 5,
+                              speed=self.bullet_speed, angle=self.direction * -180,
+                              owner=projectiles.PLAYER, radius=5, image=render.rect_stamp(10, 10, WHITE))
 
             # sound
             random_sound = random.choice([sound.PLAYER_FIRE1, sound.PLAYER_FIRE2, sound.PLAYER_FIRE3, sound.PLAYER_FIRE4,])
@@ -227,14 +253,14 @@ class Player(pg.sprite.Sprite):
         
     def gets_hit_by(self, source) -> None:
         """Damages player according to the source of damage.
-        (eg: class Enemy does 20 damage)
+        (eg: class Enemy does 100 damage, projectiles.ENEMY (an enemy bullet) does 20)
         """
         if self.state == Player.States.DEAD:
             return
         if self.invulnerable:
             return
 
-        if isinstance(source, EnemyBullet):
+        if source == projectiles.ENEMY:
             self.health -= 20
 
         elif isinstance(source, (Enemy, Mutant, Baiter)):
@@ -249,14 +275,13 @@ class Player(pg.sprite.Sprite):
     def revive(self, offset_x: float) -> pg.sprite.Group:
         self.accel_x = 0.0
         self.accel_y = 0.0
-        self.velocity = Vector2(0,0)
+        self.velocity.update(0, 0)
         self.health = 100
         return misc.explosion_effect(Vector2(self.pos.x + self.rect.width // 2, self.pos.y + self.rect.height // 2), min_lifetime=0.7, max_lifetime=1.2, min_speed=400, max_speed=500, reversed=True)
     
-    def update(self, offset_x: float, dt: float, keybinds: dict[str, int]) -> None:
-        self.draw_x = int(self.pos.x + offset_x)
-        self.rect.x, self.rect.y = int(self.draw_x), int(self.pos.y)
+    def update(self, dt: float, keybinds: dict[str, int]) -> None:
         self.pos.y = max(0, min(GAMEPLAY_HEIGHT - self.rect.height, self.pos.y))
+        self.rect.topleft = (int(self.pos.x), int(self.pos.y))
 
         if self.invulnerable:
             self.invul_timer += dt
@@ -281,32 +306,27 @@ class Player(pg.sprite.Sprite):
             self.image = self.idle_sprite
             pg.mixer.music.fadeout(50)
 
-    def draw(self, surface: pg.Surface) -> None:
+        self._update_hitboxes()
+
+    def draw(self, surface: pg.Surface, offset_x: float, alpha: float = 1.0) -> None:
         if self.state == Player.States.DEAD:
             return
-        
+
+        # camera is only applied here, everything else stays in world space
+        # (drawn between the last two simulation ticks, see timestep.py)
+        draw_x: int = int(timestep.lerp(self.prev_pos.x, self.pos.x, alpha) + offset_x)
+        draw_y: int = int(timestep.lerp(self.prev_pos.y, self.pos.y, alpha))
+
+        # blink while invulnerable
         if self.invulnerable:
             period = 0.1
-            if int(self.invul_timer / period) % 2 == 0:
-                # draw normally
-                if self.direction == 0:
-                    surface.blit(self.image, (self.draw_x, self.rect.y))
-                else:
-                    flipped = pg.transform.flip(self.image, True, False)
-                    surface.blit(flipped, (self.draw_x, self.rect.y))
-            return
-
+            if int(self.invul_timer / period) % 2 != 0:
+                return
 
         if self.direction == 0:
-            surface.blit(self.image, (self.draw_x, self.rect.y))
-            self.hitbox_top = pg.Rect(self.draw_x + self.rect.width // 7, self.pos.y, self.rect.width // 4, self.rect.height * 2 // 3,)
-            self.hitbox_bottom = pg.Rect(self.draw_x + self.rect.width // 7, self.pos.y + self.rect.height * 2 // 3, self.rect.width * 6 // 7, self.rect.height // 4)
+            surface.blit(self.image, (draw_x, draw_y))
         else:
-            self.flipped = pg.transform.flip(self.image, True, False)
-            surface.blit(self.flipped, (self.draw_x, self.rect.y))
-
-            self.hitbox_top = pg.Rect(self.draw_x + self.rect.width * 6 // 7 - self.rect.width // 4, self.pos.y, self.rect.width // 4, self.rect.height * 2 // 3,)
-            self.hitbox_bottom = pg.Rect(self.draw_x, self.pos.y + self.rect.height * 2 // 3, self.rect.width * 6 // 7, self.rect.height // 4)
+            surface.blit(render.flipped(self.image), (draw_x, draw_y))
 
         #pg.draw.rect(surface, WHITE, self.hitbox_top)
 
@@ -332,101 +352,74 @@ class PlayerGroup(pg.sprite.GroupSingle):
 
         self.lives_image = pg.transform.scale(self.lives_image, (self.lives_width, self.lives_height))
 
-    def update_items(self, dt: float, collision_list: list, surface: pg.Surface, offset_x: float, keybinds, particles: list[pg.sprite.Group]) -> None:
-        """Updates all items in player's inventory."""
-        for item in self.upgrades:
-            if hasattr(item, "update"):
-                item.update(player=self.sprite, 
-                            dt=dt, 
-                            collision_list=collision_list, 
-                            surface=surface,
-                            offset_x=offset_x,
-                            keybinds=keybinds,
-                            particles=particles,
-
-                            )
-
-class PlayerBullet(object):
-    def __init__(self, x: float, y: float, width: int, height: int, angle, speed: int) -> None:
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.rect: pg.Rect = pg.Rect(x, y, width, height)
-
-        self.speed = speed
-        self.angle = angle
-        self.velocity = pg.math.Vector2()
-        self.velocity.from_polar((self.speed, self.angle)) # polar coordinates
-
-    def draw(self, screen) -> None:
-        pg.draw.rect(screen, WHITE, pg.Rect(self.x, self.y, self.width, self.height))
-
-    def update(self) -> None:
-        self.x += self.velocity.x
-        self.y += self.velocity.y
-
-        self.rect.x, self.rect.y = int(self.x), int(self.y)
-
-class EnemyBullet(object):
-    def __init__(self, x: float | int, y: float | int, speed: int, angle, radius) -> None:
-        self.x = x
-        self.y = y
-        self.radius = radius
-        self.rect: pg.Rect = pg.Rect(x, y, radius, radius)
-
-        self.speed = speed
-        self.angle = angle
-        self.velocity = pg.math.Vector2()
-        self.velocity.from_polar((self.speed, self.angle)) # polar coordinates
-
-    def draw(self, screen: pg.Surface, offset_x: float):
-       screen_x = self.x + offset_x
-       self.rect.x = int(screen_x)
-       pg.draw.circle(screen, WHITE, (screen_x, self.y), self.radius)
-    
-    def update(self) -> None:
-        self.x += self.velocity.x
-        self.y += self.velocity.y
-
-        self.rect.x, self.rect.y = int(self.x), int(self.y)
-
 class EnemyState(Enum):
     ATTACKING = 1
     CAPTURING = 2
 
 
 class Enemy(pg.sprite.Sprite):
+    fire_interval: float | None = ENEMY_FIRE_INTERVAL # seconds between shots, None = doesn't shoot (see ai.FireScheduler)
+
     def __init__(self, spawn_x: int, spawn_y: int) -> None:
         super().__init__()
-        self.state = EnemyState.ATTACKING
-        self.spawn_x = spawn_x
-        self.spawn_y = spawn_y
-        self.draw_x: float | int = spawn_x
-        self.pos = Vector2(spawn_x, spawn_y)
         self.width = 50
         self.height = 50
-        self.rect: pg.Rect = pg.Rect(spawn_x, spawn_y, self.width, self.height)
         self.speed = 1.2
         self.max_speed = 2.0
         self.acceleration = 0.10
-        self.velocity = Vector2(0, 0)
         self.chase_distance = 1000
+        self.chase_probability = 0.6
+        self.image = render.load_sprite(os.path.join("images", "enemies", "lander.png"), self.width)
+        self.mask: pg.mask.Mask = render.sprite_mask(self.image)
+
+        self.pos = Vector2(spawn_x, spawn_y)
+        self.prev_pos: Vector2 = self.pos.copy()
+        self.rect: pg.Rect = pg.Rect(spawn_x, spawn_y, self.width, self.height)
+        self.velocity = Vector2(0, 0)
+        self.reset(spawn_x, spawn_y)
+
+    def reset(self, spawn_x: int, spawn_y: int) -> None:
+        """Back to a fresh lander at (spawn_x, spawn_y), when it's reused (see pools.py)."""
+        self.group: EnemyGroup | None = None
+        self._state: EnemyState = EnemyState.ATTACKING
+        self.spawn_x = spawn_x
+        self.spawn_y = spawn_y
+        self.pos.update(spawn_x, spawn_y)
+        self.prev_pos.update(self.pos)
+        self.rect.topleft = (spawn_x, spawn_y)
+        self.velocity.update(0, 0)
         self.offset_x = 0
-        self.bullets: typing.List[EnemyBullet] = []
-        self.idle_sprite = pg.image.load(os.path.join("images", "enemies", "lander.png")).convert_alpha()
-        self.image = pg.transform.scale(self.idle_sprite, (self.width, self.idle_sprite.get_height() / self.idle_sprite.get_width() * self.width))
+        self.flock_row: int | None = None  # row in EnemyGroup's steering.Flock (velocity lives there while in the group)
         self.wander_angle = random.uniform(0, 360)
         self.wander_timer = 0.0
-        self.chase_probability = 0.6
-        self.closest_humanoid: Vector2 = Vector2(0, 0)
+        self.chase: bool = False # last chase-or-wander decision (see ai.py)
+        self.target: Humanoid | None = None # humanoid it's going for while capturing
+        self.target_generation: int = 0 # target's pool generation when picked, a different one = recycled (see pools.py)
         self.captured_humanoid = None
         self.scanned = False
+        self.fire_cooldown: float | None = None # till its next shot, first one picked by ai.FireScheduler
 
-    def death(self, sound_on: bool = True) -> pg.sprite.Group:
+    def hunt(self, humanoid: "Humanoid") -> None:
+        """Picks the humanoid to capture."""
+        self.target = humanoid
+        self.target_generation = humanoid.generation
+
+    def forget_recycled(self) -> None:
+        """Drops the target / captured humanoid if it died and was reused as another one (see pools.py), back to attacking."""
+        if self.target is not None and self.target.generation != self.target_generation:
+            self.target = None
+            self.captured_humanoid = None
+            self.state = EnemyState.ATTACKING
+
+    def drop_humanoid(self) -> None:
+        """Lets go of the captured humanoid (it falls), if it's still the same one."""
+        self.forget_recycled()
         if self.captured_humanoid is not None:
             self.captured_humanoid.state = HumanoidState.FALLING
             self.captured_humanoid = None
+
+    def death(self, sound_on: bool = True) -> pg.sprite.Group:
+        self.drop_humanoid()
         if sound_on:
             random_sound: pg.mixer.Sound = random.choice([sound.ENEMY_EXPLOSION1, sound.ENEMY_EXPLOSION2, sound.ENEMY_EXPLOSION3, sound.ENEMY_EXPLOSION4, sound.ENEMY_EXPLOSION5])
             for i in range(1,6):
@@ -438,97 +431,80 @@ class Enemy(pg.sprite.Sprite):
         self.kill()
         return misc.explosion_effect(self.pos, 50, min_lifetime=0.8, max_lifetime=2.0)
 
-    def draw(self, surface) -> None:
-        surface.blit(self.image, (self.draw_x, self.rect.y))
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
+        draw_x = timestep.lerp(self.prev_pos.x, self.pos.x, alpha)
+        if render.on_screen(draw_x, self.width, offset_x):
+            batch.add(self.image, (draw_x + offset_x, timestep.lerp(self.prev_pos.y, self.pos.y, alpha)))
+
+        #pg.draw.rect(surface, GREEN, pg.Rect(self.pos.x + offset_x, self.pos.y, self.width, self.height))
+
+    @property
+    def state(self) -> EnemyState:
+        return self._state
+
+    @state.setter
+    def state(self, state: EnemyState) -> None:
+        # the group keeps landers indexed by state, so it has to hear about every change
+        if self.group is not None and state != self._state:
+            self.group.restate(self, self._state, state)
+        self._state = state
 
-        #pg.draw.rect(surface, GREEN, pg.Rect(self.draw_x, self.pos.y, self.width, self.height))
+    @property
+    def capturing(self) -> bool:
+        return self.state == EnemyState.CAPTURING
 
-    def update(self, offset_x: float, player, humanoids_pos, screen) -> None:
-        if hasattr(player, "state") and getattr(player, "state", None) == Player.States.DEAD:
-            self.draw_x = self.pos.x + offset_x
-            self.rect.x = int(self.draw_x)
-            self.rect.y = int(self.pos.y)
+    def capture_step(self) -> None:
+        """After steering: grab the target humanoid when close, turn into a mutant once high enough."""
+        if self.state != EnemyState.CAPTURING:
             return
-        player_pos = player.pos
-        if self.state == EnemyState.ATTACKING:
-            distance = self.pos.distance_to(player_pos)
-            if distance < self.chase_distance and random.random() < self.chase_probability:
-                direction = (player_pos - self.pos).normalize() if distance != 0 else Vector2(0, 0)
-                self.wander_timer += 1
-                if self.wander_timer > 30:
-                    self.wander_angle = random.uniform(-10, 10)
-                    self.wander_timer = 0
-
-                # Prevent enemy from going off screen vertically
-                if self.pos.y < 0:
-                    self.pos.y = 0
-                    self.velocity.y = abs(self.velocity.y)
-                elif self.pos.y > GAMEPLAY_HEIGHT - self.height:
-                    self.pos.y = GAMEPLAY_HEIGHT - self.height
-                    self.velocity.y = -abs(self.velocity.y)
-
-                angle = math.atan2(direction.y, direction.x) + math.radians(self.wander_angle)
-                move_direction = Vector2(math.cos(angle), math.sin(angle))
-            else:
-                self.wander_timer += 1
-                if self.wander_timer > 30:
-                    self.wander_angle = random.uniform(0, 2 * math.pi)
-                    self.wander_timer = 0
-                move_direction = Vector2(math.cos(self.wander_angle), math.sin(self.wander_angle))
-            desired_velocity = move_direction * self.speed
-            self.velocity += (desired_velocity - self.velocity) * self.acceleration
-            if self.velocity.length() > self.max_speed:
-                self.velocity.scale_to_length(self.max_speed)
-            self.pos += self.velocity
-        elif self.state == EnemyState.CAPTURING:
-            direction = (self.closest_humanoid - self.pos).normalize() if self.closest_humanoid != self.pos else Vector2(0, 0)
-            angle = math.atan2(direction.y, direction.x)
-            move_direction = Vector2(math.cos(angle), math.sin(angle))
-            desired_velocity = move_direction * self.speed
-            self.velocity += (desired_velocity - self.velocity) * self.acceleration
-            if self.velocity.length() > self.max_speed:
-                self.velocity.scale_to_length(self.max_speed)
-            self.pos += self.velocity
-            if self.pos.distance_to(self.closest_humanoid) < 10 and self.captured_humanoid is None:
-                for humanoid in humanoids_pos:
-                    if humanoid.pos == self.closest_humanoid and humanoid.state != HumanoidState.CAPTURED:
-                        humanoid.state = HumanoidState.CAPTURED
-                        self.captured_humanoid = humanoid
-                        break
-            if self.pos.y < CAPTURE_HEIGHT:
-                if self.captured_humanoid is not None:
-                    self.captured_humanoid.state = HumanoidState.FALLING
-                    self.captured_humanoid.state = HumanoidState.KILLED
-                    self.captured_humanoid = None
-
-                if hasattr(self, "group") and self.group is not None:
-                    print("humanoid converted to mutant!")
-                    self.group.add_mutant(self.pos.x, 0)
 
+        self.forget_recycled()
+        if self.captured_humanoid is None:
+            # target's gone (shot, rescued, grabbed by someone else...), back to attacking
+            if self.target is None or not self.target.alive() or self.target.state != HumanoidState.IDLE:
+                self.target = None
                 self.state = EnemyState.ATTACKING
+                return
 
-        self.pos.y = max(0, min(self.pos.y, GROUND_Y + 50 - self.height)) # + 50 so landers can still reach humanoids
-        
-        self.draw_x = self.pos.x + offset_x
-        self.rect.x = int(self.draw_x)
-        self.rect.y = int(self.pos.y)
+            if self.pos.distance_to(self.target.pos) < 10:
+                self.target.state = HumanoidState.CAPTURED
+                self.captured_humanoid = self.target
+
+        if self.pos.y < CAPTURE_HEIGHT:
+            if self.captured_humanoid is not None:
+                self.captured_humanoid.state = HumanoidState.FALLING
+                self.captured_humanoid.state = HumanoidState.KILLED
+                self.captured_humanoid = None
+            self.target = None
+
+            if self.group is not None:
+                print("humanoid converted to mutant!")
+                self.group.add_mutant(self.pos.x, 0)
+
+            self.state = EnemyState.ATTACKING
+
+    def can_fire(self) -> bool:
+        """Whether a shot now would actually go out (not while carrying a humanoid off, or outside a group)."""
+        return self.state != EnemyState.CAPTURING and self.group is not None
 
     def fire_bullet(self, player_x: float, player_y: float) -> None:
-        if getattr(self, "state", None) == EnemyState.CAPTURING:
+        if not self.can_fire():
             return
         dx = player_x - self.pos.x
         dy = player_y - self.pos.y
         angle = math.degrees(math.atan2(dy, dx)) + random.randint(-2, 2)
         spawn_x = self.pos.x + self.width / 2
         spawn_y = self.pos.y + self.height / 2
-        bullet = EnemyBullet(spawn_x, spawn_y, radius=5, speed=6, angle=angle)
-        self.bullets.append(bullet)
+        self.group.bullets.fire(spawn_x, spawn_y, speed=6, angle=angle,
+                                owner=projectiles.ENEMY, radius=5, image=render.circle_stamp(5, WHITE))
 
 class Mutant(pg.sprite.Sprite):
+    fire_interval: float | None = ENEMY_FIRE_INTERVAL # seconds between shots, None = doesn't shoot (see ai.FireScheduler)
+
     def __init__(self, spawn_x: int, spawn_y: int) -> None:
         super().__init__()
         self.pos: Vector2 = Vector2(spawn_x, spawn_y)
-        self.draw_x: float | int = spawn_x
+        self.prev_pos: Vector2 = self.pos.copy()
 
         # IN PIXELS!!!
         self.speed: float = 450.0
@@ -542,76 +518,41 @@ class Mutant(pg.sprite.Sprite):
 
         self.rect: pg.Rect = pg.Rect(spawn_x, spawn_y, self.width, self.height)
 
-        self.idle_sprite: pg.Surface = pg.image.load(os.path.join("images", "enemies", "mutant.png")).convert_alpha() \
+        self.image: pg.Surface = render.load_sprite(os.path.join("images", "enemies", "mutant.png"), self.width) \
             if os.path.exists(os.path.join("images", "enemies", "mutant.png")) \
             else pg.Surface((self.width, self.height))
-        
-        self.image: pg.Surface = pg.transform.scale(self.idle_sprite, (self.width, self.idle_sprite.get_height() / self.idle_sprite.get_width() * self.width))
+        self.mask: pg.mask.Mask = render.sprite_mask(self.image)
+
+        self.change_interval: float = 0.5
+
+        # shooting
+        self._shoot_chance_per_second: float = 0.1
+        self.reset(spawn_x, spawn_y)
+
+    def reset(self, spawn_x: int, spawn_y: int) -> None:
+        """Back to a fresh mutant at (spawn_x, spawn_y), when it's reused (see pools.py)."""
+        self.pos.update(spawn_x, spawn_y)
+        self.prev_pos.update(self.pos)
+        self.rect.topleft = (spawn_x, spawn_y)
+        self.velocity.update(0, 0)
 
         # wander
         self.wander_timer: float = 0.0
         self.wander_angle: float = random.uniform(0, 2*math.pi)
-        self.change_interval: float = 0.5
 
         # zig-zag
         self._oscillator: float = 0.0 # running time for sine oscillation
         self._zigzag_freq: float = 0.3 + random.uniform(-0.1, 0.5)# oscillations per second
         self._zigzag_amp: float = 0.7 + random.uniform(-0.4, 0.2)# how strongly to pull sideways (0-1 please don't set this to be any more i swear)
 
-        # shooting
-        self._shoot_chance_per_second: float = 0.1
-        self.bullets: list[EnemyBullet] = []
+        self.group: EnemyGroup | None = None
+        self.flock_row: int | None = None
+        self.fire_cooldown: float | None = None # till its next shot, first one picked by ai.FireScheduler
     
-    def draw(self, surface) -> None:
-        surface.blit(self.image, (self.draw_x, self.rect.y))
-
-    def update(self, offset_x: float, player: Player, humanoids_pos, screen: pg.Surface, dt: float) -> None:
-        if player is None:
-            return
-        
-        if hasattr(player, "state") and getattr(player, "state", None) == Player.States.DEAD:
-            self.draw_x = self.pos.x + offset_x
-            self.rect.x = int(self.draw_x)
-            self.rect.y = int(self.pos.y)
-            return
-        
-        print(f"Mutant: dt={dt}, pos={self.pos}")
-        
-        to_player = player.pos - self.pos
-        distance = to_player.length()
-
-        if distance > 0:
-            base_dir = to_player.normalize()
-        else:
-            base_dir = Vector2(0, 0)
-
-        # zig-zag effect
-        self._oscillator += dt * self._zigzag_freq * 2 * math.pi
-        perp = Vector2(-base_dir.y, base_dir.x) # perpendicular
-        zig_offset = math.sin(self._oscillator) * self._zigzag_amp
-
-        # direction of sin [-1, 1] combined with direction
-        zigzag_dir = (base_dir + perp * zig_offset).normalize()
-
-        desired_velocity = zigzag_dir * self.speed
-
-        self.velocity += (desired_velocity - self.velocity) * self.acceleration
-        
-        if self.velocity.length() > self.max_speed:
-            self.velocity.scale_to_length(self.max_speed)
-
-        self.pos += self.velocity * dt
-
-        # clamp vertically
-        self.pos.y = max(0, min(GAMEPLAY_HEIGHT - self.height, self.pos.y))
-
-        self.draw_x = self.pos.x + offset_x
-        self.rect.x = int(self.draw_x)
-        self.rect.y = int(self.pos.y)
-
-        # randomly shoot at player
-        if random.random() < (self._shoot_chance_per_second * dt):
-            self.fire_bullet(player.pos.x, player.pos.y)
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
+        draw_x = timestep.lerp(self.prev_pos.x, self.pos.x, alpha)
+        if render.on_screen(draw_x, self.width, offset_x):
+            batch.add(self.image, (draw_x + offset_x, timestep.lerp(self.prev_pos.y, self.pos.y, alpha)))
 
     def death(self, sound_on: bool = True) -> pg.sprite.Group:
         if sound_on:
@@ -625,7 +566,13 @@ class Mutant(pg.sprite.Sprite):
         self.kill()
         return misc.explosion_effect(self.pos, 50, min_lifetime=0.8, max_lifetime=2.0)
 
+    def can_fire(self) -> bool:
+        """Whether a shot now would actually go out (only from inside a group)."""
+        return self.group is not None
+
     def fire_bullet(self, player_x: float, player_y: float) -> None:
+        if not self.can_fire():
+            return
         dx = player_x - self.pos.x
         dy = player_y - self.pos.y
 
@@ -633,65 +580,44 @@ class Mutant(pg.sprite.Sprite):
         spawn_x = self.pos.x + self.width / 2
         spawn_y = self.pos.y + self.height / 2
 
-        bullet = EnemyBullet(spawn_x, spawn_y, radius=5, speed=7, angle=angle)
-        self.bullets.append(bullet)
+        self.group.bullets.fire(spawn_x, spawn_y, speed=7, angle=angle,
+                                owner=projectiles.ENEMY, radius=5, image=render.circle_stamp(5, WHITE))
 
 class Baiter(pg.sprite.Sprite):
     # similar to old mutant code
+    fire_interval: float | None = None # rams the player instead
+
     def __init__(self, spawn_x: int, spawn_y: int) -> None:
         super().__init__()
-        self.speed: float = 9.5 + random.uniform(-1, 1)
-        self.max_speed: float = 13.0 + random.uniform(-1, 1)
-        self.acceleration: float = 0.04 + random.uniform(-0.01, 0.05)
         self.velocity: Vector2 = Vector2(0, 0)
         self.pos = Vector2(spawn_x, spawn_y)
+        self.prev_pos: Vector2 = self.pos.copy()
 
         self.width: int = 35
         self.height: int = 18
         self.rect: pg.Rect = pg.Rect(spawn_x, spawn_y, self.width, self.height)
         self.colour: tuple[int,int,int] = (200, 50, 50)
 
-    def update(self, offset_x: float, player: Player) -> None:
-        # first check if player is dead
-        if hasattr(player, "state") and getattr(player, "state", None) == Player.States.DEAD:
-            self.draw_x: float = self.pos.x + offset_x
-            self.rect.x = int(self.draw_x)
-            self.rect.y = int(self.pos.y)
-            return
-        
-        # randomize pod's direction slightly
-        angle_offset = random.uniform(-0.15, 0.15)  # radians
-        direction_vector = (player.pos - self.pos)
-
-        if direction_vector.length() != 0:
-            direction_vector = direction_vector.normalize()
-
-            cos_theta = math.cos(angle_offset)
-            sin_theta = math.sin(angle_offset)
-            x, y = direction_vector.x, direction_vector.y
-
-            direction = Vector2(
-            x * cos_theta - y * sin_theta,
-            x * sin_theta + y * cos_theta
-            )
-        else:
-            direction = Vector2(0, 0)
-
-        desired_velocity: Vector2 = direction * self.speed
-        self.velocity += (desired_velocity - self.velocity) * self.acceleration
-
-        if self.velocity.length() > self.max_speed:
-            self.velocity.scale_to_length(self.max_speed)
-
-        self.pos += self.velocity
-        self.pos.y = max(0, min(GAMEPLAY_HEIGHT - self.height, self.pos.y)) # clamp vertically
+        self.image: pg.Surface = render.rect_stamp(self.width, self.height, self.colour)
+        self.mask: pg.mask.Mask = render.sprite_mask(self.image)
+        self.reset(spawn_x, spawn_y)
 
-        self.draw_x = self.pos.x + offset_x
-        self.rect.x = int(self.draw_x)
-        self.rect.y = int(self.pos.y)
-
-    def draw(self, screen: pg.Surface) -> None:
-        pg.draw.rect(screen, self.colour, self.rect)
+    def reset(self, spawn_x: int, spawn_y: int) -> None:
+        """Back to a fresh baiter at (spawn_x, spawn_y), when it's reused (see pools.py)."""
+        self.speed: float = 9.5 + random.uniform(-1, 1)
+        self.max_speed: float = 13.0 + random.uniform(-1, 1)
+        self.acceleration: float = 0.04 + random.uniform(-0.01, 0.05)
+        self.velocity.update(0, 0)
+        self.pos.update(spawn_x, spawn_y)
+        self.prev_pos.update(self.pos)
+        self.rect.topleft = (spawn_x, spawn_y)
+        self.group: EnemyGroup | None = None
+        self.flock_row: int | None = None
+
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
+        draw_x = timestep.lerp(self.prev_pos.x, self.pos.x, alpha)
+        if render.on_screen(draw_x, self.width, offset_x):
+            batch.add(self.image, (draw_x + offset_x, timestep.lerp(self.prev_pos.y, self.pos.y, alpha)))
 
     def death(self, sound_on: bool = True) -> pg.sprite.Group:
         if sound_on:
@@ -706,9 +632,24 @@ class Baiter(pg.sprite.Sprite):
         return misc.explosion_effect(self.pos, 50, min_lifetime=0.8, max_lifetime=2.0)
 
 class EnemyGroup(pg.sprite.Group):
-    def __init__(self) -> None:
+    """Every enemy, indexed by type (the steering flocks) and by state (landers).
+
+    The indexes are kept up to date as enemies come, go and change state
+    (see Enemy.state), so systems iterate exactly who they need, without
+    the copy `sprites()` makes. Don't add or kill while iterating one of
+    them, collect first.
+
+    Attributes:
+        flocks (dict[type, steering.Flock]): Members and steering state per enemy type.
+        by_state (dict[EnemyState, dict]): Landers per state (dicts as ordered sets).
+    """
+
+    def __init__(self, bullets: projectiles.BulletStore | None = None, spawns: spawning.SpawnSampler | None = None) -> None:
         super().__init__()
-        self.bullets: typing.List[EnemyBullet] = []
+        # enemies fire straight into this (see Enemy.fire_bullet)
+        self.bullets: projectiles.BulletStore = bullets if bullets is not None else projectiles.BulletStore()
+        # where baiters pop up (see spawning.py)
+        self.spawns: spawning.SpawnSampler = spawns if spawns is not None else spawning.SpawnSampler(spawning.ENEMY_AREA, spawning.ENEMY_SPACING)
         self.capturing_limit: int = 2
         self.capturing_timer: float = 0.0
         self.capturing_interval: float = 3.0
@@ -717,30 +658,99 @@ class EnemyGroup(pg.sprite.Group):
         self.baiter_timer: float = 0.0
         self.time_until_baiters_spawn: float = 15.0
 
-    def add(self, *sprites) -> None:
-        super().add(*sprites)
-        for sprite in sprites:
-            if isinstance(sprite, (Enemy, Mutant)):
-                if not hasattr(sprite, "group"):
-                    sprite.group = self
+        # steering state per enemy type, in arrays (see steering.py)
+        self.flocks: dict[type, steering.Flock] = {
+            Enemy: steering.Flock("landers", steering.LANDER_FIELDS),
+            Mutant: steering.Flock("mutants", steering.MUTANT_FIELDS),
+            Baiter: steering.Flock("baiters", steering.BAITER_FIELDS),
+        }
+        self.by_state: dict[EnemyState, dict[Enemy, None]] = {state: {} for state in EnemyState}
+
+        # decisions (chase or wander, capture targets) are spread over ticks
+        self.ai: ai.TimeSlicer = ai.TimeSlicer()
+        self.capture_search_queued: bool = False
+
+        # landers and mutants near the camera take turns shooting, under a bullet cap
+        self.fire: ai.FireScheduler = ai.FireScheduler()
+
+        self.conversions: int = 0 # landers turned into mutants (metric, see hitches.py)
+
+    def add_internal(self, sprite, layer=None) -> None:
+        super().add_internal(sprite, layer)
+        sprite.group = self
+        flock = self.flocks.get(type(sprite))
+        if flock is not None:
+            flock.add(sprite)
+        if type(sprite) is Enemy:
+            self.by_state[sprite.state][sprite] = None
+
+    def remove_internal(self, sprite) -> None:
+        super().remove_internal(sprite)
+        flock = self.flocks.get(type(sprite))
+        if flock is not None and sprite.flock_row is not None:
+            flock.remove(sprite)
+        if type(sprite) is Enemy:
+            self.by_state[sprite.state].pop(sprite, None)
+        # dead (or cleared at the end of the wave), the next spawn of its type reuses it
+        pools.release(sprite)
+
+    def restate(self, enemy: Enemy, old: EnemyState, new: EnemyState) -> None:
+        """Moves a lander between state indexes (called by Enemy.state)."""
+        if enemy in self.by_state[old]: # (dead ones aren't indexed anymore)
+            del self.by_state[old][enemy]
+            self.by_state[new][enemy] = None
+
+    def everyone(self) -> typing.KeysView:
+        """Every enemy, without copying."""
+        return self.spritedict.keys()
+
+    def of_type(self, kind: type) -> list:
+        """Every enemy of one type (the flock's member list itself, don't modify)."""
+        return self.flocks[kind].members
+
+    def in_state(self, state: EnemyState) -> typing.KeysView:
+        """Every lander in `state`, without copying."""
+        return self.by_state[state].keys()
+
+    def kill_many(self, enemies: typing.Collection) -> pg.sprite.Group:
+        """Kills a batch of enemies at once (smart bomb).
+
+        Same as `death` on each of them, but one merged explosion sized to the
+        batch and one layered sound, instead of a full explosion and sound each.
+
+        Returns:
+            pg.sprite.Group: The merged explosion.
+        """
+        positions: list[Vector2] = []
+        for enemy in enemies:
+            if isinstance(enemy, Enemy):
+                enemy.drop_humanoid()
+            positions.append(enemy.pos.copy()) # (the pool hands pos on to the next spawn)
+            enemy.kill()
+
+        sound.play_explosions(len(positions))
+        return misc.explosion_effect(positions, min(MASS_EXPLOSION_PARTICLES, 40 + 6 * len(positions)),
+                                     min_lifetime=0.8, max_lifetime=2.0)
+
+    def shoot(self, target: Vector2, camera_x: float, dt: float) -> None:
+        """Fires whoever's due (see ai.FireScheduler). Once per tick."""
+        self.fire.update(self.flocks, self.bullets, target, camera_x, dt)
 
     def add_mutant(self, x: float, y: float) -> None:
-        mutant = Mutant(int(x), int(y))
+        mutant = pools.acquire(Mutant, int(x), int(y))
         self.add(mutant)
+        self.conversions += 1
     
     def spawn_pod(self, player: Player) -> None:
+        # make sure pod is far away enough
         min_distance = SCREEN_WIDTH
-        while True:
-            spawn_x = random.randint(-WORLD_WIDTH // 2, WORLD_WIDTH // 2)
-            spawn_y = random.randint(TOP_WIDGET_HEIGHT, GAMEPLAY_HEIGHT)
+        self.add(pools.acquire(Baiter, *self.spawns.take(player.pos, min_distance)))
 
-            # make sure pod is far away enough
-            if abs(spawn_x - player.pos.x) > min_distance or abs(spawn_y - player.pos.y) > min_distance:
-                break
+    def update(self, player, humanoids: "HumanoidGroup", dt: float, current_wave: int, sector_map: sectors.SectorMap | None = None) -> None:
+        """One simulation tick for every enemy (drawing is separate, see draw).
 
-        self.add(Baiter(spawn_x, spawn_y))
-
-    def update(self, offset_x: float, player, humanoids_pos, screen, dt: float, current_wave: int) -> None:
+        With a `sector_map`, enemies far from the camera step less often or sleep (see sectors.py).
+        """
         
         # only spawn baiters on level 2 onwards
         if current_wave >= 2:
@@ -753,36 +763,61 @@ class EnemyGroup(pg.sprite.Group):
                 self.baiters_active_timer += dt
 
 
-        self.capturing_timer += dt
+        # runs last tick's deferred decisions first
+        self.ai.begin_tick()
 
-        capturing_enemies = [e for e in self.sprites() if getattr(e, "state", None) == EnemyState.CAPTURING]
+        self.capturing_timer += dt
+        if self.capturing_timer >= self.capturing_interval and not self.capture_search_queued:
+            self.capture_search_queued = True
+            self.ai.defer(lambda: self.pick_capturer(humanoids))
 
-        if self.capturing_timer >= self.capturing_interval:
-            idle_enemies = [e for e in self.sprites() if getattr(e, "state", None) == EnemyState.ATTACKING]
+        # targets that died and came back from the pool as someone else are dropped before steering at them
+        for lander in list(self.in_state(EnemyState.CAPTURING)):
+            lander.forget_recycled()
 
-            if len(capturing_enemies) < self.capturing_limit and idle_enemies and humanoids_pos:
-                chosen = random.choice(idle_enemies) # YOU ARE THE CHOSEN ONE!!!
-                closest_humanoid = min(humanoids_pos, key=lambda h: chosen.pos.distance_to(h.pos))
+        # (a copy, capture_step changes states)
+        capturing_enemies = list(self.in_state(EnemyState.CAPTURING))
 
-                chosen.closest_humanoid = closest_humanoid.pos
-                chosen.state = EnemyState.CAPTURING # the chosen one to die...
-                chosen.scanned = True
+        # (prev_pos is set by the flocks for whoever moves, see steering.Flock.write_positions)
+        if getattr(player, "state", None) == Player.States.DEAD:
+            for enemy in self.everyone():
+                enemy.prev_pos.update(enemy.pos)
+            return
 
-                self.capturing_timer = 0.0
+        # one vectorized steering step per enemy type
+        landers = self.flocks[Enemy]
+        steering.steer_landers(landers, player.pos, capturing_enemies, dt, deciding=self.ai.due(Enemy, len(landers)), sector_map=sector_map)
+        for mutant in steering.steer_mutants(self.flocks[Mutant], player.pos, dt, sector_map):
+            if self.fire.allow(mutant):
+                mutant.fire_bullet(player.pos.x, player.pos.y)
+        steering.steer_baiters(self.flocks[Baiter], player.pos, dt) # AAAAAAAAAAAAAAAAAA
+
+        for lander in capturing_enemies:
+            lander.capture_step()
+
+    def pick_capturer(self, humanoids: "HumanoidGroup") -> None:
+        """Sends an idle lander after the free humanoid closest to it (a deferred AI decision, see ai.py)."""
+        self.capture_search_queued = False
+
+        idle_enemies = self.in_state(EnemyState.ATTACKING)
+        capturing_enemies = self.in_state(EnemyState.CAPTURING)
+
+        if len(capturing_enemies) < self.capturing_limit and idle_enemies and humanoids:
+            # YOU ARE THE CHOSEN ONE!!!
+            chosen = next(itertools.islice(idle_enemies, random.randrange(len(idle_enemies)), None))
+            target = humanoids.nearest(chosen.pos.x, exclude={lander.target for lander in capturing_enemies})
+            if target is None:
+                return
 
-        for enemy in self.sprites():
-            self.bullets += getattr(enemy, "bullets", [])
-            if hasattr(enemy, "bullets"):
-                enemy.bullets.clear()
+            chosen.hunt(target)
+            chosen.state = EnemyState.CAPTURING # the chosen one to die...
+            chosen.scanned = True
 
-            if isinstance(enemy, Enemy):
-                enemy.update(offset_x, player, humanoids_pos, screen)
-            elif isinstance(enemy, Mutant):
-                enemy.update(offset_x, player, humanoids_pos, screen, dt)
-            elif isinstance(enemy, Baiter):
-                enemy.update(offset_x, player) # AAAAAAAAAAAAAAAAAA
+            self.capturing_timer = 0.0
 
-            enemy.draw(screen)
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
+        for enemy in self.everyone():
+            enemy.draw(batch, offset_x, alpha)
 
 class MiniMap(pg.sprite.Group):
     def __init__(self) -> None:
@@ -797,6 +832,18 @@ class MiniMap(pg.sprite.Group):
 
         self.icon_size: int = self.surface_width // 60
 
+        # archetypes drawn on top of the minimap's own sprites, straight from their position columns (see track)
+        self.world: ecs.World | None = None
+
+        # icon colour and size (fraction of icon_size) per sprite type / archetype name
+        self.icons: dict[type | str, tuple[tuple[int, int, int], float, float]] = {
+            Humanoid: (DARK_GREY, 0.8, 1.0),
+            Player: (WHITE, 1.0, 1.0),
+            "mutants": ((200, 10, 200), 1.0, 1.0),
+            "landers": (GREEN, 1.0, 1.0),
+            "baiters": (RED, 0.6, 0.6),
+        }
+
         # visible area visual brackets
         self.lower_bracket: list[tuple[float, float]] = [
             (self.surface_width / 2 - self.visible_area_width / 2, self.surface_height * 9 // 10),
@@ -815,7 +862,11 @@ class MiniMap(pg.sprite.Group):
         self.surface.fill(BLACK)
         self.draw_mountain_outline(offset_x)
 
-        for sprite in self.sprites():
+        for sprite in self.spritedict:
+            icon = self.icons.get(type(sprite))
+            if icon is None:
+                continue
+
             norm_x = (sprite.pos.x + offset_x) / self.world_width
             icon_x = norm_x * self.surface_width - (self.icon_size / 2) + (self.surface_width / 2) - (self.visible_area_width / 4)
 
@@ -829,22 +880,34 @@ class MiniMap(pg.sprite.Group):
             icon_x = max(0, min(self.surface_width  - self.icon_size, icon_x))
             icon_y = max(0, min(self.surface_height - self.icon_size, icon_y))
 
-            if isinstance(sprite, Humanoid):
-                pg.draw.rect(self.surface, DARK_GREY, pg.Rect(icon_x, icon_y, self.icon_size * 0.8, self.icon_size))
-            elif isinstance(sprite, Player):
-                pg.draw.rect(self.surface, WHITE, pg.Rect(icon_x, icon_y, self.icon_size, self.icon_size))
-            elif isinstance(sprite, Mutant):
-                pg.draw.rect(self.surface, (200, 10, 200), pg.Rect(icon_x, icon_y, self.icon_size, self.icon_size))
-            elif isinstance(sprite, Enemy):
-                pg.draw.rect(self.surface, GREEN, pg.Rect(icon_x, icon_y, self.icon_size, self.icon_size))
-            elif isinstance(sprite, Baiter):
-                pg.draw.rect(self.surface, RED, pg.Rect(icon_x, icon_y, self.icon_size * 0.6, self.icon_size * 0.6))
-            
+            colour, width, height = icon
+            pg.draw.rect(self.surface, colour, pg.Rect(icon_x, icon_y, self.icon_size * width, self.icon_size * height))
+
+        # a whole archetype's icons at once, same maths as above on the position column
+        if self.world is not None:
+            for archetype in self.world.query(ecs.POSITION):
+                icon = self.icons.get(archetype.name)
+                if icon is None or not len(archetype):
+                    continue
+
+                pos = archetype.column("pos")
+                icon_x = (pos[:, 0] + offset_x) / self.world_width * self.surface_width - (self.icon_size / 2) + (self.surface_width / 2) - (self.visible_area_width / 4)
+                icon_y = (pos[:, 1] / GAMEPLAY_HEIGHT) * self.surface_height - (self.icon_size / 2)
+                icon_x = np.clip(icon_x, 0, self.surface_width - self.icon_size)
+                icon_y = np.clip(icon_y, 0, self.surface_height - self.icon_size)
+
+                colour, width, height = icon
+                for x, y in zip(icon_x.tolist(), icon_y.tolist()):
+                    self.surface.fill(colour, (x, y, self.icon_size * width, self.icon_size * height))
 
         # ui visuals
         pg.draw.lines(self.surface, RED, False, self.lower_bracket, width = 2)
         pg.draw.lines(self.surface, RED, False, self.upper_bracket, width = 2)
 
+    def track(self, world: ecs.World) -> None:
+        """Shows every entity of `world`'s archetypes that have an icon, without adding them one by one."""
+        self.world = world
+
     def create_mountain_representation(self, peaks: list[tuple[int, int]], world_width: int) -> None:
         self.mountain_representation: list[tuple[int, int]] = peaks[::4] # get every nth point
         self.world_width: int = world_width
@@ -879,32 +942,41 @@ class Humanoid(pg.sprite.Sprite):
         super().__init__()
         self.width = 10
         self.height = 20
-        self.draw_x: int | float = x
 
         self.pos: Vector2 = Vector2(x, y)
+        self.prev_pos: Vector2 = self.pos.copy() # position at the previous simulation tick, for drawing
+        self.rect: pg.Rect = pg.Rect(x, y, self.width, self.height)
 
-        self.state: HumanoidState = HumanoidState.IDLE
         self.speed: float = -0.5
         self.fall_speed: float = 2.0
-        self.fall_time: float = 0.0
-
         self.walk_speed: float = 2.0
+        self.walk_velocity: Vector2 = Vector2(0, 0)
+        self.generation: int = 0 # bumped by pools.release, see Enemy.hunt
+        self.reset(x, y)
+
+    def reset(self, x: int, y: int) -> None:
+        """Back to a fresh humanoid at (x, y), when it's reused (see pools.py)."""
+        self.pos.update(x, y)
+        self.prev_pos.update(self.pos)
+        self.rect.topleft = (x, y)
+
+        self.state: HumanoidState = HumanoidState.IDLE
+        self.fall_time: float = 0.0
         self.walking: bool = False
 
-    def draw(self, screen) -> None:
-        self.rect = pg.Rect(self.draw_x, self.pos.y, self.width, self.height)
-        pg.draw.rect(screen, DARK_GREY, self.rect)
+        self.idle_direction: int = random.choice((-1, 1))
+        self.walk_velocity.update(self.idle_direction * self.walk_speed, 0)
 
-    def update(self, offset_x: float, dt: float, particles: list[pg.sprite.Group], player_group: PlayerGroup, pop_ups: list[pg.sprite.Sprite], player=None | Player) -> None:
-        self.draw_x = self.pos.x + offset_x
+        self.asleep: float = 0.0 # seconds since last updated (see sectors.py)
 
-        if self.state == HumanoidState.IDLE:
-            if not hasattr(self, "idle_direction"):
-                self.idle_direction = random.choice([-1, 1])
-            if not hasattr(self, "walk_velocity"):
-                self.walk_velocity = Vector2(self.idle_direction * self.walk_speed, 0)
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
+        draw_x = timestep.lerp(self.prev_pos.x, self.pos.x, alpha)
+        if render.on_screen(draw_x, self.width, offset_x):
+            batch.add(render.rect_stamp(self.width, self.height, DARK_GREY), (draw_x + offset_x, timestep.lerp(self.prev_pos.y, self.pos.y, alpha)))
 
-            self.pos.x += self.walk_velocity.x * dt
+    def update(self, dt: float, particles: list[pg.sprite.Group], player_group: PlayerGroup, pop_ups: list[pg.sprite.Sprite], player=None | Player) -> None:
+        if self.state == HumanoidState.IDLE:
+            self.pos.x += self.walk_velocity.x * timestep.frames(dt)
 
             if self.pos.x < -WORLD_WIDTH // 2:
                 self.pos.x = 0
@@ -921,17 +993,12 @@ class Humanoid(pg.sprite.Sprite):
         elif self.state == HumanoidState.CAPTURED:
             if player is None or getattr(player, "state", None) == Player.States.DEAD:
                 return
-            self.pos.y += self.speed
+            self.pos.y += self.speed * timestep.frames(dt)
         
         elif self.state == HumanoidState.FALLING:
-            self.pos.y += self.fall_speed
+            self.pos.y += self.fall_speed * timestep.frames(dt)
             self.fall_time += dt
 
-            # if player catches falling humanoid
-            if self.rect.collidelist([player.hitbox_top, player.hitbox_bottom]) >= 0:
-                self.state = HumanoidState.RESCUED
-                self.fall_time = 0.0
-
             if self.pos.y >= GROUND_Y:
                 if self.fall_time > 1.0:
                     self.death(particles)
@@ -957,21 +1024,111 @@ class Humanoid(pg.sprite.Sprite):
                 player_group.coins += 3
                 pop_ups.append(misc.text_pop_up("500", player.pos))
 
+        self.rect.topleft = (int(self.pos.x), int(self.pos.y))
                 
         if self.state == HumanoidState.KILLED:
             self.death(particles)
             return
     
+    def rescue(self) -> None:
+        """Player caught this humanoid while it was falling."""
+        self.state = HumanoidState.RESCUED
+        self.fall_time = 0.0
+
     def death(self, particles: list[pg.sprite.Group]) -> None:
         self.kill()
         particles.append(misc.explosion_effect(self.pos, 20, 70, 120, 1.0, 2.0, 0, 360, DARK_GREY))
         del self
         
 class HumanoidGroup(pg.sprite.Group):
+    """Humanoids, plus an index of them sorted by x for nearest-humanoid lookups.
+
+    They all live on the ground line, so 1-D is enough: a bisect finds the
+    closest one in O(log n). The index is re-sorted lazily, only when it's
+    queried after someone moved (almost sorted already, so that's ~O(n)).
+
+    Attributes:
+        by_x (list[Humanoid]): Humanoids sorted by x.
+        xs (list[float]): Their x positions, parallel to by_x (what bisect searches).
+        index_dirty (bool): Someone moved / came / went since the last sort.
+    """
+
     def __init__(self) -> None:
         super().__init__()
+        self.by_x: list[Humanoid] = []
+        self.xs: list[float] = []
+        self.index_dirty: bool = False
+
+    def add_internal(self, sprite, layer=None) -> None:
+        super().add_internal(sprite, layer)
+        self.by_x.append(sprite)
+        self.index_dirty = True
+
+    def remove_internal(self, sprite) -> None:
+        super().remove_internal(sprite)
+        self.by_x.remove(sprite)
+        self.index_dirty = True
+        pools.release(sprite)
+
+    def reindex(self) -> None:
+        self.by_x.sort(key=lambda humanoid: humanoid.pos.x)
+        self.xs = [humanoid.pos.x for humanoid in self.by_x]
+        self.index_dirty = False
+
+    def nearest(self, x: float, exclude: typing.Container = ()) -> Humanoid | None:
+        """Closest humanoid standing on the ground (IDLE) to world x, skipping `exclude`.
+
+        Returns:
+            Humanoid | None: None if there's no free humanoid at all.
+        """
+        if self.index_dirty:
+            self.reindex()
+
+        by_x, xs = self.by_x, self.xs
+        left = bisect.bisect_left(xs, x) - 1
+        right = left + 1
+
+        # walk outwards from x, whichever side is closer first
+        while left >= 0 or right < len(by_x):
+            if right >= len(by_x) or (left >= 0 and x - xs[left] <= xs[right] - x):
+                candidate = by_x[left]
+                left -= 1
+            else:
+                candidate = by_x[right]
+                right += 1
+
+            if candidate.state == HumanoidState.IDLE and candidate not in exclude:
+                return candidate
+        return None
+
+    def update(self, dt: float, particles: list[pg.sprite.Group], player_group: PlayerGroup, pop_ups, player=None, grid=None,
+               sector_map: sectors.SectorMap | None = None) -> None:
+        # if player catches falling humanoids (only the ones near the player get a rect test)
+        if player is not None and grid is not None:
+            for hitbox in (player.hitbox_top, player.hitbox_bottom):
+                for humanoid in grid.collide(hitbox):
+                    if humanoid.state == HumanoidState.FALLING:
+                        humanoid.rescue()
+
+        self.index_dirty = True # everyone's about to move
+        humanoids = self.sprites()
+        if sector_map is None:
+            for sprite in humanoids:
+                sprite.prev_pos.update(sprite.pos)
+                sprite.update(dt, particles, player_group, pop_ups, player)
+            return
+
+        # only humanoids walking around on their own can sleep, anything mid capture / fall / rescue always steps
+        asleep = np.array([sprite.asleep for sprite in humanoids], dtype=np.float64)
+        at_most = np.array([sectors.DORMANT if sprite.state == HumanoidState.IDLE else sectors.ACTIVE for sprite in humanoids])
+        rows, steps = sector_map.schedule(np.array([sprite.pos.x for sprite in humanoids], dtype=np.float64), asleep, dt, at_most)
+
+        for sprite, slept in zip(humanoids, asleep.tolist()):
+            sprite.asleep = slept
+        for i, step in zip(rows.tolist(), steps.tolist()):
+            humanoids[i].prev_pos.update(humanoids[i].pos)
+            humanoids[i].update(step, particles, player_group, pop_ups, player)
 
-    def update(self, offset_x: float, dt: float, screen: pg.Surface, particles: list[pg.sprite.Group], player_group: PlayerGroup, pop_ups, player=None) -> None:
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
         for sprite in self:
-            sprite.update(offset_x, dt, particles, player_group, pop_ups, player)
-            sprite.draw(screen)
\ No newline at end of file
+            sprite.draw(batch, offset_x, alpha)
\ No newline at end of file
@@ -0,0 +1,301 @@
+"""
+Collision broadphase.
+
+Everything collides in world space (see the rects on each entity), so a
+uniform grid over world x/y lets a query only look at the handful of
+objects in the cells it overlaps instead of every enemy / bullet.
+
+Fast movers (charged shots, dashes) move further than a lander is wide in
+one frame, so they're tested with a swept rect along their whole path
+instead of only where they ended up.
+
+OccupancyGrid is the other way round: a coarse picture of where danger is,
+for finding somewhere clear (respawning the player).
+
+BulletBlockers holds things that stop enemy bullets (deployed shields),
+registered only while they're up.
+"""
+
+import math
+import typing
+
+import numpy as np
+import pygame as pg
+
+from constants import *
+
+pg.init()
+
+# a bit bigger than a lander (50px), way bigger than a bullet
+CELL_SIZE: int = 128
+
+# occupancy is coarser than pixels but finer than the broadphase, a third of the player's height-ish
+OCCUPANCY_CELL_SIZE: int = 32
+
+
+class SpatialHash(object):
+    """Uniform-grid spatial hash over world x/y.
+
+    Objects are stored by identity along with the rect they were inserted
+    with. Rebuild it once per tick (everything moves every tick anyway).
+
+    Attributes:
+        cell_size (int): Width and height of one grid cell in pixels.
+        cells (dict[tuple[int, int], list]): (cell x, cell y) -> objects overlapping that cell.
+        pairs_tested (int): Narrowphase rect tests done since the last rebuild/clear.
+    """
+
+    def __init__(self, cell_size: int = CELL_SIZE) -> None:
+        self.cell_size: int = cell_size
+        self.cells: dict[tuple[int, int], list] = {}
+        self.pairs_tested: int = 0
+
+    def _cell_range(self, rect: pg.Rect) -> tuple[range, range]:
+        size = self.cell_size
+        return (range(rect.left // size, (rect.right - 1) // size + 1),
+                range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.pairs_tested = 0
+
+    def insert(self, obj: typing.Any, rect: pg.Rect) -> None:
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                self.cells.setdefault((cx, cy), []).append(obj)
+
+    def remove(self, obj: typing.Any, rect: pg.Rect) -> None:
+        """Removes `obj`. `rect` must be the rect it was inserted with."""
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                bucket = self.cells.get((cx, cy))
+                if bucket is not None and obj in bucket:
+                    bucket.remove(obj)
+
+    def rebuild(self, objs: typing.Iterable) -> None:
+        """Clears the grid and inserts every object by its `rect`."""
+        self.clear()
+        for obj in objs:
+            self.insert(obj, obj.rect)
+
+    def query(self, rect: pg.Rect) -> list:
+        """Returns every object sharing a cell with `rect` (no overlap test, no duplicates)."""
+        xs, ys = self._cell_range(rect)
+        found: list = []
+        seen: set[int] = set()
+        for cx in xs:
+            for cy in ys:
+                for obj in self.cells.get((cx, cy), ()):
+                    if id(obj) not in seen:
+                        seen.add(id(obj))
+                        found.append(obj)
+        return found
+
+    def collide(self, rect: pg.Rect, with_mask: typing.Any | None = None) -> list:
+        """Returns every object whose rect actually overlaps `rect`.
+
+        Arguments:
+            rect (pg.Rect): World-space query rect.
+            with_mask (object | None): Something with `rect` and `mask`. If given, rect hits
+                also need a pixel overlap with it (see `overlap`).
+        """
+        candidates = self.query(rect)
+        self.pairs_tested += len(candidates)
+        return [obj for obj in candidates
+                if rect.colliderect(obj.rect) and (with_mask is None or overlap(with_mask, obj))]
+
+    def collide_any(self, rect: pg.Rect, with_mask: typing.Any | None = None) -> typing.Any | None:
+        """Returns the first object overlapping `rect`, or None. Like pg.sprite.spritecollideany.
+
+        `with_mask` works the same as in `collide`.
+        """
+        for obj in self.query(rect):
+            self.pairs_tested += 1
+            if rect.colliderect(obj.rect) and (with_mask is None or overlap(with_mask, obj)):
+                return obj
+        return None
+
+    def sweep(self, rect: pg.Rect, dx: float, dy: float) -> list[tuple[float, typing.Any]]:
+        """Every object hit by `rect` moving by (dx, dy) this frame, earliest first.
+
+        Only looks at cells covered by the whole path, so it costs about the
+        same as one discrete query no matter how fast the mover is.
+
+        Returns:
+            list[tuple[float, object]]: (time of impact in [0, 1], object) pairs.
+        """
+        path = rect.union(rect.move(dx, dy))
+        hits: list[tuple[float, typing.Any]] = []
+        for obj in self.query(path):
+            self.pairs_tested += 1
+            time_of_impact = sweep(rect, dx, dy, obj.rect)
+            if time_of_impact is not None:
+                hits.append((time_of_impact, obj))
+
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def sweep_first(self, rect: pg.Rect, dx: float, dy: float) -> typing.Any | None:
+        """Earliest object hit along the path (see `sweep`), or None."""
+        hits = self.sweep(rect, dx, dy)
+        return hits[0][1] if hits else None
+
+
+class OccupancyGrid(object):
+    """Which cells of an area have something dangerous in them.
+
+    Mark enemies and bullets, then ask for the clear spot nearest to where
+    you'd like to be. Cost only depends on the size of the area (a few
+    array passes), never on how crowded it is.
+
+    Attributes:
+        area (pg.Rect): World-space area covered.
+        cell_size (int): Width and height of one cell in pixels.
+        occupied (np.ndarray): (rows, cols) True where something is.
+    """
+
+    def __init__(self, area: pg.Rect, cell_size: int = OCCUPANCY_CELL_SIZE) -> None:
+        self.cell_size: int = cell_size
+        self.area: pg.Rect = area
+        self.occupied: np.ndarray = np.zeros((math.ceil(area.height / cell_size), math.ceil(area.width / cell_size)), dtype=bool)
+
+    def move_to(self, area: pg.Rect) -> None:
+        """Clears the grid and points it at another area of the same size."""
+        self.area = area
+        self.occupied[:] = False
+
+    def mark(self, rect: pg.Rect) -> None:
+        """Marks every cell `rect` touches."""
+        size = self.cell_size
+        rows, cols = self.occupied.shape
+        left = max(0, (rect.left - self.area.left) // size)
+        right = min(cols, (rect.right - 1 - self.area.left) // size + 1)
+        top = max(0, (rect.top - self.area.top) // size)
+        bottom = min(rows, (rect.bottom - 1 - self.area.top) // size + 1)
+        if left < right and top < bottom:
+            self.occupied[top:bottom, left:right] = True
+
+    def mark_points(self, x: np.ndarray, y: np.ndarray, radius: np.ndarray) -> None:
+        """Marks small boxes (bullets) in one go: the cells under each corner.
+
+        Only exact for boxes no bigger than a cell, which bullets aren't.
+        """
+        rows, cols = self.occupied.shape
+        for dx in (-radius, radius):
+            for dy in (-radius, radius):
+                col = np.floor_divide(x + dx - self.area.left, self.cell_size).astype(np.intp)
+                row = np.floor_divide(y + dy - self.area.top, self.cell_size).astype(np.intp)
+                inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+                self.occupied[row[inside], col[inside]] = True
+
+    def nearest_clear(self, x: float, y: float, width: int, height: int, margin: int = 0) -> tuple[int, int] | None:
+        """Top left of the clear `width` x `height` spot nearest to (x, y).
+
+        Arguments:
+            x, y (float): Where the top left would ideally go (world space).
+            width, height (int): Size of what has to fit.
+            margin (int): Clear pixels wanted around it as well (rounded up to whole cells).
+
+        Returns:
+            tuple[int, int] | None: World position (snapped to the grid), None if nowhere is clear.
+        """
+        size = self.cell_size
+        pad = math.ceil(margin / size)
+        span_rows = math.ceil(height / size) + 2 * pad
+        span_cols = math.ceil(width / size) + 2 * pad
+
+        # outside the area counts as clear for the margin (we only know about what's inside)
+        blocked = np.pad(self.occupied, pad).astype(np.int32)
+        if span_rows > blocked.shape[0] or span_cols > blocked.shape[1]:
+            return None
+
+        # summed-area table: occupied cells in every span_rows x span_cols window at once
+        table = np.pad(blocked.cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0)))
+        in_window = (table[span_rows:, span_cols:] - table[:-span_rows, span_cols:]
+                     - table[span_rows:, :-span_cols] + table[:-span_rows, :-span_cols])
+
+        # window (r, c) of the padded grid = spot with its top left at cell (r, c) of the real one
+        rows, cols = np.nonzero(in_window == 0)
+        keep = (rows + span_rows - 2 * pad <= self.occupied.shape[0]) & (cols + span_cols - 2 * pad <= self.occupied.shape[1])
+        rows, cols = rows[keep], cols[keep]
+        if not len(rows):
+            return None
+
+        want_row = (y - self.area.top) / size
+        want_col = (x - self.area.left) / size
+        best = np.argmin((rows - want_row) ** 2 + (cols - want_col) ** 2)
+        return self.area.left + int(cols[best]) * size, self.area.top + int(rows[best]) * size
+
+
+class BulletBlockers(object):
+    """Things that stop bullets, registered while they're active (a deployed shield, say).
+
+    A member needs a world-space `rect` and an `on_enemy_bullet_collision(hits)`
+    (see items.Item). Nothing registered = nothing to test.
+
+    Attributes:
+        members (list): What's blocking right now.
+    """
+
+    def __init__(self) -> None:
+        self.members: list = []
+
+    def __bool__(self) -> bool:
+        return bool(self.members)
+
+    def add(self, member: typing.Any) -> None:
+        if member not in self.members:
+            self.members.append(member)
+
+    def remove(self, member: typing.Any) -> None:
+        if member in self.members:
+            self.members.remove(member)
+
+    def clear(self) -> None:
+        self.members.clear()
+
+    def block(self, bullets: typing.Any, owner: int, spent: set[int]) -> None:
+        """Stops `owner`'s bullets (a projectiles.BulletStore) hitting any member, adding them to `spent`.
+
+        Bullets already in `spent` hit something else first and don't count.
+        """
+        for member in self.members[:]: # (a member can drop out when it's hit)
+            hits = [i for i in bullets.overlapping(member.rect, owner).tolist() if i not in spent]
+            if hits:
+                spent.update(hits)
+                member.on_enemy_bullet_collision(len(hits))
+
+
+def sweep(rect: pg.Rect, dx: float, dy: float, target: pg.Rect) -> float | None:
+    """Swept AABB test of `rect` moving by (dx, dy) against a still `target`.
+
+    Grows `target` by the size of `rect` (Minkowski sum), which turns the
+    problem into clipping the path of rect's center against that bigger rect.
+
+    Returns:
+        float | None: time of impact in [0, 1] (0 = already overlapping), or None for a miss.
+    """
+    if rect.colliderect(target):
+        return 0.0
+
+    start_x, start_y = rect.center
+    expanded = target.inflate(rect.width, rect.height)
+    clipped = expanded.clipline(start_x, start_y, start_x + dx, start_y + dy)
+    if not clipped:
+        return None
+
+    entry_x, entry_y = clipped[0]
+    if abs(dx) >= abs(dy):
+        return max(0.0, min(1.0, (entry_x - start_x) / dx)) if dx else 0.0
+    return max(0.0, min(1.0, (entry_y - start_y) / dy))
+
+
+def overlap(a: typing.Any, b: typing.Any) -> bool:
+    """Pixel-perfect narrowphase between two objects with `rect` and `mask`.
+
+    Masks are precomputed per sprite frame (render.sprite_mask), so this is
+    a single Mask.overlap call. Only call it after the rects overlap.
+    """
+    return a.mask.overlap(b.mask, (b.rect.x - a.rect.x, b.rect.y - a.rect.y)) is not None
@@ -8,6 +8,17 @@ pg.init()
 # ------------------------ GAME CONSTANTS ------------------------
 WINDOW_TITLE: str = "some game"
 FRAMES_PER_SECOND: int = 100
+
+# gameplay runs in fixed ticks, separate from the frame rate (see timestep.py)
+SIMULATION_RATE: int = 120
+MAX_SIMULATION_STEPS: int = 8 # per frame, so a long hitch doesn't snowball
+
+# per-frame speeds (px/frame, lerp factors) were tuned at this rate
+TUNED_RATE: int = FRAMES_PER_SECOND
+
+# AI decisions are spread over this many ticks, at most AI_DECISION_BUDGET per tick (see ai.py)
+AI_BUCKETS: int = 8
+AI_DECISION_BUDGET: int = 32
 RESOLUTION: tuple[int, int] = (1280, 960)
 
 PLAYER_WIDTH: int = 100
@@ -18,6 +29,14 @@ SCREEN_HEIGHT: int = RESOLUTION[1]
 
 WORLD_WIDTH: int= SCREEN_WIDTH * 7
 
+# world sectors (see sectors.py): full simulation within ACTIVE_SECTORS of the camera's
+# sector, coarse steps within COARSE_SECTORS, asleep beyond that
+SECTOR_WIDTH: int = SCREEN_WIDTH
+ACTIVE_SECTORS: int = 1
+COARSE_SECTORS: int = 2
+COARSE_INTERVAL: int = 4 # ticks between coarse steps
+SECTOR_CATCH_UP: float = 1.0 # most seconds made up in one step (after sleeping)
+
 # -----------------------------------------------------------------
 
 # Basic colours
@@ -78,4 +97,30 @@ GAMEPLAY_HEIGHT = SCREEN_HEIGHT - TOP_WIDGET_HEIGHT
 CAPTURE_HEIGHT = GAMEPLAY_HEIGHT // 8
 
 EDGE_SPAWN_BUFFER: int = SCREEN_WIDTH // 8
-GROUND_Y: int = GAMEPLAY_HEIGHT * 7 // 8
\ No newline at end of file
+GROUND_Y: int = GAMEPLAY_HEIGHT * 7 // 8
+
+RESPAWN_MARGIN: int = 64 # px kept clear around the ship when it respawns, if possible
+
+# wave spawns are built a few per frame, at most this many ms of building each frame (see spawning.py)
+SPAWN_BUDGET_MS: float = 2.0
+WARP_IN_PARTICLES: int = 20
+
+# enemy shooting (see ai.FireScheduler): seconds between shots, each enemy class picks its own `fire_interval`
+ENEMY_FIRE_INTERVAL: float = 1.3
+ENEMY_FIRE_RANGE: int = SCREEN_WIDTH * 3 // 4 # px from the camera, just past the screen edges
+ENEMY_BULLET_CAP: int = 24
+MASS_EXPLOSION_PARTICLES: int = 100 # most particles in one merged explosion (smart bombs, see EnemyGroup.kill_many)
+
+# frame profiler (see profiler.py): percentiles over the last PROFILE_WINDOW frames, traces keep PROFILE_TRACE_FRAMES
+PROFILE_WINDOW: int = FRAMES_PER_SECOND * 5
+PROFILE_TRACE_FRAMES: int = FRAMES_PER_SECOND * 10
+PROFILE_DIR: str = "profiles" # traces and other captures go here
+
+# hitch detector (see hitches.py): a frame over HITCH_FACTOR times the median of the last HITCH_WINDOW
+# frames (and over the frame budget) gets its phases, counts, events and a screenshot logged
+HITCH_FACTOR: float = 2.5
+HITCH_WINDOW: int = FRAMES_PER_SECOND * 2
+HITCH_LOG: str = os.path.join(PROFILE_DIR, "hitches.jsonl")
+
+# wave profiler (see profiler.WaveProfiler): functions listed by self time when a profiled wave ends
+PROFILE_TOP: int = 15
\ No newline at end of file
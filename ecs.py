@@ -0,0 +1,184 @@
+"""
+Entity-component storage.
+
+A component is a named array column (a position is 2 floats, an image is
+an object, ...). An archetype is one exact set of components, holding them
+for all of its entities in contiguous arrays: row i of every column is
+entity i. Removing an entity moves the last one into its row, so the rows
+stay packed.
+
+Systems ask the World for the archetypes that have the components they
+need (`query`) and work on whole columns at once, never one entity at a time.
+
+Enemy steering (steering.Flock) and bullets (projectiles.BulletStore) are
+archetypes. The sprite classes in classes.py stay as thin facades over
+their row (`entities`) while the rest of the game still talks to them.
+"""
+
+import typing
+
+import numpy as np
+
+
+class Component(object):
+    """One column of an archetype.
+
+    Attributes:
+        name (str): Column name (unique within an archetype).
+        shape (tuple[int, ...]): Shape of one entity's value, () for scalars.
+        dtype (typing.Any): NumPy dtype (object for surfaces and the like).
+    """
+
+    def __init__(self, name: str, shape: tuple[int, ...] = (), dtype: typing.Any = np.float64) -> None:
+        self.name: str = name
+        self.shape: tuple[int, ...] = shape
+        self.dtype: typing.Any = dtype
+
+    def __repr__(self) -> str:
+        return f"Component({self.name!r})"
+
+
+# shared components, archetype-specific ones live next to their archetype
+POSITION: Component = Component("pos", (2,))
+VELOCITY: Component = Component("vel", (2,))
+SPRITE: Component = Component("image", (), object)
+COLLIDER: Component = Component("radius")
+SLEEP: Component = Component("asleep") # seconds since last simulated (see sectors.py)
+
+
+def ai_state(*fields: str) -> tuple[Component, ...]:
+    """Per-entity AI numbers (wander angle, tuning, ...), one float column each."""
+    return tuple(Component(name) for name in fields)
+
+
+class Archetype(object):
+    """Every entity with the same set of components, one contiguous array per component.
+
+    Columns grow by doubling. Only rows [0, count) are live, `column` gives a
+    view of those.
+
+    Attributes:
+        name (str): What's stored (the World and systems go by it).
+        components (dict[str, Component]): The components, by name.
+        arrays (dict[str, np.ndarray]): Full capacity arrays, by component name.
+        count (int): Number of live entities.
+        entities (list): Facade object for each row (or None), kept parallel to the rows.
+    """
+
+    def __init__(self, name: str, components: typing.Iterable[Component], capacity: int = 64) -> None:
+        self.name: str = name
+        self.components: dict[str, Component] = {component.name: component for component in components}
+        self.arrays: dict[str, np.ndarray] = {
+            component.name: np.zeros((capacity, *component.shape), dtype=component.dtype)
+            for component in self.components.values()
+        }
+        self.count: int = 0
+        self.entities: list = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"Archetype({self.name!r}, {list(self.components)}, count={self.count})"
+
+    def has(self, *components: Component) -> bool:
+        return all(component.name in self.components for component in components)
+
+    def column(self, name: str) -> np.ndarray:
+        """Live rows of one column (a view, writes go straight into storage)."""
+        return self.arrays[name][:self.count]
+
+    def _grow(self) -> None:
+        for name, old in self.arrays.items():
+            new = np.zeros((len(old) * 2, *old.shape[1:]), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            self.arrays[name] = new
+
+    def append(self, entity: typing.Any = None, **values) -> int:
+        """Adds an entity at the end. Columns not given are zero. Returns its row."""
+        row = self.count
+        if row == len(next(iter(self.arrays.values()))):
+            self._grow()
+
+        for name, array in self.arrays.items():
+            array[row] = values.get(name, 0)
+        self.entities.append(entity)
+        self.count += 1
+        return row
+
+    def swap_remove(self, row: int) -> typing.Any:
+        """Removes `row` in O(1) by moving the last entity into it.
+
+        Returns:
+            The entity that moved into `row` (None if `row` was the last one).
+        """
+        last = self.count - 1
+        moved = None
+        if row != last:
+            for array in self.arrays.values():
+                array[row] = array[last]
+            moved = self.entities[last]
+            self.entities[row] = moved
+        self.entities.pop()
+        self.count = last
+        return moved
+
+    def remove_where(self, keep_mask: np.ndarray) -> int:
+        """Keeps only the rows where `keep_mask` is True (one compaction per column). Returns number removed."""
+        n = self.count
+        kept = int(np.count_nonzero(keep_mask))
+        if kept == n:
+            return 0
+
+        for array in self.arrays.values():
+            array[:kept] = array[:n][keep_mask]
+        self.entities = [entity for entity, keep in zip(self.entities, keep_mask.tolist()) if keep]
+        self.count = kept
+        return n - kept
+
+    def clear(self) -> None:
+        self.count = 0
+        self.entities.clear()
+
+
+class World(object):
+    """All the archetypes, for systems to query.
+
+    Attributes:
+        archetypes (dict[str, Archetype]): By name.
+    """
+
+    def __init__(self) -> None:
+        self.archetypes: dict[str, Archetype] = {}
+
+    def add(self, archetype: Archetype) -> Archetype:
+        self.archetypes[archetype.name] = archetype
+        return archetype
+
+    def query(self, *components: Component) -> list[Archetype]:
+        """Every archetype that has all of `components`."""
+        return [archetype for archetype in self.archetypes.values() if archetype.has(*components)]
+
+
+if __name__ == "__main__":
+    # a system over two archetypes: integrate everything with a position and a velocity
+    import time
+
+    world = World()
+    movers = world.add(Archetype("movers", (POSITION, VELOCITY)))
+    markers = world.add(Archetype("markers", (POSITION,)))
+    rng = np.random.default_rng(1)
+    for _ in range(10_000):
+        movers.append(pos=rng.uniform(0, 100, 2), vel=rng.uniform(-1, 1, 2))
+        markers.append(pos=rng.uniform(0, 100, 2))
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        for archetype in world.query(POSITION, VELOCITY):
+            archetype.column("pos")[:] += archetype.column("vel")
+    print(f"integrate: {(time.perf_counter() - start):.3f} ms per step for {len(movers)} movers "
+          f"({[archetype.name for archetype in world.query(POSITION, VELOCITY)]} of {list(world.archetypes)})")
+
+    # remove every other one, then check rows are still packed
+    movers.remove_where(np.arange(len(movers)) % 2 == 0)
+    print(f"after remove_where: {len(movers)} movers, {len(movers.entities)} entity slots")
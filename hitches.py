@@ -0,0 +1,155 @@
+"""
+Hitch detector.
+
+Averages hide the odd long frame, and the odd long frame is what players
+notice. After every frame the game hands its length to `HitchDetector.check`;
+a frame longer than HITCH_FACTOR times the median of the frames before it
+(and over the frame budget) is a hitch, and gets captured on the spot:
+
+    - the frame's phase breakdown (from profiler.FrameProfiler, kept timing
+      while the detector is on),
+    - entity, particle and bullet counts,
+    - the events noted since the last checked frame (`note`: smart bombs,
+      wave spawns, mutant conversions, leaving the shop...),
+    - a screenshot.
+
+Each capture is one JSON line in HITCH_LOG, the screenshot goes next to it.
+"""
+
+import collections
+import json
+import os
+import statistics
+import time
+import typing
+
+import pygame as pg
+
+from constants import *
+
+
+class HitchDetector(object):
+    """Spots frames much longer than usual and logs what was going on.
+
+    Attributes:
+        enabled (bool): Checking at all (off, `note` and `check` return straight away).
+        factor (float): How many times the median a frame has to take to count as a hitch.
+        frame_times (collections.deque[float]): ms of the last HITCH_WINDOW frames.
+        events (list[str]): Noted since the last checked frame.
+        frames (int): Frames checked.
+        hitches (int): Captures written.
+        log_path (str): The JSON lines log.
+    """
+
+    def __init__(self, enabled: bool = False, factor: float = HITCH_FACTOR, window: int = HITCH_WINDOW,
+                 log_path: str = HITCH_LOG) -> None:
+        self.enabled: bool = enabled
+        self.factor: float = factor
+        self.frame_times: collections.deque[float] = collections.deque(maxlen=window)
+        self.events: list[str] = []
+        self.frames: int = 0
+        self.hitches: int = 0
+        self.log_path: str = log_path
+        self._skip: int = 0
+
+    def note(self, event: str) -> None:
+        """Something that might cost a frame happened (shown with the next hitch)."""
+        if self.enabled:
+            self.events.append(event)
+
+    def skip(self, frames: int = 1) -> None:
+        """Don't judge the next `frames` frames (e.g. the first one after a menu, whose dt is the menu's).
+
+        Their events carry over to the next checked frame.
+        """
+        self._skip = max(self._skip, frames)
+
+    def check(self, dt: float, profiler, counts: dict[str, int],
+              screenshot: typing.Callable[[], pg.Surface] | None = None) -> bool:
+        """Judges one finished frame. Call once per frame, after the clock tick.
+
+        Arguments:
+            dt (float): The frame's length, seconds.
+            profiler (profiler.FrameProfiler): For the frame's phases.
+            counts (dict[str, int]): What was alive (enemies, particles, bullets...).
+            screenshot (typing.Callable[[], pg.Surface] | None): Gets the frame as shown (only called on a hitch).
+
+        Returns:
+            bool: True if it was a hitch (and was captured).
+        """
+        if not self.enabled:
+            return False
+        if self._skip:
+            self._skip -= 1
+            return False
+
+        ms = dt * 1000
+        self.frames += 1
+        hitch = False
+        # a handful of frames first, so the median means something
+        if len(self.frame_times) >= self.frame_times.maxlen // 4:
+            median = statistics.median(self.frame_times)
+            if ms > self.factor * median and ms > 1000 / FRAMES_PER_SECOND:
+                self.capture(ms, median, profiler, counts, screenshot)
+                hitch = True
+                # writing the capture makes the next frame long too
+                self._skip = 1
+
+        # hitches stay out of the median, it's the usual frame they're measured against
+        if not hitch:
+            self.frame_times.append(ms)
+        self.events = []
+        return hitch
+
+    def capture(self, ms: float, median: float, profiler, counts: dict[str, int],
+                screenshot: typing.Callable[[], pg.Surface] | None) -> None:
+        """Writes one hitch to the log (and its screenshot)."""
+        self.hitches += 1
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+
+        image_path = None
+        if screenshot is not None:
+            image_path = os.path.join(os.path.dirname(self.log_path), f"hitch-{stamp}-{self.hitches}.png")
+            pg.image.save(screenshot(), image_path)
+
+        phases = profiler.last_frame() if profiler.enabled else {}
+        record = {
+            "time": stamp,
+            "frame": self.frames,
+            "frame_ms": round(ms, 2),
+            "median_ms": round(median, 2),
+            "phases_ms": {name: round(phase_ms, 3) for name, phase_ms in sorted(phases.items(), key=lambda item: -item[1])},
+            "counts": counts,
+            "events": self.events,
+            "screenshot": image_path,
+        }
+        with open(self.log_path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+        print(f"hitch: {ms:.1f} ms (median {median:.1f}), events {self.events or '-'}, logged to {self.log_path}")
+
+
+if __name__ == "__main__":
+    # steady 8 ms frames with a 30 ms spike every 100, checked against a profiler timing two phases
+    import tempfile
+
+    import profiler
+
+    frame_profiler = profiler.FrameProfiler(enabled=True)
+    detector = HitchDetector(enabled=True, log_path=os.path.join(tempfile.mkdtemp(), "hitches.jsonl"))
+    for frame in range(500):
+        spike = frame % 100 == 99
+        frame_profiler.begin_frame()
+        if spike:
+            detector.note("smart bomb")
+        end = time.perf_counter() + (0.030 if spike else 0.008)
+        while time.perf_counter() < end:
+            pass
+        frame_profiler.lap("update")
+        frame_profiler.lap("draw")
+        frame_profiler.end_frame()
+        detector.check(frame_profiler.frame_times[-1] / 1000, frame_profiler, {"enemies": 30})
+
+    with open(detector.log_path) as file:
+        records = [json.loads(line) for line in file]
+    print(f"{detector.hitches} hitches in {detector.frames} frames: " + ", ".join(f"frame {r['frame']} {r['frame_ms']} ms" for r in records))
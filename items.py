@@ -1,20 +1,117 @@
+"""
+Upgrades (items) the player buys in the shop.
+
+Items don't get polled every frame. Each one subscribes to the hooks it
+cares about (see ItemHooks), and only while it cares: a big shot ticks
+while it's charging, a dash while it's cooling down, a shield while it's
+deployed (and only then is it in the collision system, see
+collision.BulletBlockers). So per-frame item cost follows what's active,
+not what's owned.
+
+Hooks:
+    on_tick(dt)                      every frame, while subscribed
+    on_draw(surface, offset_x)       every frame, while subscribed
+    on_fire_pressed()                shoot key went down
+    on_fire_released()               shoot key came up
+    on_use()                         the item's slot key (not subscribed, goes to that item)
+    on_enemy_bullet_collision(hits)  enemy bullets hit it (while it's a blocker)
+    on_reset()                       the player respawned
+"""
+
 import pygame as pg
 
 from pygame.math import Vector2
 
+import collision
 import misc
+import projectiles
+import render
 
-from classes import Player, PlayerBullet, EnemyBullet
+from classes import Player
 from constants import *
 from sound import CHARGE_FIRE_SOUND, CHARGED_SOUND
 
 pg.init()
 
-class ChargedBullet(PlayerBullet):
-    def __init__(self, x: float, y: float, width: int, height: int, angle, speed: int) -> None:
-        super().__init__(x, y, width, height, angle, speed)
+HOOKS: tuple[str, ...] = ("on_tick", "on_draw", "on_fire_pressed", "on_fire_released", "on_enemy_bullet_collision", "on_reset")
+
+
+class ItemHooks(object):
+    """Which items listen to which hook, plus what they need to act on the game.
+
+    Built for every wave, then every item the player owns gets `attach`ed.
+
+    Attributes:
+        player (Player): The ship items act on.
+        particles (list[pg.sprite.Group]): Where items put their effects.
+        blockers (collision.BulletBlockers): Where items that stop bullets register.
+        subscribers (dict[str, list]): Items per hook, in the order they subscribed.
+    """
+
+    def __init__(self, player: Player, particles: list[pg.sprite.Group], blockers: collision.BulletBlockers) -> None:
+        self.player: Player = player
+        self.particles: list[pg.sprite.Group] = particles
+        self.blockers: collision.BulletBlockers = blockers
+        self.subscribers: dict[str, list] = {hook: [] for hook in HOOKS}
+
+    def attach(self, item: "Item") -> None:
+        item.hooks = self
+        item.on_attach()
+
+    def subscribe(self, hook: str, item: "Item") -> None:
+        if item not in self.subscribers[hook]:
+            self.subscribers[hook].append(item)
+
+    def unsubscribe(self, hook: str, item: "Item") -> None:
+        if item in self.subscribers[hook]:
+            self.subscribers[hook].remove(item)
+
+    def emit(self, hook: str, *args) -> None:
+        """Calls `hook` on everyone subscribed to it (who may unsubscribe while it runs)."""
+        subscribers = self.subscribers[hook]
+        if subscribers:
+            for item in subscribers[:]:
+                getattr(item, hook)(*args)
+
+    def use(self, item: "Item") -> None:
+        item.on_use()
+
 
-class big_shot(object):
+class Item(object):
+    """Base for items: every hook does nothing, `on_attach` subscribes to nothing.
+
+    Attributes:
+        hooks (ItemHooks | None): Set by `ItemHooks.attach`.
+    """
+
+    hooks: ItemHooks | None = None
+
+    def on_attach(self) -> None:
+        """Subscribes to whatever the item needs from the start of a wave."""
+
+    def on_tick(self, dt: float) -> None:
+        pass
+
+    def on_draw(self, surface: pg.Surface, offset_x: float) -> None:
+        pass
+
+    def on_fire_pressed(self) -> None:
+        pass
+
+    def on_fire_released(self) -> None:
+        pass
+
+    def on_use(self) -> None:
+        pass
+
+    def on_enemy_bullet_collision(self, hits: int) -> None:
+        pass
+
+    def on_reset(self) -> None:
+        pass
+
+
+class big_shot(Item):
     """NOW'S YOUR CHANCE TO BE A- what?
     
     Player can charge up a bigger shot by holding
@@ -64,47 +161,58 @@ class big_shot(object):
             "Speed": self.speed, 
         }
     
-    def use(self, player=None, dt=None, particles=None, keybinds=None, **kwargs) -> None:
-        pass
-
-    def update(self, player: Player, dt: float, keybinds: dict[str,int], **kwargs) -> None:
-        keys = pg.key.get_pressed()
-        particles = kwargs.get("particles")
-
-        shoot_key = keybinds.get("shoot", pg.K_SPACE)
-        if keys[shoot_key]:
-            self.charge += dt
-
-            if not self.charged and self.charge >= self.max_charge:
-                self.charged = True
-                if particles is not None:
-                    particles.append(
-                        misc.explosion_effect(
-                            player.pos, 
-                            number=30,
-                            min_speed=300,
-                            max_speed=500,
-                            min_lifetime=0.2,
-                            max_lifetime=0.5,
-                            base_colour=(255,255,255),
-                        )
-                    )
-                pg.mixer.Channel(6).play(CHARGED_SOUND, maxtime=1800)
-        else:
-            if self.charge >= self.max_charge:
-                    print("BIGSHOT!")
-                    player.bullets.append(ChargedBullet(player.rect.x + (player.rect.width // 2), 
-                                                        player.rect.y + (player.rect.height // 2), 
-                                                        width=self.size,
-                                                        height=self.size, 
-                                                        angle = player.direction * -180, 
-                                                        speed=self.speed))
-                    pg.mixer.Channel(6).play(CHARGE_FIRE_SOUND, maxtime=1800)
-            self.charge = 0
-            self.charged = False
+    def on_attach(self) -> None:
+        self.charge = 0.0
+        self.charged = False
+        self.charging = False
+        self.hooks.subscribe("on_fire_pressed", self)
+        self.hooks.subscribe("on_fire_released", self)
+
+    def on_fire_pressed(self) -> None:
+        # only ticks while the shoot key is held
+        self.charging = True
+        self.hooks.subscribe("on_tick", self)
+
+    def on_tick(self, dt: float) -> None:
+        self.charge += dt
+
+        if not self.charged and self.charge >= self.max_charge:
+            self.charged = True
+            player = self.hooks.player
+            self.hooks.particles.append(
+                misc.explosion_effect(
+                    player.pos, 
+                    number=30,
+                    min_speed=300,
+                    max_speed=500,
+                    min_lifetime=0.2,
+                    max_lifetime=0.5,
+                    base_colour=(255,255,255),
+                )
+            )
+            pg.mixer.Channel(6).play(CHARGED_SOUND, maxtime=1800)
+
+    def on_fire_released(self) -> None:
+        if self.charge >= self.max_charge:
+                print("BIGSHOT!")
+                player = self.hooks.player
+                # charged shots pierce through every enemy in their way
+                player.bullets.fire(player.rect.x + (player.rect.width // 2) + self.size / 2,
+                                    player.rect.y + (player.rect.height // 2) + self.size / 2,
+                                    speed=self.speed,
+                                    angle=player.direction * -180,
+                                    owner=projectiles.PLAYER,
+                                    radius=self.size / 2,
+                                    image=render.rect_stamp(self.size, self.size, WHITE),
+                                    piercing=True)
+                pg.mixer.Channel(6).play(CHARGE_FIRE_SOUND, maxtime=1800)
+        self.charge = 0
+        self.charged = False
+        self.charging = False
+        self.hooks.unsubscribe("on_tick", self)
     
 
-class deployable_shield(object):
+class deployable_shield(Item):
     """Shield consumable that player can deploy to block bullets."""
 
     def __init__(self) -> None:
@@ -119,6 +227,8 @@ class deployable_shield(object):
         self.alpha: float = self.max_alpha
         self.pulse_speed: float = 200.0
         self.pulse_direction: int = -1
+        # one plain white surface, faded with set_alpha (a cached stamp per alpha would keep up to 256 of them)
+        self.image: pg.Surface = self.make_image()
 
         self.name: str = "Shield"
         self.desc: str = "Spawns a shield which can hold off enemy fire."
@@ -141,9 +251,14 @@ class deployable_shield(object):
             "Health": 30,
         }
 
-    def use(self, player: Player, **kwargs) -> None:
+    def on_attach(self) -> None:
+        self.hooks.subscribe("on_reset", self)
+        if self.deployed: # still up from last wave
+            self._register()
+
+    def on_use(self) -> None:
         if not self.deployed:
-            self.deploy(player.pos)
+            self.deploy(self.hooks.player.pos)
 
     def deploy(self, pos: Vector2) -> None:
         if self.deployed:
@@ -152,6 +267,7 @@ class deployable_shield(object):
         self.position = pos.copy()
         self.rect.topleft = (int(self.position.x), int(self.position.y))
         self.deployed = True
+        self._register()
         print("Shield deployed!")
     
     def reset(self) -> None:
@@ -160,10 +276,34 @@ class deployable_shield(object):
         self.alpha = self.max_alpha
         self.pulse_direction = -1
 
+        if self.hooks is not None:
+            self.hooks.unsubscribe("on_tick", self)
+            self.hooks.unsubscribe("on_draw", self)
+            self.hooks.blockers.remove(self)
+
+    def _register(self) -> None:
+        # only ticking, drawn and stopping bullets while deployed
+        self.hooks.subscribe("on_tick", self)
+        self.hooks.subscribe("on_draw", self)
+        self.hooks.blockers.add(self)
+
+    def on_reset(self) -> None:
+        self.reset()
+
+    def on_enemy_bullet_collision(self, hits: int) -> None:
+        self.health -= 20 * hits
+
+    def make_image(self) -> pg.Surface:
+        """The shield's surface, sized from the current rect."""
+        image = pg.Surface(self.rect.size)
+        image.fill(WHITE)
+        return image
+
     def upgrade(self) -> None:
         self.rect.width += int(self.upgrade_amount["Width"])
         self.rect.height += int(self.upgrade_amount["Height"])
         self.max_health += int(self.upgrade_amount["Health"])
+        self.image = self.make_image()
 
         self.stats = {
             "Width": self.rect.width,
@@ -171,16 +311,7 @@ class deployable_shield(object):
             "Health": self.max_health,
         }
 
-    def update(self, **kwargs) -> None:
-        if not self.deployed:
-            return
-
-        offset_x = kwargs.get("offset_x", 0)
-        self.rect.x = int(self.position.x + offset_x)
-        self.rect.y = int(self.position.y)
-
-        dt: float = kwargs.get("dt", 0)
-
+    def on_tick(self, dt: float) -> None:
         self.max_alpha = max(0, (self.health / self.max_health) * 255)
 
         self.alpha += self.pulse_direction * self.pulse_speed * dt
@@ -191,16 +322,15 @@ class deployable_shield(object):
             self.alpha = self.max_alpha
             self.pulse_direction = -1
 
-        if "surface" in kwargs:
-            self.draw(kwargs["surface"])
+    def on_draw(self, surface: pg.Surface, offset_x: float) -> None:
+        self.draw(surface, offset_x)
 
-    def draw(self, surface: pg.Surface) -> None:
-        shield_surface: pg.Surface = pg.Surface((self.rect.width, self.rect.height), pg.SRCALPHA)
-        shield_surface.fill((255, 255, 255, int(self.alpha)))
-        surface.blit(shield_surface, (self.rect.x, self.rect.y))
+    def draw(self, surface: pg.Surface, offset_x: float) -> None:
+        self.image.set_alpha(int(self.alpha))
+        surface.blit(self.image, (self.rect.x + offset_x, self.rect.y))
 
 
-class dash(object):
+class dash(Item):
     """Dash upgrade: when activated, player lunges forward quickly. How original."""
 
     def __init__(self) -> None:
@@ -237,31 +367,39 @@ class dash(object):
                 "Cooldown": self.dash_cooldown,
             }
 
-    def update(self, player: Player, dt: float, **kwargs) -> None:
+    def on_attach(self) -> None:
+        # cooling down at the start of a wave, same as before
+        self.hooks.subscribe("on_tick", self)
+
+    def on_tick(self, dt: float) -> None:
+        # only ticks while cooling down
         self._cooldown_timer += dt
+        if self._cooldown_timer >= self.dash_cooldown:
+            self.hooks.unsubscribe("on_tick", self)
 
-    def use(self, player: Player, **kwargs) -> None:
+    def on_use(self) -> None:
          if self._cooldown_timer >= self.dash_cooldown:
+            player = self.hooks.player
             dir_multiplier = -1 if player.direction == 1 else 1
+
+            player.dash_from = player.rect.copy()
             
             player.pos.x += dir_multiplier * self.dash_distance
             player.pos.x = max(-WORLD_WIDTH // 2, min(WORLD_WIDTH // 2, player.pos.x))
 
-            player.rect.centerx = int(player.pos.x)
+            player.rect.x = int(player.pos.x)
             self._cooldown_timer = 0.0
-
-            # Optional particle effect:
-            particles = kwargs.get("particles")
-            if particles is not None:
-                particles.append(
-                    misc.explosion_effect(
-                        Vector2(player.pos.x, player.pos.y),
-                        number=20,
-                        min_speed=200,
-                        max_speed=400,
-                        min_lifetime=0.1,
-                        max_lifetime=0.3,
-                        base_colour=(200, 200, 255),
-                        reversed=True
-                    )
-                )
\ No newline at end of file
+            self.hooks.subscribe("on_tick", self)
+
+            self.hooks.particles.append(
+                misc.explosion_effect(
+                    Vector2(player.pos.x, player.pos.y),
+                    number=20,
+                    min_speed=200,
+                    max_speed=400,
+                    min_lifetime=0.1,
+                    max_lifetime=0.3,
+                    base_colour=(200, 200, 255),
+                    reversed=True
+                )
+            )
\ No newline at end of file
@@ -1,21 +1,34 @@
+import argparse
+import collections
 import math
 import os
 import random
 import sys
 import typing
 
+import numpy as np
 import pygame as pg # type: ignore
 import pygame_menu as pm
 
 from pygame.math import Vector2
 
+import allocs
+import collision
+import ecs
+import hitches
 import items
 import map
 import misc
-
-from classes import EnemyState, Player, PlayerBullet, PlayerGroup, EnemyBullet, Enemy, EnemyGroup, Humanoid, HumanoidGroup, HumanoidState, Mutant, MiniMap
+import pools
+import profiler
+import projectiles
+import render
+import sectors
+import spawning
+import timestep
+
+from classes import EnemyState, Player, PlayerGroup, Enemy, EnemyGroup, Humanoid, HumanoidGroup, HumanoidState, Mutant, MiniMap
 from constants import *
-from downgrade_fx import apply_downgrade_effect
 from shop import ShopUI, InventoryItem
 
 # Initialize
@@ -56,9 +69,34 @@ def quit() -> None:
     pg.quit()
     sys.exit()
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Command line options."""
+    parser = argparse.ArgumentParser(description="Defender Remake")
+    parser.add_argument("--renderer", choices=render.BACKENDS, default="surface",
+                        help="surface: software blits (default), texture: pygame._sdl2 GPU textures")
+    parser.add_argument("--tick-rate", type=int, default=SIMULATION_RATE,
+                        help=f"simulation ticks per second (default {SIMULATION_RATE}), lower it on slow machines")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="spawn seed, same seed = same spawn positions every wave (default: random)")
+    parser.add_argument("--count-allocs", choices=("blocks", "trace"), nargs="?", const="blocks", default=None,
+                        help="count allocations per frame in the update path, reported every wave "
+                             "(trace: also peak bytes, with tracemalloc, slow)")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the frame profiler on (F3 toggles it, F4 exports a Chrome trace)")
+    parser.add_argument("--hitches", type=float, nargs="?", const=HITCH_FACTOR, default=None, metavar="FACTOR",
+                        help=f"log frames over FACTOR times the median frame (default {HITCH_FACTOR}) to {HITCH_LOG}")
+    parser.add_argument("--profile-waves", type=int, default=0, metavar="N",
+                        help=f"run cProfile over N waves, one pstats file each in {PROFILE_DIR}/ (F5 profiles the current wave)")
+    parser.add_argument("--profile-from", type=int, default=1, metavar="WAVE",
+                        help="first wave --profile-waves counts from (default 1)")
+    return parser.parse_args(argv)
+
 class Game(object):
-    def __init__(self) -> None:
-        self.dt: float = 0.0
+    def __init__(self, renderer: str = "surface", tick_rate: int = SIMULATION_RATE, seed: int | None = None,
+                 count_allocs: str | None = None, profile: bool = False, hitch_factor: float | None = None,
+                 profile_waves: int = 0, profile_from: int = 1) -> None:
+        self.dt: float = 0.0 # last frame's length (render rate), ticks use self.timestep.dt
+        self.timestep: timestep.FixedTimestep = timestep.FixedTimestep(tick_rate)
         self.running: bool = True
         self.top_widget: pg.Surface = pg.Surface((SCREEN_WIDTH, TOP_WIDGET_HEIGHT))
         self.surface: pg.Surface = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT - TOP_WIDGET_HEIGHT))
@@ -67,14 +105,31 @@ class Game(object):
         # group containing player
         self.player_group: PlayerGroup = PlayerGroup()
 
+        # every bullet in the game (player's and enemies') lives in this one store
+        self.bullets: projectiles.BulletStore = projectiles.BulletStore()
+
         # Intialize player
         self.player: Player = Player(0, SCREEN_HEIGHT // 4, PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.player.bullets = self.bullets
         self.player_group.add(self.player)
 
-        self.enemy_group: EnemyGroup = EnemyGroup()
+        # spawn positions are dealt from evenly spread point sets, reshuffled every wave (see spawning.py)
+        self.seed: int = seed if seed is not None else random.randrange(2 ** 32)
+        self.enemy_spawns: spawning.SpawnSampler = spawning.SpawnSampler(spawning.ENEMY_AREA, spawning.ENEMY_SPACING)
+        self.humanoid_spawns: spawning.SpawnSampler = spawning.SpawnSampler(spawning.GROUND_AREA, spawning.HUMANOID_SPACING)
+
+        self.enemy_group: EnemyGroup = EnemyGroup(self.bullets, self.enemy_spawns)
+
+        # everything stored in archetypes (bullets, each enemy type's flock), for systems to query (see ecs.py)
+        self.world: ecs.World = ecs.World()
+        self.world.add(self.bullets)
+        for flock in self.enemy_group.flocks.values():
+            self.world.add(flock)
 
 
         self.offset: Vector2 = Vector2(0, 0)
+        self.prev_offset_x: float = 0.0 # camera offset at the previous tick
+        self.view_offset: Vector2 = Vector2(0, 0) # offset used for drawing, between the last two ticks
         self.speed_threshold: float = self.player.max_speed_x * 0.7 # threshold for look-ahead
             
         self.previousoffsets: typing.List[float] = []
@@ -83,6 +138,7 @@ class Game(object):
         self.offset_change: float = 0.0
 
         self.mini_map: MiniMap = MiniMap()
+        self.mini_map.track(self.world)
         self.mini_map_clock: float = 0.0
 
         self.camera = Vector2(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
@@ -104,17 +160,72 @@ class Game(object):
         self.smart_bomb_text_rect: pg.Rect = self.smart_bomb_text.get_rect()
         self.smart_bomb_text_rect.center = (SCREEN_WIDTH // 2, TOP_WIDGET_HEIGHT // 2)
 
-    def draw(self) -> None:
-        
-        self.humanoid_group.update(self.offset.x, self.dt, self.gameplay_surface, self.particles, self.player_group, self.pop_up_sprites, self.player)
-        self.enemy_group.update(self.offset.x, self.player, self.humanoid_group, self.gameplay_surface, self.dt, self.current_wave)
-        
-        self.player.update(self.offset.x, self.dt, keybinds)
+        # screen flashes waiting to be drawn, [seconds left, colour or None for a gap] (see screen_flash)
+        self.flashes: collections.deque[list] = collections.deque()
+        self.flash_text: bool = False
+
+        # collision broadphase, rebuilt every tick (world space)
+        self.enemy_grid: collision.SpatialHash = collision.SpatialHash()
+        self.humanoid_grid: collision.SpatialHash = collision.SpatialHash()
+        self.respawn_grid: collision.OccupancyGrid = collision.OccupancyGrid(pg.Rect(0, 0, SCREEN_WIDTH, GAMEPLAY_HEIGHT))
+        self.collision_pairs: int = 0 # narrowphase tests done over last frame's ticks (metric, F3 overlay / hitch log)
+
+        # allocations per frame in the update path, off unless --count-allocs (see allocs.py)
+        self.allocations: allocs.AllocationCounter = allocs.AllocationCounter(enabled=count_allocs is not None,
+                                                                              trace=count_allocs == "trace")
+
+        # time spent in each phase of the frame, F3 overlay / F4 trace export (see profiler.py)
+        # the hitch detector keeps it timing, overlay or not, for the phases of a hitch
+        self.profiler: profiler.FrameProfiler = profiler.FrameProfiler(enabled=hitch_factor is not None, overlay=profile)
+        self.hitches: hitches.HitchDetector = hitches.HitchDetector(enabled=hitch_factor is not None,
+                                                                    factor=hitch_factor or HITCH_FACTOR)
+
+        # cProfile over whole waves, --profile-waves / F5 (see profiler.WaveProfiler)
+        self.wave_profiler: profiler.WaveProfiler = profiler.WaveProfiler(profile_waves, profile_from)
+        self.wave_counts: dict[str, int] = {}
+
+        # items stopping enemy bullets right now (a deployed shield), see items.py
+        self.bullet_blockers: collision.BulletBlockers = collision.BulletBlockers()
+        self.item_hooks: items.ItemHooks = items.ItemHooks(self.player, self.particles, self.bullet_blockers)
+
+        # far from the camera things step less often or sleep (see sectors.py)
+        self.sectors: sectors.SectorMap = sectors.SectorMap()
+
+        # surface (software) or texture (GPU) renderer, chosen at startup
+        self.backend: render.SurfaceBackend | render.TextureBackend = render.create_backend(renderer)
+
+        # wave spawns are built a few per frame, warping in as they arrive (see spawning.py)
+        self.spawner: spawning.SpawnScheduler = spawning.SpawnScheduler(on_spawn=self.warp_in)
+
+        # a full wave's worth of spares up front (sprite loads included), waves and later sessions reuse them (see pools.py)
+        pools.pool(Enemy).reserve(30, 0, 0)
+        pools.pool(Mutant).reserve(20, 0, 0)
+        pools.pool(Humanoid).reserve(self.initial_humanoids, 0, 0)
+
+        # one batch per draw layer, each one is flushed with a single blits call
+        self.batches: dict[str, render.SpriteBatch] = {
+            "bullets": render.SpriteBatch(),
+            "particles": render.SpriteBatch(),
+            "humanoids": render.SpriteBatch(),
+            "enemies": render.SpriteBatch(),
+        }
+
+    def draw(self, alpha: float = 1.0) -> None:
+        """Draws the world `alpha` of the way between the last two simulation ticks."""
+        self.humanoid_group.draw(self.batches["humanoids"], self.view_offset.x, alpha)
+        self.enemy_group.draw(self.batches["enemies"], self.view_offset.x, alpha)
+
+        self.backend.submit(self.batches["humanoids"], self.gameplay_surface)
+        self.backend.submit(self.batches["enemies"], self.gameplay_surface)
+        self.profiler.lap("enemies")
 
         if self.player_group.ships < 0:
             self.game_over()
 
-        misc.draw_visibility_fade(self.gameplay_surface, self.player.pos.x)
+        # over the sprite layers on either backend
+        misc.draw_visibility_fade(self.backend.overlay(self.gameplay_surface), self.player.pos.x)
+        self.draw_flash()
+        self.profiler.lap("effects")
 
         # Blit and center surface on the screen
         screen.blit(
@@ -122,12 +233,18 @@ class Game(object):
             ((screen.get_width() - self.surface.get_width()) / 4, TOP_WIDGET_HEIGHT))
              
         self.render_top_widget()
+        self.profiler.lap("hud")
 
-        apply_downgrade_effect(screen, 2)
+        # overlay goes through the post-FX like everything else, so both backends show it
+        self.profiler.draw(screen, self.dt, self.entity_counts)
+        self.profiler.lap("profiler")
 
-        pg.display.flip()
+        self.backend.post_fx(screen, 2)
+        self.profiler.lap("post-fx")
+        self.backend.flip()
+        self.profiler.lap("flip")
 
-    def _camera_look_ahead(self) -> None:
+    def _camera_look_ahead(self, dt: float) -> None:
         """
         Smoothly moves the camera towards the player with a look-ahead effect.
         Locks player within an edge margin by locking the camera to the player when necessary.
@@ -138,7 +255,7 @@ class Game(object):
         if abs(self.player.velocity.x) > self.speed_threshold:
             desired = math.copysign(MAX_LOOKAHEAD, self.player.velocity.x)
 
-        self.current_lookahead += (desired - self.current_lookahead) * SMOOTHING * 0.5
+        self.current_lookahead += (desired - self.current_lookahead) * timestep.smoothing(SMOOTHING * 0.5, dt)
 
         # compute player’s x in screen space
         player_screen_x: float = self.player.pos.x + self.offset.x
@@ -154,14 +271,14 @@ class Game(object):
         desired_cam_x: float = self.camera.x - violation
 
         # smoothly interpolate camera.x toward that desired value
-        self.camera.x += (desired_cam_x - self.camera.x) * SMOOTHING
+        self.camera.x += (desired_cam_x - self.camera.x) * timestep.smoothing(SMOOTHING, dt)
 
         # build target camera x with smoothed look-ahead
         target_cam_x: float = self.camera.x + self.current_lookahead
 
         # formula: a = a + (b - a) * t, where a is the current value, b is the desired value, and t is the smoothing factor
-        self.player.lookahead_compensation = (target_cam_x - self.camera.x) * SMOOTHING
-        self.camera.x += (target_cam_x - self.camera.x) * SMOOTHING
+        self.player.lookahead_compensation = (target_cam_x - self.camera.x) * timestep.smoothing(SMOOTHING, dt)
+        self.camera.x += (target_cam_x - self.camera.x) * timestep.smoothing(SMOOTHING, dt)
 
     def render_top_widget(self) -> None:
         # Draw the top widget
@@ -181,8 +298,7 @@ class Game(object):
         self.display_ships()
         self.display_smart_bombs()
 
-        self.mini_map.add(*self.enemy_group.sprites())
-        self.mini_map.update(self.offset.x)
+        self.mini_map.update(self.view_offset.x)
         
         screen.blit(self.mini_map.surface, ((self.surface.get_width() // 2) - (self.mini_map.surface.get_width() // 2), 0))
 
@@ -213,7 +329,7 @@ class Game(object):
         # Scroll background
         for i in range(-1, test_space_tiles + 1):
             self.surface.blit(scaled_background, 
-            ((self.offset.x * 0.5) % background_width + i * background_width, 50))
+            ((self.view_offset.x * 0.5) % background_width + i * background_width, 50))
 
     def _screen_rescale(self) -> None:
         pg.transform.scale(
@@ -221,16 +337,18 @@ class Game(object):
             (SCREEN_WIDTH, GAMEPLAY_HEIGHT),
             self.gameplay_surface)
         
-    def _calculate_offset(self) -> None:
+    def _calculate_offset(self, dt: float) -> None:
         """Calculates the camera offset based on player position and camera position.
 
         The offset is used to center the player on the screen and create a parallax effect.
         Changes self.offset and self.previousoffsets.
         """
-        heading = self.player.pos - self.camera
-        self.camera += heading * 0.05
+        # all in place, the camera and offset vectors are reused every tick
+        smoothing = timestep.smoothing(0.05, dt)
+        self.camera.x += (self.player.pos.x - self.camera.x) * smoothing
+        self.camera.y += (self.player.pos.y - self.camera.y) * smoothing
 
-        self.offset = Vector2(
+        self.offset.update(
             int(-self.camera.x + SCREEN_WIDTH//2),
             int(-self.camera.y + SCREEN_HEIGHT//2)
         )
@@ -250,16 +368,18 @@ class Game(object):
         self.peaks: list[tuple[int, int]] = map.generate_peaks(WORLD_WIDTH * 2)
         self.mini_map.create_mountain_representation(self.peaks, WORLD_WIDTH * 2)
 
-        time_since_last_enemy: float = 0.0
-        test_spam_enemy_fire_time: float = 0.0
         particle_timer: float = 0.0
         self.player_dead_timer: float = 0.0
 
-        revival_particles: pg.sprite.Group | None = None
-        currently_reviving: bool = False
+        self.revival_particles: pg.sprite.Group | None = None
+        self.currently_reviving: bool = False
 
+        self.enemy_spawns.reset((self.seed, self.current_wave))
+        self.humanoid_spawns.reset((self.seed, self.current_wave))
+        self.spawner.clear()
         self.generate_humanoids()
         self.spawn_enemies(self.num_of_landers, self.num_of_mutants)
+        self.wave_counts = {"landers": self.num_of_landers, "mutants": self.num_of_mutants, "humanoids": self.humanoids_left}
 
         sorted_by_slot = sorted(
             self.player_group.upgrades,
@@ -268,191 +388,260 @@ class Game(object):
         # Now put them in player.items
         self.player.items = sorted_by_slot[:]
 
+        # items only hear about the events they subscribe to (see items.py)
+        self.bullet_blockers.clear()
+        self.item_hooks = items.ItemHooks(self.player, self.particles, self.bullet_blockers)
+        for item in self.player_group.upgrades:
+            self.item_hooks.attach(item)
+
         self.running = True
+        self.timestep.reset()
+        # the first frame's dt covers whatever came before (menus, the shop), not a real frame
+        self.hitches.skip()
+        self.wave_profiler.start(self.current_wave)
 
         while self.running:
-            self._calculate_offset()
-            self._camera_look_ahead()
+            self.profiler.begin_frame()
+
+            # Event handling (once per frame, so no key press falls between ticks)
+            self.event()
+            self.profiler.lap("events")
+
+            # the wave arrives over the first few frames instead of all in one
+            if self.spawner:
+                self.hitches.note(f"wave spawn ({self.spawner.run()})")
+                self.profiler.lap("spawning")
+
+            # Simulate in fixed ticks, however long the last frame took
+            conversions = self.enemy_group.conversions
+            self.collision_pairs = 0
+            self.allocations.begin()
+            for _ in range(self.timestep.advance(self.dt)):
+                self.simulate(self.timestep.dt)
+
+                # if player successfully killed all enemies (and they've all arrived), exit out of function
+                if not self.enemy_group and not self.spawner:
+                    self.report_wave()
+                    return True
+            self.allocations.end()
+            if self.enemy_group.conversions != conversions:
+                self.hitches.note("mutant conversion")
+
+            # everything below only draws (plus cosmetic stuff running at frame rate)
+            alpha: float = self.timestep.alpha
+            self.view_offset.x = int(timestep.lerp(self.prev_offset_x, self.offset.x, alpha))
 
             # Update background
             screen.fill(BLACK)
             self.surface.fill(BLACK)
             self.background()
+            self.profiler.lap("background")
 
             # Draw mountains
-            map.draw_mountains(self.surface, self.peaks, self.offset.x, WORLD_WIDTH * 2)
+            map.draw_mountains(self.surface, self.peaks, self.view_offset.x, WORLD_WIDTH * 2)
+            self.profiler.lap("mountains")
 
-            # if dead, respawn
-            if self.player.state == Player.States.DEAD and not currently_reviving:
-                if self.player_group.ships < 1:
-                    self.player_group.ships -= 1
-                else:
-                    self.player_dead_timer += self.dt
-                    if self.player_dead_timer >= 2.0:
-
-                        # safe respawn logic
-                        respawn_x = SCREEN_WIDTH // 2
-                        respawn_y = SCREEN_HEIGHT // 4
-                        temp_rect = pg.Rect(respawn_x, respawn_y, PLAYER_WIDTH, PLAYER_HEIGHT)
-                        max_attempts = 20
-                        attempts = 0
-                        while any(temp_rect.colliderect(enemy.rect) for enemy in self.enemy_group.sprites()) and attempts < max_attempts:
-                            respawn_y += PLAYER_HEIGHT + 10
-                            if respawn_y > GAMEPLAY_HEIGHT - PLAYER_HEIGHT:
-                                respawn_y = TOP_WIDGET_HEIGHT + 10
-                            temp_rect = pg.Rect(respawn_x, respawn_y, PLAYER_WIDTH, PLAYER_HEIGHT)
-                            attempts += 1
-                        self.player.pos = Vector2(respawn_x, respawn_y)
-                        
-                        revival_particles = self.player.revive(self.offset.x)
-                        self.particles.append(revival_particles)
-                        self.player.invulnerable = True # i-frames
-                        self.player.invul_timer = 0.0
-
-                        currently_reviving = True
-                        self.player_group.ships -= 1
-                        self.player.smart_bombs = 3
-                        self.player_dead_timer = 0.0
-
-            # Event handling
-            self.player.cooldown_timer += clock.get_time()
-            self.event()
-
-            # if player successfully killed all enemies, exit out of function
-            if not self.enemy_group:
-                return True
+            self.item_hooks.emit("on_tick", self.dt)
+            self.item_hooks.emit("on_draw", self.surface, self.view_offset.x)
+            self.profiler.lap("items")
 
             # Draw player
-            if self.player.health <= 0 and self.player.state != Player.States.DEAD:
-                self.player.state = Player.States.DEAD
-                self.screen_flash(1, [(255, 255, 255, 50)], 0.06, 0.02, False)
-                self.particles.append(self.player.death())
-                
-            self.player_group.update_items(self.dt, 
-                                     collision_list=self.enemy_group.bullets,
-                                     surface=self.surface,
-                                     offset_x=self.offset.x,
-                                     keybinds=keybinds,
-                                     particles=self.particles
-                                     )
-            
-            self.player.draw(self.surface)
-            self.player.move(self.dt, keybinds)
-            
-            # Draw player bullets
-            self.player_bullet_update()
-
-            self.update_and_draw_enemy_related()
+            self.player.draw(self.surface, self.view_offset.x, alpha)
+            self.profiler.lap("player")
 
-            test_spam_enemy_fire_time += self.dt
-            if test_spam_enemy_fire_time > 1.3:
-                for enemy in self.enemy_group.sprites():
-                    if hasattr(enemy, "fire_bullet") and callable(enemy.fire_bullet):
-                        enemy.fire_bullet(self.player.pos.x, self.player.pos.y)
-                test_spam_enemy_fire_time = 0.0
-            
-            # Clamp player position
-            self.player.rect.clamp_ip(self.surface.get_rect())
+            # Draw bullets
+            self.bullets.draw(self.batches["bullets"], self.view_offset.x, alpha)
+            self.backend.submit(self.batches["bullets"], self.surface)
+            self.profiler.lap("bullets")
 
             # Rescale screen
             self._screen_rescale()
+            self.profiler.lap("rescale")
 
             # particles!!!
             if self.particles:
                 # update each particle group
                 for group in self.particles[:]:
-                    group.update(self.dt, self.gameplay_surface, self.offset.x)
+                    group.update(self.dt, self.batches["particles"], self.view_offset.x)
 
                     # if group is empty
                     if not group:
                         self.particles.remove(group)
 
                         # respawn player
-                        if group is revival_particles:
-                            revival_particles = None
-                            currently_reviving = False
+                        if group is self.revival_particles:
+                            self.revival_particles = None
+                            self.currently_reviving = False
 
-                            for item in self.player_group.upgrades:
-                                if hasattr(item, "reset"):
-                                    item.reset()
+                            self.item_hooks.emit("on_reset")
 
                             self.player.state = Player.States.IDLE
 
                         del group
+
+                self.backend.submit(self.batches["particles"], self.gameplay_surface)
+            self.profiler.lap("particles")
             
             particle_timer += self.dt
             if particle_timer > 1.0:
-                if (particle_group := self.player.health_indicator(self.offset.x)):
+                if (particle_group := self.player.health_indicator()):
                     self.particles.append(particle_group)
 
             if self.pop_up_sprites:
                 for pop_up in self.pop_up_sprites:
                     pop_up.update(self.dt)
                     if hasattr(pop_up, "draw"):
-                        pop_up.draw(self.gameplay_surface, self.offset.x)
+                        pop_up.draw(self.backend.overlay(self.gameplay_surface), self.view_offset.x)
                     if hasattr(pop_up, "remaining_time"):
                         if pop_up.remaining_time <= 0:
                             pop_up.kill()
                             self.pop_up_sprites.remove(pop_up)
                             del pop_up
                             continue
- 
-
-            self.score_check()
+            self.profiler.lap("pop-ups")
 
             # Draw screen
-            self.draw()
-            
-            # Update previous offset (move this to the end of the loop)
-            self.previous_offset = self.offset
+            self.draw(alpha)
 
             # Update delta time
             self.dt = clock.tick(FRAMES_PER_SECOND) / 1000
+            self.profiler.lap("idle")
+            self.profiler.end_frame()
+
+            if self.hitches.enabled:
+                self.hitches.check(self.dt, self.profiler, self.entity_counts(), lambda: self.backend.screenshot(screen))
 
-        if not self.enemy_group:
+        self.report_wave()
+        if not self.enemy_group and not self.spawner:
             return True
         else:
             return False
         
-    def player_bullet_update(self) -> None:
-        for bullet in self.player.bullets:
-
-                # off-screen culling
-                if SCREEN_WIDTH * 1.2 < bullet.x or bullet.x < SCREEN_WIDTH * -0.2:
-                    print(bullet)
-                    self.player.bullets.remove(bullet)
-                    del bullet
-                    continue
+    def entity_counts(self) -> dict[str, int]:
+        """What's alive right now (and last frame's collision tests), for the hitch log and the F3 overlay."""
+        return {
+            "enemies": len(self.enemy_group),
+            "humanoids": len(self.humanoid_group),
+            "particles": sum(len(group) for group in self.particles),
+            "bullets": len(self.bullets),
+            "pop_ups": len(self.pop_up_sprites),
+            "collision_pairs": self.collision_pairs,
+        }
+
+    def report_wave(self) -> None:
+        """End of a wave (won or not): allocation counts (--count-allocs) and the wave's profile (--profile-waves / F5)."""
+        if self.allocations.enabled:
+            print(f"Wave {self.current_wave} {self.allocations.report()}")
+            self.allocations.reset()
+        self.wave_profiler.finish(self.current_wave, self.wave_counts)
+
+    def simulate(self, dt: float) -> None:
+        """One fixed simulation tick (see timestep.py). Moves, collides and spawns, never draws."""
+        self.prev_offset_x = self.offset.x
+        self.player.prev_pos.update(self.player.pos)
+
+        self._calculate_offset(dt)
+        self._camera_look_ahead(dt)
+        self.profiler.lap("camera")
+
+        # if dead, respawn
+        if self.player.state == Player.States.DEAD and not self.currently_reviving:
+            if self.player_group.ships < 1:
+                self.player_group.ships -= 1
+            else:
+                self.player_dead_timer += dt
+                if self.player_dead_timer >= 2.0:
+
+                    self.player.pos = self.safe_respawn_point(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)
+                    self.player.prev_pos.update(self.player.pos)
+                    
+                    self.revival_particles = self.player.revive(self.offset.x)
+                    self.particles.append(self.revival_particles)
+                    self.player.invulnerable = True # i-frames
+                    self.player.invul_timer = 0.0
+
+                    self.currently_reviving = True
+                    self.player_group.ships -= 1
+                    self.player.smart_bombs = 3
+                    self.player_dead_timer = 0.0
+
+        self.player.cooldown_timer += dt * 1000
+
+        if self.player.health <= 0 and self.player.state != Player.States.DEAD:
+            self.player.state = Player.States.DEAD
+            self.screen_flash(1, [(255, 255, 255, 50)], 0.06, 0.02, False)
+            self.particles.append(self.player.death())
+
+        self.player.move(dt, keybinds)
+        self.profiler.lap("sim player")
+
+        self.sectors.update(self.camera.x)
+
+        self.humanoid_grid.rebuild(self.humanoid_group)
+        self.humanoid_group.update(dt, self.particles, self.player_group, self.pop_up_sprites, self.player, self.humanoid_grid, self.sectors)
+        self.enemy_group.update(self.player, self.humanoid_group, dt, self.current_wave, self.sectors)
+        self.profiler.lap("sim enemies")
+
+        # Move / cull every bullet (player and enemy) at once
+        self.bullet_update(dt)
+        self.profiler.lap("sim bullets")
+
+        self.update_enemy_related()
+        # the grids and the bullet store count from their last rebuild / reset, which was this tick
+        self.collision_pairs += self.enemy_grid.pairs_tested + self.bullets.pairs_tested + self.humanoid_grid.pairs_tested
+        self.profiler.lap("collisions")
 
-                bullet.update()
-                bullet.draw(self.surface)
+        # enemies near the camera shoot on their own timers, under a cap on live enemy bullets
+        self.enemy_group.shoot(self.player.pos, self.camera.x, dt)
+        self.profiler.lap("enemy fire")
+
+        self.player.update(dt, keybinds)
+
+        self.score_check()
+        self.profiler.lap("sim player")
+
+    def safe_respawn_point(self, x: float, y: float) -> Vector2:
+        """Clear spot for the player's ship nearest to (x, y), world space.
+
+        Enemies (from the broadphase grid) and enemy bullets around the spot
+        go in an occupancy grid, then one query finds the nearest place the
+        ship fits with RESPAWN_MARGIN to spare (or without, if it's that busy).
+        """
+        area = pg.Rect(int(x) - SCREEN_WIDTH // 2, 0, SCREEN_WIDTH, GAMEPLAY_HEIGHT)
+        self.respawn_grid.move_to(area)
+
+        self.enemy_grid.rebuild(self.enemy_group.everyone())
+        for enemy in self.enemy_grid.query(area):
+            self.respawn_grid.mark(enemy.rect)
+
+        n = len(self.bullets)
+        enemy_bullets = self.bullets.owner[:n] == projectiles.ENEMY
+        self.respawn_grid.mark_points(self.bullets.pos[:n, 0][enemy_bullets], self.bullets.pos[:n, 1][enemy_bullets],
+                                      self.bullets.radius[:n][enemy_bullets])
+
+        for margin in (RESPAWN_MARGIN, 0):
+            spot = self.respawn_grid.nearest_clear(x, y, PLAYER_WIDTH, PLAYER_HEIGHT, margin)
+            if spot is not None:
+                return Vector2(spot)
+        return Vector2(x, y) # the whole screen is full, nothing better to do
+
+    def bullet_update(self, dt: float) -> None:
+        """Moves every bullet, then culls the ones that left the screen (bullets live in world space, so cull against the camera).
+
+        Collisions happen after this (see update_enemy_related), drawing happens in play_game.
+        """
+        self.bullets.reset_stats()
+        self.bullets.integrate(timestep.frames(dt))
+        self.bullets.cull(self.offset.x)
 
     def spawn_enemies(self, num_of_landers: int, num_of_mutants: int) -> None:
         """Spawn given number of enemies."""
+        # points are picked now (same order every time for a seed), the enemies get built over the next frames
         min_distance = SCREEN_WIDTH // 2
-        for _ in range(num_of_landers):
-            while True:
-                spawn_x = random.randint(
-                    -(WORLD_WIDTH // 2) + EDGE_SPAWN_BUFFER,
-                    (WORLD_WIDTH // 2) - EDGE_SPAWN_BUFFER
-                )
-                spawn_y = random.randint(TOP_WIDGET_HEIGHT, GAMEPLAY_HEIGHT)
-                if abs(spawn_x - self.player.pos.x) > min_distance or abs(spawn_y - self.player.pos.y) > min_distance:
-                    break
-            enemy = Enemy(spawn_x, spawn_y)
-            self.enemy_group.add(enemy)
-
-        for _ in range(num_of_mutants):
-            while True:
-                spawn_x = random.randint(
-                    -(WORLD_WIDTH // 2) + EDGE_SPAWN_BUFFER,
-                    (WORLD_WIDTH // 2) - EDGE_SPAWN_BUFFER
-                )
-                spawn_y = random.randint(TOP_WIDGET_HEIGHT, GAMEPLAY_HEIGHT)
-                if abs(spawn_x - self.player.pos.x) > min_distance or abs(spawn_y - self.player.pos.y) > min_distance:
-                    break
-            enemy = Mutant(spawn_x, spawn_y)
-            self.enemy_group.add(enemy)
+        for kind, count in ((Enemy, num_of_landers), (Mutant, num_of_mutants)):
+            for _ in range(count):
+                spawn_x, spawn_y = self.enemy_spawns.take(self.player.pos, min_distance)
+                self.spawner.push(lambda kind=kind, x=spawn_x, y=spawn_y: pools.acquire(kind, x, y), self.enemy_group.add)
         
     
     def score_check(self) -> None:
@@ -464,116 +653,155 @@ class Game(object):
             self.player_group.ships += extra_ships
             self.player_group.ships_awarded = ships_awarded
 
-    def update_and_draw_enemy_related(self) -> None:
-        # Draw enemies
-        for enemy in self.enemy_group.sprites():
-            #enemy.update(self.offset.x, self.player, self.humanoid_group.sprites(), self.surface)
-
-            if -(SCREEN_WIDTH * 0.2) < enemy.pos.x < SCREEN_WIDTH * 1.2:
-                enemy.draw(self.surface)
-
-            # enemy collision detection w/ player
-            if self.player.hitbox_top.colliderect(enemy.rect) or self.player.hitbox_bottom.colliderect(enemy.rect):
-                if self.player.state != Player.States.DEAD:
-                    self.player.gets_hit_by(enemy)
-                    # Enemy dies on collision with player
-                    self.particles.append(enemy.death())
-                    enemy.kill()
+    def enemy_reward(self, enemy) -> tuple[int, int]:
+        """Score and coins for shooting `enemy` down."""
+        if getattr(enemy, "state", None) == EnemyState.CAPTURING:
+            # reward more points and coins for preventing enemy from capturing
+            return 250, 10
+        return 50, 5
+
+    def kill_enemy(self, enemy) -> None:
+        """Enemy shot down by the player: reward, explosion, gone."""
+        score, coins = self.enemy_reward(enemy)
+        self.player_group.score += score
+        self.player_group.coins += coins
+        self.particles.append(enemy.death())
+
+    def player_enemy_collisions(self) -> None:
+        """Enemy collision detection w/ player (including the whole path of a dash)."""
+        if self.player.state == Player.States.DEAD:
+            self.player.dash_from = None
+            return
+
+        touching: list = []
+
+        # a dash moves the ship 200+ px in one go, so sweep the path instead of teleporting through landers
+        if self.player.dash_from is not None:
+            dash_from: pg.Rect = self.player.dash_from
+            self.player.dash_from = None
+
+            hit = self.enemy_grid.sweep_first(dash_from, self.player.rect.x - dash_from.x, self.player.rect.y - dash_from.y)
+            if hit is not None:
+                touching.append(hit)
+
+        for hitbox in (self.player.hitbox_top, self.player.hitbox_bottom):
+            touching += self.enemy_grid.collide(hitbox, with_mask=self.player)
+
+        for enemy in touching:
+            if not enemy.alive():
+                continue
+            self.player.gets_hit_by(enemy)
+            # Enemy dies on collision with player
+            self.particles.append(enemy.death())
+            enemy.kill()
+
+    def player_bullet_collisions(self) -> None:
+        """Collision detection with player bullets, all bullets in one pass per enemy.
+
+        Each bullet is swept from where it was last frame to where it is now,
+        so 50+ px/frame charged shots can't skip over a 50 px lander.
+        Bullets that end up on an enemy still need a pixel (mask) hit.
+        """
+        n: int = len(self.bullets)
+        if not n:
+            return
+
+        # broadphase: only enemies near the area swept by this frame's bullets
+        ends = self.bullets.pos[:n]
+        starts = ends - self.bullets.vel[:n] * self.bullets.step
+        reach = self.bullets.radius[:n].max()
+        left, top = np.minimum(starts, ends).min(axis=0) - reach
+        right, bottom = np.maximum(starts, ends).max(axis=0) + reach
+        enemies: list = self.enemy_grid.query(pg.Rect(int(left), int(top), int(right - left) + 1, int(bottom - top) + 1))
+        if not enemies:
+            return
+
+        # (enemy, bullet) time of impact, np.inf = miss
+        impacts = np.stack([self.bullets.sweep(enemy.rect, projectiles.PLAYER) for enemy in enemies])
+
+        spent: list[int] = []
+        for i in np.flatnonzero(np.isfinite(impacts).any(axis=0)).tolist():
+            bullet_rect: pg.Rect = self.bullets.rect(i)
+
+            # earliest enemy along the bullet's path first
+            for e in np.argsort(impacts[:, i]).tolist():
+                if not np.isfinite(impacts[e, i]):
+                    break
+
+                enemy = enemies[e]
+                if not enemy.alive():
+                    continue
+                if bullet_rect.colliderect(enemy.rect) and not self.bullets.mask_overlap(i, enemy):
                     continue
 
-            # collision detection with player bullets
-            if (collided_bullet := pg.sprite.spritecollideany(enemy, self.player.bullets)): # type: ignore
                 # hit enemy!
-                if getattr(enemy, "state", None) == EnemyState.CAPTURING:
-                    # reward more points and coins for preventing enemy from capturing
-                    self.player_group.score += 250
-                    self.player_group.coins += 10
-                else:
-                    self.player_group.score += 50
-                    self.player_group.coins += 5
-                self.particles.append(enemy.death())
-
-                if isinstance(collided_bullet, items.ChargedBullet):
-                    ...
-                else:
-                    self.player.bullets.remove(collided_bullet)
-
-
-                del enemy
-
-        for ebullet in self.enemy_group.bullets:
-                if self.player.invulnerable:
-                    ebullet.update()
-                    ebullet.draw(self.surface, self.offset.x)
-                    continue
-    
-                # enemy bullet collision detection w/ player
-                if self.player.hitbox_top.colliderect(ebullet.rect) or self.player.hitbox_bottom.colliderect(ebullet.rect):
-                    if self.player.state != Player.States.DEAD:
-                        self.player.gets_hit_by(ebullet)
-                        self.particles.append(misc.explosion_effect(Vector2(ebullet.x, ebullet.y),
-                                                                    number=10,
-                                                                    min_lifetime=0.2,
-                                                                    max_lifetime=0.35,
-                                                                    min_speed=200,
-                                                                    ))
-
-                        self.enemy_group.bullets.remove(ebullet)
-                        del ebullet
-                        continue
-                
+                self.kill_enemy(enemy)
 
-                player_shield = None
+                # charged shots keep going through everything in their path
+                if not self.bullets.piercing[i]:
+                    spent.append(i)
+                    break
 
-                for item in self.player_group.upgrades:
-                    if isinstance(item, items.deployable_shield):
-                        player_shield = item
-                        
-                if player_shield:
-                    if isinstance(item, items.deployable_shield):
-                        if pg.Rect.colliderect(player_shield.rect, ebullet.rect):
-                            self.enemy_group.bullets.remove(ebullet)
-                            item.health -= 20
-                            del ebullet
-                            continue
+        self.bullets.despawn_many(spent)
 
+    def enemy_bullet_collisions(self) -> None:
+        """Enemy bullets vs the player and the shield, each one a single vectorized pass."""
+        spent: set[int] = set()
 
+        if not self.player.invulnerable and self.player.state != Player.States.DEAD:
+            candidates = np.union1d(self.bullets.overlapping(self.player.hitbox_top, projectiles.ENEMY),
+                                    self.bullets.overlapping(self.player.hitbox_bottom, projectiles.ENEMY))
 
-                # off-screen culling
-                if ebullet.x + self.offset.x < SCREEN_WIDTH * -0.2 or ebullet.x + self.offset.x > SCREEN_WIDTH * 1.2 or ebullet.y > SCREEN_HEIGHT or ebullet.y < 0:
-                    self.enemy_group.bullets.remove(ebullet)
-                    del ebullet
+            for i in candidates.tolist():
+                if not self.bullets.mask_overlap(i, self.player):
                     continue
 
-                ebullet.update()
-                ebullet.draw(self.surface, self.offset.x)
-        
+                self.player.gets_hit_by(projectiles.ENEMY)
+                self.particles.append(misc.explosion_effect(Vector2(*self.bullets.pos[i]),
+                                                            number=10,
+                                                            min_lifetime=0.2,
+                                                            max_lifetime=0.35,
+                                                            min_speed=200,
+                                                            ))
+                spent.add(i)
+
+        # deployed shields and the like (registered by the items themselves)
+        if self.bullet_blockers:
+            self.bullet_blockers.block(self.bullets, projectiles.ENEMY, spent)
+
+        self.bullets.despawn_many(spent)
+
+    def update_enemy_related(self) -> None:
+        # enemies and bullets are drawn separately (EnemyGroup.draw / BulletStore.draw)
+        self.enemy_grid.rebuild(self.enemy_group.everyone())
+
+        self.player_enemy_collisions()
+        self.player_bullet_collisions()
+        self.enemy_bullet_collisions()
 
     def game_over(self) -> None:
         self.game_over_timer += self.dt
-        self.gameplay_surface.blit(self.game_over_text, self.game_over_text_rect)
+        self.backend.overlay(self.gameplay_surface).blit(self.game_over_text, self.game_over_text_rect)
 
         if self.game_over_timer > 3.0:
             self.running = False
             return
 
     def generate_humanoids(self) -> None:
+        min_distance = SCREEN_WIDTH // 4
         for i in range(self.humanoids_left):
-            min_distance = SCREEN_WIDTH // 4
-            while True:
-                spawn_x: int = random.randint(
-                        -(WORLD_WIDTH // 2) + EDGE_SPAWN_BUFFER,
-                        (WORLD_WIDTH // 2) - EDGE_SPAWN_BUFFER
-                    )
-                spawn_y: int = GROUND_Y
-                
-                if abs(spawn_x - self.player.pos.x) > min_distance or abs(spawn_y - self.player.pos.y) > min_distance:
-                        break
-            print(f"Humanoid spawned at ({spawn_x}, {spawn_y})")
-            self.humanoid_group.add(Humanoid(spawn_x, spawn_y))
+            spawn_x, spawn_y = self.humanoid_spawns.take(self.player.pos, min_distance)
+            self.spawner.push(lambda x=spawn_x, y=spawn_y: pools.acquire(Humanoid, x, y), self.place_humanoid)
+
+    def place_humanoid(self, humanoid: Humanoid) -> None:
+        self.humanoid_group.add(humanoid)
+        self.mini_map.add(humanoid)
 
-        # add to mini_map
-        self.mini_map.add(self.humanoid_group.sprites())
+    def warp_in(self, sprite: pg.sprite.Sprite) -> None:
+        """Warp-in effect for a new spawn (SpawnScheduler hook): a small implosion, if it's on screen."""
+        if render.on_screen(sprite.rect.x, sprite.rect.width, self.offset.x):
+            self.particles.append(misc.explosion_effect(Vector2(sprite.rect.center), number=WARP_IN_PARTICLES,
+                                                        min_lifetime=0.3, max_lifetime=0.6, reversed=True))
 
     def smart_bomb(self) -> None:
         """Uses a smart bomb, if possible.
@@ -584,22 +812,26 @@ class Game(object):
             return
 
         self.player.smart_bombs -= 1
+        self.hitches.note("smart bomb")
 
-        enemies_on_screen = [enemy for enemy in self.enemy_group.sprites() if 0 < enemy.pos.x + self.offset.x < SCREEN_WIDTH]
-        bullets_on_screen = [bullet for bullet in self.enemy_group.bullets if 0 < bullet.x + self.offset.x < SCREEN_WIDTH]
+        enemies_on_screen = [enemy for enemy in self.enemy_group.everyone() if 0 < enemy.pos.x + self.offset.x < SCREEN_WIDTH]
 
-        for enemy in enemies_on_screen:
-            self.particles.append(enemy.death(sound_on=False))
-            enemy.kill()
-            del enemy
-        for bullet in bullets_on_screen:
-            self.enemy_group.bullets.remove(bullet)
+        # everything at once: rewards added up, one explosion and sound for the lot, one pass over the bullets
+        if enemies_on_screen:
+            rewards = [self.enemy_reward(enemy) for enemy in enemies_on_screen]
+            self.player_group.score += sum(score for score, _ in rewards)
+            self.player_group.coins += sum(coins for _, coins in rewards)
+            self.particles.append(self.enemy_group.kill_many(enemies_on_screen))
+        self.bullets.remove_where(~((self.bullets.owner[:len(self.bullets)] == projectiles.ENEMY) & self.bullets.on_screen(self.offset.x)))
 
         # flash effect
         self.screen_flash(3, [(255, 0, 0, 100), (0, 255, 0, 100), (0, 0, 255, 100)], 0.06, 0.03)
         
     def screen_flash(self, num: int, colours: list[tuple[int, int, int, int]], flash_seconds: float, blank_seconds: float, show_smart_bomb_text: bool = True) -> None:
         """Flashes the screen with colour, giving a dramatic effect.
+
+        Doesn't block: the flashes are queued and drawn over the next frames
+        (see `draw_flash`), the game keeps running underneath.
         
         Arguments:
             num (int): Number of individual flashes to show on screen.
@@ -616,42 +848,40 @@ class Game(object):
                 screen_flash(3, [(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)], 0.5, 0.2)
             
         """
-        
+        self.flashes.clear()
         for i in range(num):
-            colour = colours[i % len(colours)]
-            original_surface = self.gameplay_surface.copy()
+            self.flashes.append([flash_seconds, colours[i % len(colours)]])
+            self.flashes.append([blank_seconds, None])
+        self.flash_text = show_smart_bomb_text
 
-            flash_overlay = pg.Surface((screen.get_width(), screen.get_height()-TOP_WIDGET_HEIGHT), pg.SRCALPHA)
-            flash_overlay.fill(colour)
-
-            screen.blit(original_surface, (0, TOP_WIDGET_HEIGHT))
-            self.render_top_widget()
-            screen.blit(flash_overlay, (0, TOP_WIDGET_HEIGHT))
-            if show_smart_bomb_text:
-                self.gameplay_surface.blit(self.smart_bomb_text, self.smart_bomb_text_rect)
-
-            pg.display.flip()
-
-            pg.time.delay(int(flash_seconds * 1000))
+    def draw_flash(self) -> None:
+        """Draws the current screen flash (if any) over the gameplay surface, and moves it along by a frame."""
+        if not self.flashes:
+            return
 
-            screen.blit(original_surface, (0, TOP_WIDGET_HEIGHT))
-            if show_smart_bomb_text:
-                self.gameplay_surface.blit(self.smart_bomb_text, self.smart_bomb_text_rect)
+        phase = self.flashes[0]
+        target = self.backend.overlay(self.gameplay_surface)
+        if phase[1] is not None:
+            target.blit(render.rect_stamp(SCREEN_WIDTH, GAMEPLAY_HEIGHT, phase[1]), (0, 0))
+        if self.flash_text:
+            target.blit(self.smart_bomb_text, self.smart_bomb_text_rect)
 
-            pg.display.flip()
-            
-            pg.time.delay(int(blank_seconds * 1000))
+        phase[0] -= self.dt
+        if phase[0] <= 0:
+            self.flashes.popleft()
 
     def event(self) -> None:
         """Handles events."""
         for event in pg.event.get():
             if event.type == pg.QUIT:
+                self.report_wave() # a wave being profiled still gets its (partial) stats
                 quit()
             elif event.type == pg.KEYDOWN:
                     
                 # Fire bullet
                 if event.key == keybinds["shoot"]:
                     self.player.fire_bullet()
+                    self.item_hooks.emit("on_fire_pressed")
 
                 elif event.key == keybinds["smart_bomb"]:
                     self.smart_bomb()
@@ -664,16 +894,16 @@ class Game(object):
                 #            item.deploy(self.player.pos)
 
                 elif event.key == keybinds["use_item_1"] and len(self.player.items) >= 1:
-                    self.player.items[0].use(player=self.player, dt=self.dt, particles=self.particles, keybinds=keybinds)
+                    self.item_hooks.use(self.player.items[0])
 
                 elif event.key == keybinds["use_item_2"] and len(self.player.items) >= 2:
-                    self.player.items[1].use(player=self.player, dt=self.dt, particles=self.particles, keybinds=keybinds)
+                    self.item_hooks.use(self.player.items[1])
 
                 elif event.key == keybinds["use_item_3"] and len(self.player.items) >= 3:
-                    self.player.items[2].use(player=self.player, dt=self.dt, particles=self.particles, keybinds=keybinds)
+                    self.item_hooks.use(self.player.items[2])
 
                 elif event.key == keybinds["use_item_4"] and len(self.player.items) >= 4:
-                    self.player.items[3].use(player=self.player, dt=self.dt, particles=self.particles, keybinds=keybinds)
+                    self.item_hooks.use(self.player.items[3])
 
                         
 
@@ -681,6 +911,20 @@ class Game(object):
                     if self.player.state != Player.States.DEAD:
                         self.particles.append(self.player.death())
 
+                elif event.key == pg.K_F3: # frame profiler overlay
+                    self.profiler.toggle()
+
+                elif event.key == pg.K_F4: # frame profiler trace
+                    if (path := self.profiler.export()) is not None:
+                        print(f"frame trace written to {path}")
+
+                elif event.key == pg.K_F5: # cProfile the rest of this wave (again: stop after this wave)
+                    self.wave_profiler.toggle(self.current_wave)
+
+            elif event.type == pg.KEYUP:
+                if event.key == keybinds["shoot"]:
+                    self.item_hooks.emit("on_fire_released")
+
     def game_loop(self) -> None:
         self.current_wave: int = 1
         self.num_of_landers: int = 10
@@ -699,12 +943,13 @@ class Game(object):
                 if (self.current_wave + 1) % 2:
                     shop = ShopUI(screen, self.player_group)
                     shop.shop_loop(screen, screen, self)
+                    self.hitches.note("shop exit")
             else:
                 break
 
     def reset_player(self) -> None:
         self.player.pos = Vector2(0, SCREEN_HEIGHT // 4)
-        self.player.rect.center = self.player.pos
+        self.player.rect.topleft = (int(self.player.pos.x), int(self.player.pos.y))
         self.player.velocity = Vector2(0, 0)
         self.player.accel_x = 0
         self.player.accel_y = 0
@@ -782,9 +1027,12 @@ class Game(object):
 
 
 if __name__ == "__main__":
+    args = parse_args()
     while True:
     
-        master_game = Game()
+        master_game = Game(renderer=args.renderer, tick_rate=args.tick_rate, seed=args.seed, count_allocs=args.count_allocs,
+                           profile=args.profile, hitch_factor=args.hitches,
+                           profile_waves=args.profile_waves, profile_from=args.profile_from)
 
         master_game.main_menu()
         master_game.game_loop()
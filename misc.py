@@ -8,12 +8,14 @@ import pygame_widgets as pw # type: ignore
 from pygame.math import Vector2
 from pygame_widgets.button import Button # type: ignore
 
+import render
+
 from constants import *
 
 MIN_SIZE: int = 2
 MAX_SIZE: int = 6
 
-def explosion_effect(pos: Vector2, 
+def explosion_effect(pos: Vector2 | list[Vector2], 
                      number: int = 70, 
                      min_speed: float = 120.0, 
                      max_speed: float =300.0,
@@ -33,7 +35,8 @@ def explosion_effect(pos: Vector2,
     duration of its chosen lifetime.
 
     Arguments:
-        pos (Vector2): (x, y) position of the center of explosion.
+        pos (Vector2 | list[Vector2]): (x, y) position of the center of explosion.
+            Several positions make one merged explosion, particles shared out between them.
         number (int): Initial number of particles.
         min_speed (float): Minimum speed of the particles.
         max_speed (float): Maximum speed of the particles.
@@ -47,8 +50,10 @@ def explosion_effect(pos: Vector2,
         pg.sprite.Group: A group of particles (sprites) representing the explosion.
     """
     particle_group: ParticleGroup = ParticleGroup()
+    centers: list[Vector2] = pos if isinstance(pos, list) else [pos]
 
-    for _ in range(number):
+    for i in range(number):
+        pos = centers[i % len(centers)]
         angle = random.randint(min_angle, max_angle)
         lifetime = random.uniform(min_lifetime, max_lifetime)
         speed = random.uniform(min_speed, max_speed)
@@ -71,7 +76,6 @@ def explosion_effect(pos: Vector2,
     return particle_group
 
 class Particle(pg.sprite.Sprite):
-
     def __init__(self, spawn_pos: Vector2, 
                  speed: float,
                  lifetime: float, 
@@ -92,7 +96,9 @@ class Particle(pg.sprite.Sprite):
         self.size = random.uniform(MIN_SIZE, MAX_SIZE)
 
     def update(self, dt: float) -> None:
-        self.pos += self.velocity * dt
+        # in place, no temporary Vector2 per particle per frame
+        self.pos.x += self.velocity.x * dt
+        self.pos.y += self.velocity.y * dt
 
         self.remaining_time -= dt
 
@@ -100,7 +106,7 @@ class Particle(pg.sprite.Sprite):
             self.kill()
             del self # <--- does this work? if memory leak this may be culprit
         
-    def draw(self, screen: pg.Surface, offset_x: float):
+    def draw(self, batch: render.SpriteBatch, offset_x: float):
         # off-screen culling
         if self.pos.x + offset_x > SCREEN_WIDTH or self.pos.x + offset_x < 0:
             return
@@ -109,23 +115,23 @@ class Particle(pg.sprite.Sprite):
         
         # particle fades from fully opaque to fully transparent in self.total_time
 
-        # get (r,g,b,a)
+        # get alpha
         visibility_percentage: float = max(0.0, min(1.0, self.remaining_time / self.total_time))
 
         alpha: int = int(255 * visibility_percentage) # alpha channel
-        colour: tuple[int, int, int, int] = (*self.base_colour, alpha)
 
         # shrink to nothing in self.total_time
         radius: float = float(self.size * visibility_percentage)
         if radius <= 0:
             return
 
-        # creates temp surface so alpha values can render
-        temp_surface: pg.Surface = pg.Surface((radius*2, radius*2), pg.SRCALPHA)
-        pg.draw.circle(temp_surface, colour, (radius, radius), radius)
-        
+        # pre-rendered alpha stamp instead of a new temp surface every frame
+        stamp: pg.Surface | None = render.particle_stamp(self.base_colour, radius, alpha)
+        if stamp is None:
+            return
+
         draw_x: float = self.pos.x + offset_x
-        screen.blit(temp_surface, (draw_x - radius/2, self.pos.y - radius/2))
+        batch.add(stamp, (draw_x - radius/2, self.pos.y - radius/2))
 
 class ReverseParticle(Particle):
     """reversed explosion effect (like sucking in to center)
@@ -144,42 +150,43 @@ class ReverseParticle(Particle):
 
         # calculating the position of the particle if it was a normal explosion and then reversing the velocity
         self.pos: Vector2 = spawn_pos.copy() + self.velocity * self.total_time
-        self.velocity = -self.velocity
+        self.velocity *= -1
 
     def update(self, dt: float) -> None:
-        self.pos += self.velocity * dt
+        self.pos.x += self.velocity.x * dt
+        self.pos.y += self.velocity.y * dt
         self.remaining_time -= dt
         if self.remaining_time <= 0:
             self.kill()
             del self
 
-    def draw(self, screen: pg.Surface, offset_x: float):
+    def draw(self, batch: render.SpriteBatch, offset_x: float):
         # particle fades from fully transparent to fully opaque in self.total_time
 
-        # get (r,g,b,a)
+        # get alpha
         visibility_percentage: float = max(0.0, min(1.0, (self.total_time - self.remaining_time) / self.total_time))
         alpha: int = int(255 * visibility_percentage)
-        colour: tuple[int, int, int, int] = (*self.base_colour, alpha)
 
         radius: float = float(self.size * visibility_percentage)
         if radius >= self.size:
             return
         
-        # creates temp surface so alpha values can render
-        temp_surface: pg.Surface = pg.Surface((radius*2, radius*2), pg.SRCALPHA)
-        pg.draw.circle(temp_surface, colour, (radius, radius), radius)
-        
+        # pre-rendered alpha stamp instead of a new temp surface every frame
+        stamp: pg.Surface | None = render.particle_stamp(self.base_colour, radius, alpha)
+        if stamp is None:
+            return
+
         draw_x: float = self.pos.x + offset_x
-        screen.blit(temp_surface, (draw_x - radius/2, self.pos.y - radius/2))
+        batch.add(stamp, (draw_x - radius/2, self.pos.y - radius/2))
 
 class ParticleGroup(pg.sprite.Group):
     def __init__(self) -> None:
         super().__init__()
 
-    def update(self, dt: float, screen: pg.Surface, offset_x: float) -> None:
+    def update(self, dt: float, batch: render.SpriteBatch, offset_x: float) -> None:
         for sprite in self.sprites():
             sprite.update(dt)
-            sprite.draw(screen, offset_x)
+            sprite.draw(batch, offset_x)
 
 
 def draw_visibility_fade(surface: pg.Surface, player_x: float):
@@ -0,0 +1,94 @@
+"""
+Object pools.
+
+Enemies and humanoids are reused instead of rebuilt every wave: a dead one
+goes back to its type's pool (the groups do that when it leaves them) and
+the next spawn of that type takes it out again and calls its `reset`.
+The pools live for the whole run, so later waves and sessions don't
+allocate at all, and memory stays flat over a long session.
+
+A pooled type needs a `reset` taking the same arguments as `__init__`.
+
+Anything can still hold a pooled object after it's released (a lander's
+target, say). Every release bumps the object's `generation`, so holders
+remember the generation they saw and treat a different one as "gone".
+Releasing an object that's already spare does nothing.
+Bullets don't need this, they already live in preallocated arrays (see
+projectiles.BulletStore).
+"""
+
+import typing
+
+T = typing.TypeVar("T")
+
+POOL_LIMIT: int = 128 # most spare objects kept per type, beyond that they're left to the GC
+
+
+class Pool(typing.Generic[T]):
+    """Spare objects of one type.
+
+    Attributes:
+        kind (type[T]): What's pooled.
+        free (list[T]): Spares, ready to be reset.
+        limit (int): Most spares kept.
+        created (int): Objects built because the pool was empty (metric).
+        reused (int): Acquires served from the pool (metric).
+        spare (set[int]): ids of the objects in `free`, so one can't be released twice.
+    """
+
+    def __init__(self, kind: type[T], limit: int = POOL_LIMIT) -> None:
+        self.kind: type[T] = kind
+        self.free: list[T] = []
+        self.limit: int = limit
+        self.created: int = 0
+        self.reused: int = 0
+        self.spare: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.free)
+
+    def acquire(self, *args) -> T:
+        """A spare reset with `args`, or a new one if there are none."""
+        if self.free:
+            obj = self.free.pop()
+            self.spare.discard(id(obj))
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.kind(*args)
+
+    def release(self, obj: T) -> None:
+        """Takes back an object nothing uses anymore (a second release before it's reused is ignored)."""
+        if id(obj) in self.spare:
+            return
+        obj.generation = getattr(obj, "generation", 0) + 1
+        if len(self.free) < self.limit:
+            self.free.append(obj)
+            self.spare.add(id(obj))
+
+    def reserve(self, count: int, *args) -> None:
+        """Builds spares until there are at least `count` (e.g. at startup, off the clock)."""
+        while len(self.free) < min(count, self.limit):
+            obj = self.kind(*args)
+            self.free.append(obj)
+            self.spare.add(id(obj))
+            self.created += 1
+
+
+_pools: dict[type, Pool] = {}
+
+
+def pool(kind: type[T]) -> Pool[T]:
+    """The pool for `kind` (made the first time it's asked for)."""
+    if kind not in _pools:
+        _pools[kind] = Pool(kind)
+    return _pools[kind]
+
+
+def acquire(kind: type[T], *args) -> T:
+    return pool(kind).acquire(*args)
+
+
+def release(obj) -> None:
+    pool(type(obj)).release(obj)
@@ -0,0 +1,288 @@
+"""
+Per-phase frame profiler.
+
+The frame loop calls `begin_frame`, then `lap(name)` after each phase
+(events, simulation steps, each draw layer, post-FX, flip...), then
+`end_frame`. Each lap charges the time since the previous one to that
+phase (a phase lapped several times in one frame, like the simulation
+ticks, adds up).
+
+Keeps the last PROFILE_WINDOW frames for rolling percentiles (the overlay,
+F3) and the last PROFILE_TRACE_FRAMES frames of laps for a Chrome
+trace-event export (F4, open it in chrome://tracing or ui.perfetto.dev).
+
+For where the time goes inside a phase, WaveProfiler runs cProfile over
+whole waves and writes one pstats file per wave.
+
+Timing can stay on with the overlay hidden (the hitch detector needs the
+last frame's phases, see hitches.py). Off, every call is an attribute
+check and a return, so the laps can stay in the loop for good.
+"""
+
+import collections
+import cProfile
+import json
+import os
+import pstats
+import time
+import typing
+
+import numpy as np
+import pygame as pg
+
+from constants import *
+
+pg.init()
+
+OVERLAY_FONT: pg.font.Font = pg.font.Font(os.path.join("fonts", "PressStart2P-Regular.ttf"), 14)
+OVERLAY_REFRESH: float = 0.25 # seconds between overlay text rebuilds
+GRAPH_FRAMES: int = 240 # frame-time graph width, 1 frame = 2 px
+GRAPH_HEIGHT: int = 80
+BUDGET_MS: float = 1000 / FRAMES_PER_SECOND
+
+
+class FrameProfiler(object):
+    """Times the phases of each frame.
+
+    Attributes:
+        enabled (bool): Timing at all.
+        overlay (bool): Showing the overlay (timing is on while it is).
+        keep_timing (bool): Timing stays on when the overlay is hidden.
+        frame_times (collections.deque[float]): Whole frame, ms, last PROFILE_WINDOW frames.
+        phases (dict[str, collections.deque[float]]): ms per frame for each phase (0 for frames it didn't run),
+            in the order they were first seen.
+        trace (collections.deque[tuple[float, float, list]]): (start, duration, laps) per frame for the export,
+            laps are (name, start, duration), all in seconds from perf_counter.
+    """
+
+    def __init__(self, enabled: bool = False, overlay: bool = False, window: int = PROFILE_WINDOW,
+                 trace_frames: int = PROFILE_TRACE_FRAMES) -> None:
+        self.enabled: bool = enabled or overlay
+        self.overlay: bool = overlay
+        self.keep_timing: bool = enabled
+        self.window: int = window
+        self.frame_times: collections.deque[float] = collections.deque(maxlen=window)
+        self.phases: dict[str, collections.deque[float]] = {}
+        self.trace: collections.deque[tuple[float, float, list]] = collections.deque(maxlen=trace_frames)
+
+        self._frame_start: float | None = None
+        self._last: float = 0.0
+        self._current: dict[str, float] = {}
+        self._laps: list[tuple[str, float, float]] = []
+
+        self._overlay: pg.Surface | None = None
+        self._overlay_age: float = OVERLAY_REFRESH
+
+    def toggle(self) -> None:
+        """Overlay on/off, timing with it (unless `keep_timing`). Turning timing on starts from the next frame."""
+        self.overlay = not self.overlay
+        enabled = self.overlay or self.keep_timing
+        if enabled != self.enabled:
+            self.enabled = enabled
+            self._frame_start = None
+        self._overlay = None
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._frame_start = self._last = time.perf_counter()
+        self._current = {}
+        self._laps = []
+
+    def lap(self, name: str) -> None:
+        """Charges the time since the last lap (or the frame start) to `name`."""
+        if not self.enabled or self._frame_start is None:
+            return
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + now - self._last
+        self._laps.append((name, self._last, now - self._last))
+        self._last = now
+
+    def end_frame(self) -> None:
+        if not self.enabled or self._frame_start is None:
+            return
+        duration = self._last - self._frame_start
+        self.frame_times.append(duration * 1000)
+        for name in self._current:
+            if name not in self.phases:
+                self.phases[name] = collections.deque([0.0] * (len(self.frame_times) - 1), maxlen=self.window)
+        for name, times in self.phases.items():
+            times.append(self._current.get(name, 0.0) * 1000)
+        self.trace.append((self._frame_start, duration, self._laps))
+
+    def last_frame(self) -> dict[str, float]:
+        """ms per phase in the last finished frame."""
+        return {name: times[-1] for name, times in self.phases.items() if times}
+
+    def percentiles(self, name: str | None = None, q: tuple[float, ...] = (50, 95, 99)) -> tuple[float, ...]:
+        """Rolling percentiles (ms) of one phase, or the whole frame if `name` is None."""
+        times = self.frame_times if name is None else self.phases.get(name, ())
+        if not times:
+            return tuple(0.0 for _ in q)
+        return tuple(np.percentile(np.fromiter(times, float, len(times)), q).tolist())
+
+    def draw(self, surface: pg.Surface, dt: float, counts: typing.Callable[[], dict[str, int]] | None = None,
+             pos: tuple[int, int] = (8, TOP_WIDGET_HEIGHT + 8)) -> None:
+        """Overlay: percentiles per phase, `counts` (only called when the text is rebuilt) and a frame-time graph.
+
+        Text is rebuilt every OVERLAY_REFRESH seconds.
+        """
+        if not self.overlay or not self.frame_times:
+            return
+
+        self._overlay_age += dt
+        if self._overlay is None or self._overlay_age >= OVERLAY_REFRESH:
+            self._overlay_age = 0.0
+            self._overlay = self._render_text(counts() if counts is not None else {})
+        surface.blit(self._overlay, pos)
+
+        # frame-time graph under the text, budget line across it (bars over budget in red)
+        left, top = pos[0], pos[1] + self._overlay.get_height() + 4
+        graph = pg.Rect(left, top, GRAPH_FRAMES * 2, GRAPH_HEIGHT)
+        surface.fill((0, 0, 0), graph)
+        scale = GRAPH_HEIGHT / (BUDGET_MS * 2)
+        times = list(self.frame_times)[-GRAPH_FRAMES:]
+        for i, ms in enumerate(times):
+            height = min(GRAPH_HEIGHT, int(ms * scale))
+            colour = (220, 60, 60) if ms > BUDGET_MS else (60, 200, 90)
+            surface.fill(colour, (left + i * 2, graph.bottom - height, 2, height))
+        budget_y = graph.bottom - int(BUDGET_MS * scale)
+        pg.draw.line(surface, WHITE, (left, budget_y), (graph.right, budget_y))
+
+    def _render_text(self, counts: dict[str, int]) -> pg.Surface:
+        lines = [f"{'phase':11} {'p50':>5} {'p95':>5} {'p99':>5} ms"]
+        for name in (None, *self.phases):
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f"{(name or 'frame')[:11]:11} {p50:5.2f} {p95:5.2f} {p99:5.2f}")
+        for name, count in counts.items():
+            lines.append(f"{name[:15]:15} {count:>7}")
+
+        rendered = [OVERLAY_FONT.render(line, False, WHITE) for line in lines]
+        line_height = OVERLAY_FONT.get_linesize() + 4
+        panel = pg.Surface((max(line.get_width() for line in rendered) + 8, line_height * len(rendered) + 8), pg.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(rendered):
+            panel.blit(line, (4, 4 + i * line_height))
+        return panel
+
+    def export(self, path: str | None = None) -> str | None:
+        """Writes the kept frames as Chrome trace-event JSON. Returns the path (None if nothing was recorded)."""
+        if not self.trace:
+            return None
+        if path is None:
+            path = os.path.join(PROFILE_DIR, f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        origin = self.trace[0][0]
+        pid = os.getpid()
+
+        def event(name: str, start: float, duration: float, category: str) -> dict:
+            # complete event ("X"), times in microseconds
+            return {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": 1,
+                    "ts": round((start - origin) * 1e6, 3), "dur": round(duration * 1e6, 3)}
+
+        events: list[dict] = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": 1, "args": {"name": "frame loop"}}]
+        for start, duration, laps in self.trace:
+            events.append(event("frame", start, duration, "frame"))
+            events.extend(event(name, lap_start, lap_duration, "phase") for name, lap_start, lap_duration in laps)
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        return path
+
+
+class WaveProfiler(object):
+    """cProfile over whole waves, one pstats file each (open with `python -m pstats` or snakeviz).
+
+    Arm it for a number of waves (--profile-waves, or F5 mid-wave, which
+    starts right away). At each wave's end the stats are written to
+    PROFILE_DIR, named by wave and enemy / humanoid counts, and the top
+    PROFILE_TOP functions by self time are printed.
+
+    Attributes:
+        remaining (int): Waves still to profile (the current one included).
+        first_wave (int): Waves before this one are never profiled.
+        top (int): Functions listed per report.
+        profile (cProfile.Profile | None): Running profile, None between waves.
+        paths (list[str]): Every pstats file written.
+    """
+
+    def __init__(self, waves: int = 0, first_wave: int = 1, top: int = PROFILE_TOP) -> None:
+        self.remaining: int = waves
+        self.first_wave: int = first_wave
+        self.top: int = top
+        self.profile: cProfile.Profile | None = None
+        self.paths: list[str] = []
+
+    @property
+    def running(self) -> bool:
+        return self.profile is not None
+
+    def start(self, wave: int) -> None:
+        """Wave start: starts profiling if it's armed and this wave counts."""
+        if self.remaining > 0 and wave >= self.first_wave and self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def toggle(self, wave: int) -> None:
+        """Hotkey: not running = profile from now to the end of this wave, running = stop after this wave."""
+        if self.running:
+            self.remaining = 1
+        else:
+            self.remaining = max(self.remaining, 1)
+            self.first_wave = min(self.first_wave, wave)
+            self.start(wave)
+
+    def finish(self, wave: int, counts: dict[str, int]) -> str | None:
+        """Wave end: writes the wave's stats and prints its report. Returns the pstats path (None if not running)."""
+        if self.profile is None:
+            return None
+        self.profile.disable()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        counted = "-".join(f"{name}{count}" for name, count in counts.items())
+        path = os.path.join(PROFILE_DIR, f"wave{wave:02d}-{counted}-{time.strftime('%Y%m%d-%H%M%S')}.pstats")
+        self.profile.dump_stats(path)
+        print(f"Wave {wave} profile written to {path}")
+        print(self.report(self.profile))
+
+        self.paths.append(path)
+        self.profile = None
+        self.remaining -= 1
+        return path
+
+    def report(self, profile: cProfile.Profile | str) -> str:
+        """Top functions by self time (time in the function itself, not in what it calls)."""
+        stats = pstats.Stats(profile)
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:self.top]
+        lines = [f"{'self ms':>9} {'total ms':>9} {'calls':>8}  function"]
+        for (filename, line, function), (_, calls, self_time, total_time, _) in rows:
+            where = f"{os.path.basename(filename)}:{line}" if line else "built-in"
+            lines.append(f"{self_time * 1000:9.1f} {total_time * 1000:9.1f} {calls:8d}  {function} ({where})")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # cost of a lap when off versus on, and a short fake frame loop exported as a trace
+    import timeit
+
+    profiler = FrameProfiler()
+    off = timeit.timeit(lambda: profiler.lap("x"), number=200_000) / 200_000
+    profiler = FrameProfiler(enabled=True)
+    profiler.begin_frame()
+    on = timeit.timeit(lambda: profiler.lap("x"), number=200_000) / 200_000
+    print(f"lap: {off * 1e9:.0f} ns off, {on * 1e9:.0f} ns on")
+
+    profiler = FrameProfiler(enabled=True)
+    for frame in range(300):
+        profiler.begin_frame()
+        for name, ms in (("update", 2.0), ("draw", 4.0 if frame % 50 else 15.0), ("flip", 1.0)):
+            end = time.perf_counter() + ms / 1000
+            while time.perf_counter() < end:
+                pass
+            profiler.lap(name)
+        profiler.end_frame()
+
+    for name in (None, *profiler.phases):
+        print(f"{name or 'frame':7} p50/p95/p99 " + " / ".join(f"{p:.2f}" for p in profiler.percentiles(name)) + " ms")
+    print(f"trace: {profiler.export(os.path.join(PROFILE_DIR, 'demo-trace.json'))}")
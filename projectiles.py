@@ -0,0 +1,196 @@
+"""
+Array-backed bullet storage.
+
+Every bullet (player and enemy) lives in one BulletStore: NumPy arrays for
+position / velocity / owner / radius instead of one Python object each
+(it's the "bullets" archetype, see ecs.py).
+Moving, culling and collision tests are done for all bullets at once, and
+removing a bullet is an O(1) swap with the last one.
+"""
+
+import math
+import typing
+
+import numpy as np
+import pygame as pg
+
+import ecs
+import render
+
+from constants import *
+
+pg.init()
+
+# owners
+PLAYER: int = 0
+ENEMY: int = 1
+
+
+# bullet-only components (see ecs.py)
+OWNER: ecs.Component = ecs.Component("owner", (), np.int8)
+PIERCING: ecs.Component = ecs.Component("piercing", (), bool)
+
+
+class BulletStore(ecs.Archetype):
+    """Structure-of-arrays storage for every bullet in the game (an ecs.Archetype).
+
+    Positions are bullet CENTERS in world space, and `radius` is half the
+    bullet's width (bullets are square for collisions).
+
+    Attributes:
+        count (int): Number of live bullets, they're always packed in [0, count).
+        pos (np.ndarray): (capacity, 2) float positions.
+        vel (np.ndarray): (capacity, 2) float velocities in pixels per frame (at TUNED_RATE).
+        owner (np.ndarray): PLAYER or ENEMY.
+        radius (np.ndarray): Half size of each bullet.
+        piercing (np.ndarray): True for bullets that don't stop at the first enemy (charged shots).
+        images (np.ndarray): Pre-rendered stamp for each bullet (objects).
+        step (float): Frames (at TUNED_RATE) covered by the last `integrate`.
+        pairs_tested (int): Bullet-vs-rect tests done since `reset_stats`.
+    """
+
+    def __init__(self, capacity: int = 512) -> None:
+        super().__init__("bullets", (ecs.POSITION, ecs.VELOCITY, ecs.SPRITE, ecs.COLLIDER, OWNER, PIERCING), capacity)
+        self.step: float = 1.0
+        self.pairs_tested: int = 0
+
+    @property
+    def pos(self) -> np.ndarray:
+        return self.arrays["pos"]
+
+    @property
+    def vel(self) -> np.ndarray:
+        return self.arrays["vel"]
+
+    @property
+    def owner(self) -> np.ndarray:
+        return self.arrays["owner"]
+
+    @property
+    def radius(self) -> np.ndarray:
+        return self.arrays["radius"]
+
+    @property
+    def piercing(self) -> np.ndarray:
+        return self.arrays["piercing"]
+
+    @property
+    def images(self) -> np.ndarray:
+        return self.arrays["image"]
+
+    def spawn(self, x: float, y: float, vx: float, vy: float, owner: int, radius: float,
+              image: pg.Surface, piercing: bool = False) -> int:
+        """Adds a bullet centered on (x, y). Returns its (temporary!) index."""
+        return self.append(pos=(x, y), vel=(vx, vy), owner=owner, radius=radius, image=image, piercing=piercing)
+
+    def fire(self, x: float, y: float, speed: float, angle: float, owner: int, radius: float,
+             image: pg.Surface, piercing: bool = False) -> int:
+        """Same as `spawn` but with a speed and an angle in degrees, like Vector2.from_polar."""
+        angle = math.radians(angle)
+        return self.spawn(x, y, speed * math.cos(angle), speed * math.sin(angle), owner, radius, image, piercing)
+
+    def despawn(self, i: int) -> None:
+        """Removes bullet `i` in O(1) by moving the last bullet into its slot.
+
+        When removing several, go from the highest index down.
+        """
+        self.swap_remove(i)
+
+    def despawn_many(self, indices: typing.Iterable[int]) -> None:
+        for i in sorted(set(int(i) for i in indices), reverse=True):
+            self.despawn(i)
+
+    def reset_stats(self) -> None:
+        self.pairs_tested = 0
+
+    def integrate(self, step: float = 1.0) -> None:
+        """Moves every bullet by its velocity, `step` frames worth (see timestep.frames)."""
+        n = self.count
+        self.step = step
+        self.pos[:n] += self.vel[:n] * step
+
+    def cull(self, offset_x: float) -> int:
+        """Drops bullets that left the screen (camera-relative), all in one pass."""
+        n = self.count
+        screen_x = self.pos[:n, 0] + offset_x
+        y = self.pos[:n, 1]
+        on_screen = (screen_x >= SCREEN_WIDTH * -0.2) & (screen_x <= SCREEN_WIDTH * 1.2) & (y >= 0) & (y <= SCREEN_HEIGHT)
+        return self.remove_where(on_screen)
+
+    def on_screen(self, offset_x: float) -> np.ndarray:
+        """Boolean mask of bullets inside the visible screen."""
+        screen_x = self.pos[:self.count, 0] + offset_x
+        return (screen_x > 0) & (screen_x < SCREEN_WIDTH)
+
+    def overlapping(self, rect: pg.Rect, owner: int) -> np.ndarray:
+        """Indices of `owner`'s bullets whose box overlaps `rect`."""
+        n = self.count
+        self.pairs_tested += n
+        x, y, r = self.pos[:n, 0], self.pos[:n, 1], self.radius[:n]
+        hit = (self.owner[:n] == owner) \
+            & (x + r > rect.left) & (x - r < rect.right) \
+            & (y + r > rect.top) & (y - r < rect.bottom)
+        return np.flatnonzero(hit)
+
+    def sweep(self, rect: pg.Rect, owner: int) -> np.ndarray:
+        """Swept test of every `owner` bullet's move this frame against a still `rect`.
+
+        Same idea as collision.sweep (grow the target by the bullet size,
+        clip the path of the center), but as a vectorized slab test.
+
+        Returns:
+            np.ndarray: time of impact in [0, 1] per bullet, np.inf for misses.
+        """
+        n = self.count
+        self.pairs_tested += n
+        r = self.radius[:n]
+        end = self.pos[:n]
+        velocity = self.vel[:n] * self.step
+        start = end - velocity
+
+        t_enter = np.full(n, -np.inf)
+        t_exit = np.full(n, np.inf)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for axis, low, high in ((0, rect.left, rect.right), (1, rect.top, rect.bottom)):
+                lo = low - r
+                hi = high + r
+                s = start[:, axis]
+                v = velocity[:, axis]
+
+                t1 = (lo - s) / v
+                t2 = (hi - s) / v
+                moving = v != 0
+                inside = (s > lo) & (s < hi)
+
+                axis_enter = np.where(moving, np.minimum(t1, t2), np.where(inside, -np.inf, np.inf))
+                axis_exit = np.where(moving, np.maximum(t1, t2), np.where(inside, np.inf, -np.inf))
+
+                t_enter = np.maximum(t_enter, axis_enter)
+                t_exit = np.minimum(t_exit, axis_exit)
+
+        hit = (self.owner[:n] == owner) & (t_enter < t_exit) & (t_exit > 0) & (t_enter <= 1)
+        return np.where(hit, np.clip(t_enter, 0.0, 1.0), np.inf)
+
+    def rect(self, i: int) -> pg.Rect:
+        r = self.radius[i]
+        return pg.Rect(int(self.pos[i, 0] - r), int(self.pos[i, 1] - r), int(r * 2), int(r * 2))
+
+    def mask_overlap(self, i: int, sprite) -> bool:
+        """Pixel narrowphase of bullet `i` against something with `rect` and `mask`."""
+        r = self.radius[i]
+        offset = (int(self.pos[i, 0] - r) - sprite.rect.x, int(self.pos[i, 1] - r) - sprite.rect.y)
+        return sprite.mask.overlap(render.sprite_mask(self.images[i]), offset) is not None
+
+    def draw(self, batch: render.SpriteBatch, offset_x: float, alpha: float = 1.0) -> None:
+        """Queues every bullet with one extend (positions computed in one go, blits clip the rest).
+
+        `alpha` draws them between the last two ticks (see timestep.py).
+        """
+        n = self.count
+        if n == 0:
+            return
+
+        top_left = self.pos[:n] - self.vel[:n] * (self.step * (1 - alpha)) - self.radius[:n, None]
+        top_left[:, 0] += offset_x
+        batch.sequence.extend(zip(self.images[:n].tolist(), map(tuple, top_left.tolist())))
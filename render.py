@@ -0,0 +1,403 @@
+"""
+Batched drawing helpers.
+
+Instead of every enemy, bullet, particle and humanoid doing its own
+blit / draw.rect / draw.circle call, they queue (surface, position) pairs
+into a SpriteBatch, and the whole layer gets submitted with ONE
+Surface.blits call.
+
+Primitive shapes (bullets, humanoids, baiters, particles) are pre-rendered
+once into "stamp" surfaces and cached, keyed by an asset ID tuple. Sprite
+images are cached the same way, so both backends (SurfaceBackend and
+TextureBackend) look assets up by the same IDs.
+"""
+
+import random
+import typing
+
+import pygame as pg
+
+from constants import *
+from downgrade_fx import apply_downgrade_effect
+
+pg.init()
+
+# asset ID -> pre-rendered surface
+_stamps: dict[tuple, pg.Surface] = {}
+
+# pre-rendered surface -> asset ID (so the texture backend can find the texture for a queued surface)
+_asset_ids: dict[pg.Surface, tuple] = {}
+
+# asset ID -> collision mask, built once per sprite frame / facing
+_masks: dict[tuple, pg.mask.Mask] = {}
+
+BACKENDS: tuple[str, ...] = ("surface", "texture")
+
+# particles fade, so alpha is bucketed to keep the stamp cache small
+PARTICLE_ALPHA_STEP: int = 8
+
+
+class SpriteBatch(object):
+    """Collects (surface, position) pairs for one draw layer.
+
+    Call `flush` once per frame to draw everything that was queued
+    with a single `Surface.blits` call.
+    """
+
+    def __init__(self) -> None:
+        self.sequence: list[tuple[pg.Surface, tuple[float, float]]] = []
+
+    def add(self, image: pg.Surface, pos: tuple[float, float]) -> None:
+        self.sequence.append((image, pos))
+
+    def flush(self, target: pg.Surface) -> None:
+        """Draws every queued pair onto `target` and empties the batch."""
+        if self.sequence:
+            target.blits(self.sequence, doreturn=False)
+            self.sequence.clear()
+
+    def __len__(self) -> int:
+        return len(self.sequence)
+
+
+def on_screen(x: float, width: float, offset_x: float) -> bool:
+    """Camera culling test: is a world-space span [x, x + width] visible at all?"""
+    screen_x = x + offset_x
+    return -width < screen_x < SCREEN_WIDTH
+
+
+def _register(key: tuple, image: pg.Surface) -> pg.Surface:
+    _stamps[key] = image
+    _asset_ids[image] = key
+    return image
+
+
+def asset_id(image: pg.Surface) -> tuple | None:
+    """Returns the asset ID of a cached surface, or None if it was never registered here."""
+    return _asset_ids.get(image)
+
+
+def load_sprite(path: str, width: int) -> pg.Surface:
+    """Loads an image once, scaled to `width` (keeping aspect ratio), and caches it.
+
+    Every lander shares the same surface instead of loading its own copy.
+    """
+    key = ("sprite", path, int(width))
+    image = _stamps.get(key)
+    if image is None:
+        image = pg.image.load(path).convert_alpha()
+        image = pg.transform.scale(image, (width, image.get_height() / image.get_width() * width))
+        _register(key, image)
+    return image
+
+
+def flipped(image: pg.Surface) -> pg.Surface:
+    """Returns the horizontally flipped version of a cached surface (other facing), cached too."""
+    key = asset_id(image)
+    if key is None:
+        return pg.transform.flip(image, True, False)
+
+    flipped_key = ("flipped", key)
+    flipped_image = _stamps.get(flipped_key)
+    if flipped_image is None:
+        flipped_image = _register(flipped_key, pg.transform.flip(image, True, False))
+    return flipped_image
+
+
+def sprite_mask(image: pg.Surface) -> pg.mask.Mask:
+    """Returns the pixel collision mask of a cached surface, built the first time it's asked for."""
+    key = asset_id(image)
+    if key is None:
+        return pg.mask.from_surface(image)
+
+    mask = _masks.get(key)
+    if mask is None:
+        mask = pg.mask.from_surface(image)
+        _masks[key] = mask
+    return mask
+
+
+def rect_stamp(width: int, height: int, colour: tuple[int, ...]) -> pg.Surface:
+    """Returns a cached, solid rectangle surface (player bullets, humanoids, baiters, screen flashes).
+
+    An RGBA colour gives a translucent stamp.
+    """
+    key = ("rect", int(width), int(height), colour)
+    stamp = _stamps.get(key)
+    if stamp is None:
+        stamp = pg.Surface((max(1, int(width)), max(1, int(height))), pg.SRCALPHA if len(colour) == 4 else 0)
+        stamp.fill(colour)
+        _register(key, stamp)
+    return stamp
+
+
+def circle_stamp(radius: int, colour: tuple[int, int, int]) -> pg.Surface:
+    """Returns a cached filled circle. Blit it at (x - radius, y - radius) to center it."""
+    key = ("circle", int(radius), colour)
+    stamp = _stamps.get(key)
+    if stamp is None:
+        # colour-keyed (not per-pixel alpha) since that blits a lot faster
+        stamp = pg.Surface((int(radius) * 2, int(radius) * 2))
+        key_colour = BLACK if colour != BLACK else WHITE
+        stamp.fill(key_colour)
+        pg.draw.circle(stamp, colour, (int(radius), int(radius)), int(radius))
+        stamp.set_colorkey(key_colour, pg.RLEACCEL)
+        _register(key, stamp)
+    return stamp
+
+
+def particle_stamp(colour: tuple[int, int, int], radius: float, alpha: int) -> pg.Surface | None:
+    """Returns a cached translucent particle circle.
+
+    Radius is snapped to half pixels and alpha to PARTICLE_ALPHA_STEP so
+    a whole explosion only ever touches a handful of stamps.
+
+    Returns:
+        pg.Surface | None: the stamp, or None if the particle is too small to see.
+    """
+    half_pixels = int(radius * 2)
+    if half_pixels <= 0:
+        return None
+
+    alpha = alpha - alpha % PARTICLE_ALPHA_STEP
+    key = ("particle", colour, half_pixels, alpha)
+    stamp = _stamps.get(key)
+    if stamp is None:
+        snapped = half_pixels / 2
+        stamp = pg.Surface((half_pixels, half_pixels), pg.SRCALPHA)
+        pg.draw.circle(stamp, (*colour, alpha), (snapped, snapped), snapped)
+        _register(key, stamp)
+    return stamp
+
+
+def clear_stamps() -> None:
+    """Drops every cached stamp (eg. after changing display mode)."""
+    _stamps.clear()
+    _asset_ids.clear()
+    _masks.clear()
+
+
+class SurfaceBackend(object):
+    """Default backend: software blits onto Surfaces, then display.flip."""
+
+    name: str = "surface"
+
+    def submit(self, batch: SpriteBatch, target: pg.Surface, origin: tuple[int, int] = (0, TOP_WIDGET_HEIGHT)) -> None:
+        """Draws a layer onto `target` right away (`origin` is only used by TextureBackend)."""
+        batch.flush(target)
+
+    def present(self, screen: pg.Surface, pixelation: int) -> None:
+        self.post_fx(screen, pixelation)
+        self.flip()
+
+    def post_fx(self, screen: pg.Surface, pixelation: int) -> None:
+        apply_downgrade_effect(screen, pixelation)
+
+    def overlay(self, target: pg.Surface) -> pg.Surface:
+        """Where to draw what goes over the sprite layers (pop-ups, edge fog, flashes): `target` itself here."""
+        return target
+
+    def flip(self) -> None:
+        pg.display.flip()
+
+    def screenshot(self, screen: pg.Surface) -> pg.Surface:
+        """The last presented frame."""
+        return screen
+
+
+class TextureBackend(object):
+    """Draws sprite layers as GPU textures through pygame._sdl2.video.
+
+    Every queued surface is uploaded ONCE as a Texture (looked up by its
+    asset ID) and drawn with Texture.draw, which is SDL_RenderCopy under the
+    hood. Backgrounds, mountains and the HUD are still composited in
+    software and uploaded as a single streaming texture per frame.
+
+    Uses the renderer behind the SCALED display window, so SDL falls back
+    to its software renderer on machines without a GPU and menus that
+    still call display.flip keep working. A window without one gets an
+    explicit software renderer (accelerated=0) instead.
+
+    Sprite layers are drawn on top of the whole software frame, so what has
+    to stay above them (pop-ups, the edge fog, screen flashes) is drawn onto
+    a transparent `overlay` surface instead and composited after them.
+    """
+
+    name: str = "texture"
+
+    def __init__(self, pixelation: int = 2) -> None:
+        from pygame._sdl2 import sdl2, video
+
+        self._video = video
+        window = video.Window.from_display_module()
+        try:
+            self.renderer = video.Renderer.from_window(window)
+        except sdl2.error:
+            # the window has no renderer of its own (not SCALED), try SDL's software one
+            self.renderer = video.Renderer(window, accelerated=0, target_texture=True)
+        self.renderer.draw_blend_mode = 1 # SDL_BLENDMODE_BLEND, for the flicker overlay
+
+        self.frame = video.Texture(self.renderer, RESOLUTION, streaming=True)
+        self.pixelation: int = pixelation
+        self.scene = video.Texture(self.renderer, (SCREEN_WIDTH // pixelation, SCREEN_HEIGHT // pixelation), target=True)
+
+        scanlines = pg.Surface(RESOLUTION, pg.SRCALPHA)
+        for y in range(0, SCREEN_HEIGHT, 3):
+            pg.draw.line(scanlines, (0, 0, 0, 60), (0, y), (SCREEN_WIDTH, y))
+        self.scanlines = video.Texture.from_surface(self.renderer, scanlines)
+
+        # drawn over the sprite layers, same size and place as the gameplay surface
+        self.overlay_surface = pg.Surface((SCREEN_WIDTH, GAMEPLAY_HEIGHT), pg.SRCALPHA)
+        self.overlay_texture = video.Texture(self.renderer, self.overlay_surface.get_size(), streaming=True)
+        self.overlay_texture.blend_mode = 1 # SDL_BLENDMODE_BLEND
+        self._overlay_used: bool = False
+
+        self.textures: dict[tuple, typing.Any] = {}
+        # surfaces without an asset ID are only kept for the frame they're drawn in, nothing
+        # would ever evict them otherwise (they're usually one-offs, new every frame)
+        self._loose_textures: dict[pg.Surface, typing.Any] = {}
+        self.pending: list[tuple[list[tuple[pg.Surface, tuple[float, float]]], tuple[int, int]]] = []
+
+    def texture(self, image: pg.Surface):
+        """Returns the texture for `image`, uploading it the first time it's seen."""
+        key = asset_id(image)
+        cache = self.textures if key is not None else self._loose_textures
+        if key is None:
+            key = image
+
+        texture = cache.get(key)
+        if texture is None:
+            texture = self._video.Texture.from_surface(self.renderer, image)
+            cache[key] = texture
+        return texture
+
+    def submit(self, batch: SpriteBatch, target: pg.Surface, origin: tuple[int, int] = (0, TOP_WIDGET_HEIGHT)) -> None:
+        """Queues a layer to be copied after the software frame. `target` is ignored."""
+        if batch.sequence:
+            self.pending.append((batch.sequence[:], origin))
+            batch.sequence.clear()
+
+    def overlay(self, target: pg.Surface) -> pg.Surface:
+        """Where to draw what goes over the sprite layers (pop-ups, edge fog, flashes): the overlay surface.
+
+        It's cleared the first time it's asked for in a frame.
+        """
+        if not self._overlay_used:
+            self.overlay_surface.fill((0, 0, 0, 0))
+            self._overlay_used = True
+        return self.overlay_surface
+
+    def present(self, screen: pg.Surface, pixelation: int) -> None:
+        self.post_fx(screen, pixelation)
+        self.flip()
+
+    def post_fx(self, screen: pg.Surface, pixelation: int) -> None:
+        """Composites the frame: software layer, queued sprites, overlay, pixelation and scanlines (split from flip for profiling)."""
+        renderer = self.renderer
+
+        self.frame.update(screen)
+
+        # everything goes into a low-res target first, that's the pixelation
+        renderer.target = self.scene
+        renderer.scale = (1 / self.pixelation, 1 / self.pixelation)
+        renderer.clear()
+        self.frame.draw()
+
+        for sequence, (origin_x, origin_y) in self.pending:
+            for image, (x, y) in sequence:
+                self.texture(image).draw(dstrect=(x + origin_x, y + origin_y))
+        self.pending.clear()
+        self._loose_textures.clear()
+
+        if self._overlay_used:
+            self.overlay_texture.update(self.overlay_surface)
+            self.overlay_texture.draw(dstrect=(0, TOP_WIDGET_HEIGHT))
+            self._overlay_used = False
+
+        renderer.target = None
+        renderer.scale = (1, 1)
+        renderer.clear()
+        self.scene.draw(dstrect=(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.scanlines.draw()
+
+        # flicker
+        if random.randint(0, 25) == 0:
+            renderer.draw_color = (255, 255, 255, 2)
+            renderer.fill_rect((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    def flip(self) -> None:
+        self.renderer.present()
+
+    def screenshot(self, screen: pg.Surface) -> pg.Surface:
+        """The last presented frame (read back from the renderer, slow)."""
+        return self.renderer.to_surface()
+
+
+def create_backend(name: str = "surface") -> SurfaceBackend | TextureBackend:
+    """Creates the backend chosen at startup.
+
+    Falls back to SurfaceBackend if pygame._sdl2 is missing or no renderer,
+    not even SDL's software one, could be created for the window.
+    """
+    if name == "texture":
+        try:
+            return TextureBackend()
+        # pygame._sdl2.sdl2.error is a RuntimeError, not a pg.error
+        except (ImportError, pg.error, RuntimeError) as e:
+            print(f"texture renderer unavailable ({e}), using surface renderer")
+    return SurfaceBackend()
+
+
+if __name__ == "__main__":
+
+    # --------------- BENCHMARK: 500 BULLETS ---------------
+    # old path: one pg.Rect + one draw.rect per bullet
+    # new path: one pre-rendered stamp, one blits call for the lot
+
+    import time
+
+    NUM_BULLETS: int = 500
+    FRAMES: int = 300
+
+    surface = pg.Surface((SCREEN_WIDTH, GAMEPLAY_HEIGHT))
+    positions = [(random.uniform(0, SCREEN_WIDTH), random.uniform(0, GAMEPLAY_HEIGHT)) for _ in range(NUM_BULLETS)]
+
+    def per_call() -> None:
+        for x, y in positions:
+            pg.draw.rect(surface, WHITE, pg.Rect(x, y, 10, 10))
+
+    def batched(batch: SpriteBatch) -> None:
+        stamp = rect_stamp(10, 10, WHITE)
+        for pos in positions:
+            batch.add(stamp, pos)
+        batch.flush(surface)
+
+    def enemy_per_call() -> None:
+        for x, y in positions:
+            pg.draw.circle(surface, WHITE, (x, y), 5)
+
+    def enemy_batched(batch: SpriteBatch) -> None:
+        stamp = circle_stamp(5, WHITE)
+        for x, y in positions:
+            batch.add(stamp, (x - 5, y - 5))
+        batch.flush(surface)
+
+    def bench(name: str, fn, *args) -> float:
+        elapsed = 0.0
+        for _ in range(FRAMES):
+            surface.fill(BLACK)
+            start = time.perf_counter()
+            fn(*args)
+            elapsed += time.perf_counter() - start
+        per_frame_ms = elapsed * 1000 / FRAMES
+        print(f"{name:<28}{per_frame_ms:8.3f} ms/frame {per_frame_ms * 1000 / NUM_BULLETS:8.3f} us/bullet")
+        return per_frame_ms
+
+    batch = SpriteBatch()
+    print(f"{NUM_BULLETS} bullets, {FRAMES} frames")
+    old = bench("player bullets (draw.rect)", per_call)
+    new = bench("player bullets (blits)", batched, batch)
+    print(f"  -> {old / new:.2f}x")
+    old = bench("enemy bullets (draw.circle)", enemy_per_call)
+    new = bench("enemy bullets (blits)", enemy_batched, batch)
+    print(f"  -> {old / new:.2f}x")
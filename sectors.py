@@ -0,0 +1,117 @@
+"""
+World sectors.
+
+The world is cut into SECTOR_WIDTH wide sectors, and how often something
+gets simulated depends on how far its sector is from the camera's:
+
+    ACTIVE  - every tick (the screen and a bit either side)
+    COARSE  - every COARSE_INTERVAL ticks, one step covering all the time it missed
+    DORMANT - not at all, the time it slept is made up (capped) when it wakes
+
+Things that can reach the player (baiters, landers in chase range, anything
+mid-capture) get promoted to ACTIVE by whoever schedules them, see `schedule`.
+Sleeping things keep their last simulated position, which is what the
+minimap shows, close enough at that scale.
+"""
+
+import math
+
+import numpy as np
+
+from constants import *
+
+# levels, lower = more simulation
+ACTIVE: int = 0
+COARSE: int = 1
+DORMANT: int = 2
+
+
+class SectorMap(object):
+    """Simulation level of every sector, relative to the camera.
+
+    Attributes:
+        count (int): Number of sectors across the world.
+        levels (np.ndarray): ACTIVE / COARSE / DORMANT per sector.
+        tick (int): Ticks since the start, staggers coarse steps.
+        stepped (int): Things stepped during the last tick (metric).
+        skipped (int): Things left asleep / waiting for a coarse step during the last tick (metric).
+    """
+
+    def __init__(self, world_width: int = WORLD_WIDTH, sector_width: int = SECTOR_WIDTH,
+                 active_sectors: int = ACTIVE_SECTORS, coarse_sectors: int = COARSE_SECTORS,
+                 coarse_interval: int = COARSE_INTERVAL, catch_up: float = SECTOR_CATCH_UP) -> None:
+        self.world_width: int = world_width
+        self.sector_width: int = sector_width
+        self.active_sectors: int = active_sectors
+        self.coarse_sectors: int = coarse_sectors
+        self.coarse_interval: int = coarse_interval
+        self.catch_up: float = catch_up
+
+        self.count: int = math.ceil(world_width / sector_width)
+        self.levels: np.ndarray = np.full(self.count, ACTIVE, dtype=np.int8)
+        self.tick: int = 0
+        self.stepped: int = 0
+        self.skipped: int = 0
+
+    def sector_of(self, x: float | np.ndarray) -> np.ndarray:
+        """Sector index of world x position(s), clamped to the world."""
+        index = np.floor_divide(np.asarray(x, dtype=np.float64) + self.world_width / 2, self.sector_width)
+        return np.clip(index, 0, self.count - 1).astype(np.intp)
+
+    def update(self, camera_x: float) -> None:
+        """Re-levels every sector around the camera. Once per tick, before anything gets scheduled."""
+        self.tick += 1
+        self.stepped = 0
+        self.skipped = 0
+
+        distance = np.abs(np.arange(self.count) - self.sector_of(camera_x))
+        self.levels = np.where(distance <= self.active_sectors, ACTIVE,
+                               np.where(distance <= self.coarse_sectors, COARSE, DORMANT)).astype(np.int8)
+
+    def level_of(self, x: np.ndarray) -> np.ndarray:
+        return self.levels[self.sector_of(x)]
+
+    def schedule(self, x: np.ndarray, asleep: np.ndarray, dt: float,
+                 at_most: int | np.ndarray = DORMANT) -> tuple[np.ndarray, np.ndarray]:
+        """Picks which of a batch of things step this tick, and by how much.
+
+        Arguments:
+            x (np.ndarray): World x of each thing.
+            asleep (np.ndarray): Seconds since each thing last stepped, updated in place.
+            dt (float): Length of this tick.
+            at_most (int | np.ndarray): Lowest level each thing may drop to (ACTIVE = always simulated).
+
+        Returns:
+            rows (np.ndarray): Indices of the things to step.
+            dts (np.ndarray): How long each of them steps for (dt, or the time they missed, capped).
+        """
+        n = len(x)
+        level = np.minimum(self.level_of(x), at_most)
+
+        # coarse steps are staggered by index so they don't all land on the same tick
+        stepping = (level == ACTIVE) | ((level == COARSE) & ((self.tick + np.arange(n)) % self.coarse_interval == 0))
+
+        asleep += dt
+        rows = np.flatnonzero(stepping)
+        dts = np.minimum(asleep[rows], self.catch_up)
+        asleep[rows] = 0.0
+
+        self.stepped += len(rows)
+        self.skipped += n - len(rows)
+        return rows, dts
+
+
+if __name__ == "__main__":
+    # how many of a world full of things get stepped per tick, camera in the middle
+    sectors = SectorMap()
+    sectors.update(0.0)
+    print("levels:", sectors.levels.tolist())
+
+    x = np.random.default_rng(1).uniform(-WORLD_WIDTH / 2, WORLD_WIDTH / 2, 1000)
+    asleep = np.zeros(len(x))
+    steps = 0
+    for _ in range(COARSE_INTERVAL * 10):
+        sectors.update(0.0)
+        rows, dts = sectors.schedule(x, asleep, 1 / SIMULATION_RATE)
+        steps += len(rows)
+    print(f"{steps / (COARSE_INTERVAL * 10):.0f} of {len(x)} stepped per tick")
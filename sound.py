@@ -10,6 +10,8 @@ Sound channels:
 """
 
 import os
+import random
+
 import pygame as pg
 
 # ---------------------------- SOUND CONSTANTS ----------------------------
@@ -35,10 +37,22 @@ ENEMY_EXPLOSION3 = pg.mixer.Sound(os.path.join("sound_fx", "enemy", "explosion3.
 ENEMY_EXPLOSION4 = pg.mixer.Sound(os.path.join("sound_fx", "enemy", "explosion4.wav"))
 ENEMY_EXPLOSION5 = pg.mixer.Sound(os.path.join("sound_fx", "enemy", "explosion5.wav"))
 
-for sound in [ENEMY_EXPLOSION1, ENEMY_EXPLOSION2, ENEMY_EXPLOSION3, ENEMY_EXPLOSION4, ENEMY_EXPLOSION5]:
+ENEMY_EXPLOSIONS: list[pg.mixer.Sound] = [ENEMY_EXPLOSION1, ENEMY_EXPLOSION2, ENEMY_EXPLOSION3, ENEMY_EXPLOSION4, ENEMY_EXPLOSION5]
+
+for sound in ENEMY_EXPLOSIONS:
     sound.set_volume(0.38)
 
 
+def play_explosions(layers: int) -> None:
+    """Up to `layers` different explosion sounds at once, on the free enemy explosion channels (1-5).
+
+    One layered boom for a mass kill instead of a sound per enemy.
+    """
+    free = [i for i in range(1, 6) if not pg.mixer.Channel(i).get_busy()]
+    for channel, explosion in zip(free, random.sample(ENEMY_EXPLOSIONS, min(layers, len(ENEMY_EXPLOSIONS)))):
+        pg.mixer.Channel(channel).play(explosion, maxtime=1800)
+
+
 
 
 # ITEM SPECIFIC
@@ -0,0 +1,262 @@
+"""
+Spawn placement.
+
+Instead of rolling random spots until one happens to be far enough from
+the player (unbounded, and clumpy), spawn points are dealt from a
+precomputed Poisson-disk set: no two points are closer than `spacing`, so
+they're spread evenly over the world (blue noise), and dealing one is O(1)
+on average.
+
+Everything is seeded, so the same seed and wave always give the same spawns.
+
+Building the wave is spread over frames too (SpawnScheduler), a few
+entities per frame under a time budget, so a wave start doesn't hitch.
+"""
+
+import collections
+import functools
+import math
+import time
+import typing
+
+import numpy as np
+import pygame as pg
+
+from constants import *
+
+pg.init()
+
+# where enemies / humanoids may spawn (world space), EDGE_SPAWN_BUFFER in from both ends
+ENEMY_AREA: pg.Rect = pg.Rect(-(WORLD_WIDTH // 2) + EDGE_SPAWN_BUFFER, TOP_WIDGET_HEIGHT,
+                              WORLD_WIDTH - 2 * EDGE_SPAWN_BUFFER, GAMEPLAY_HEIGHT - TOP_WIDGET_HEIGHT)
+GROUND_AREA: pg.Rect = pg.Rect(-(WORLD_WIDTH // 2) + EDGE_SPAWN_BUFFER, GROUND_Y,
+                               WORLD_WIDTH - 2 * EDGE_SPAWN_BUFFER, 0)
+
+# minimum distance between two spawn points
+ENEMY_SPACING: int = 80
+HUMANOID_SPACING: int = 60
+
+POINT_SET_SEED: int = 0
+
+
+def poisson_disk(area: pg.Rect, spacing: float, rng: np.random.Generator, attempts: int = 30) -> np.ndarray:
+    """Points filling `area` with none closer than `spacing` (Bridson's algorithm).
+
+    A flat area (height 0) gets a 1-D set along its top edge instead.
+
+    Arguments:
+        area (pg.Rect): Where points go (world space).
+        spacing (float): Minimum distance between points.
+        rng (np.random.Generator): Seeded generator, same seed = same points.
+        attempts (int): Candidates tried around each point before giving up on it.
+
+    Returns:
+        np.ndarray: (n, 2) points.
+    """
+    if area.height == 0:
+        # 1-D: every gap is spacing plus a random bit
+        gaps = spacing + rng.uniform(0, spacing, math.ceil(area.width / spacing) + 1)
+        xs = area.left + rng.uniform(0, spacing) + np.concatenate(([0.0], np.cumsum(gaps)))
+        xs = xs[xs <= area.right]
+        return np.stack((xs, np.full(len(xs), float(area.top))), axis=1)
+
+    # background grid with cells small enough to hold one point each
+    cell = spacing / math.sqrt(2)
+    cols, rows = math.ceil(area.width / cell), math.ceil(area.height / cell)
+    grid = np.full((rows, cols), -1, dtype=np.intp)
+
+    def cell_of(x: float, y: float) -> tuple[int, int]:
+        return int((y - area.top) / cell), int((x - area.left) / cell)
+
+    first = (area.left + rng.uniform(0, area.width), area.top + rng.uniform(0, area.height))
+    points: list[tuple[float, float]] = [first]
+    grid[cell_of(*first)] = 0
+    active: list[int] = [0]
+
+    while active:
+        slot = int(rng.integers(len(active)))
+        px, py = points[active[slot]]
+
+        # all of this point's candidates at once, in the ring [spacing, 2 * spacing) around it
+        angles = rng.uniform(0, 2 * math.pi, attempts)
+        radii = rng.uniform(spacing, 2 * spacing, attempts)
+        candidates = zip((px + radii * np.cos(angles)).tolist(), (py + radii * np.sin(angles)).tolist())
+
+        for x, y in candidates:
+            if not (area.left <= x < area.right and area.top <= y < area.bottom):
+                continue
+            row, col = cell_of(x, y)
+            neighbours = grid[max(0, row - 2):row + 3, max(0, col - 2):col + 3]
+            if any((points[i][0] - x) ** 2 + (points[i][1] - y) ** 2 < spacing ** 2 for i in neighbours[neighbours >= 0].tolist()):
+                continue
+
+            grid[row, col] = len(points)
+            active.append(len(points))
+            points.append((x, y))
+            break
+        else:
+            # crowded all round, this one's done
+            active[slot] = active[-1]
+            active.pop()
+
+    return np.array(points)
+
+
+@functools.lru_cache(maxsize=None)
+def _point_set(area: tuple[int, int, int, int], spacing: float) -> np.ndarray:
+    # same area + spacing = same points for the whole run, only the dealing order changes
+    return poisson_disk(pg.Rect(area), spacing, np.random.default_rng(POINT_SET_SEED))
+
+
+class SpawnSampler(object):
+    """Deals out spawn points from a Poisson-disk set, away from the player.
+
+    The set is built once per run (a couple hundred ms for the enemy area,
+    while the menu loads). Each wave (`reset`) deals it in a new seeded
+    order, so points only start repeating once all of them were used.
+
+    Attributes:
+        points (np.ndarray): (n, 2) the whole point set.
+        order (np.ndarray): Dealing order (indices into points).
+        cursor (int): Next position in `order`.
+    """
+
+    def __init__(self, area: pg.Rect, spacing: float, seed: int | None = None) -> None:
+        self.points: np.ndarray = _point_set(tuple(area), spacing)
+        self.order: np.ndarray = np.arange(len(self.points))
+        self.cursor: int = 0
+        self.reset(seed)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def reset(self, seed: int | typing.Sequence[int] | None = None) -> None:
+        """Starts dealing again in a new order (seeded, e.g. with (game seed, wave))."""
+        self.order = np.random.default_rng(seed).permutation(len(self.points))
+        self.cursor = 0
+
+    def take(self, avoid: pg.Vector2, distance: float) -> tuple[int, int]:
+        """Next point further than `distance` from `avoid` on x or y (the old spawn loops' test).
+
+        Points too close to the player are passed over for this round. If
+        the player somehow covers every point, the last one tried is used.
+        """
+        for _ in range(len(self.points)):
+            x, y = self.points[self.order[self.cursor]].tolist()
+            self.cursor = (self.cursor + 1) % len(self.points)
+            if abs(x - avoid.x) > distance or abs(y - avoid.y) > distance:
+                break
+        return int(x), int(y)
+
+
+class SpawnScheduler(object):
+    """Queue of spawns, built a few per frame within a time budget.
+
+    Each job is a `build` (constructs the entity, at the point picked when it
+    was queued) and a `place` (adds it to its groups). `on_spawn` is the
+    warp-in hook, called with every entity once it's placed.
+
+    At least one job runs per frame, so the queue always drains even if a
+    single build is over budget.
+
+    Attributes:
+        budget (float): Seconds of building allowed per frame.
+        queue (collections.deque): (build, place) jobs waiting.
+        cost (float): Running average seconds per job, for `eta`.
+        frames (int): Frames spent on the current batch (0 = idle).
+        built (int): Jobs done in the current batch.
+    """
+
+    def __init__(self, budget_ms: float = SPAWN_BUDGET_MS,
+                 on_spawn: typing.Callable[[typing.Any], None] | None = None) -> None:
+        self.budget: float = budget_ms / 1000
+        self.on_spawn: typing.Callable[[typing.Any], None] | None = on_spawn
+        self.queue: collections.deque[tuple[typing.Callable[[], typing.Any], typing.Callable[[typing.Any], None]]] = collections.deque()
+        self.cost: float = 0.0001
+        self.frames: int = 0
+        self.built: int = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __bool__(self) -> bool:
+        # still spawning = the wave isn't over yet, even with nothing alive
+        return bool(self.queue)
+
+    def push(self, build: typing.Callable[[], typing.Any], place: typing.Callable[[typing.Any], None]) -> None:
+        if not self.queue:
+            self.frames = 0
+            self.built = 0
+        self.queue.append((build, place))
+
+    def clear(self) -> None:
+        self.queue.clear()
+
+    def run(self) -> int:
+        """Builds and places queued spawns until this frame's budget is spent. Once per frame.
+
+        Returns:
+            int: Number of entities spawned.
+        """
+        if not self.queue:
+            return 0
+
+        self.frames += 1
+        start = time.perf_counter()
+        done = 0
+        while self.queue:
+            job_start = time.perf_counter()
+            build, place = self.queue.popleft()
+            entity = build()
+            place(entity)
+            if self.on_spawn is not None:
+                self.on_spawn(entity)
+            done += 1
+
+            now = time.perf_counter()
+            self.cost += (now - job_start - self.cost) * 0.2
+            # stop if the next one (on average) wouldn't fit either
+            if now - start + self.cost > self.budget:
+                break
+
+        self.built += done
+        return done
+
+    def eta(self, frame_time: float) -> float:
+        """Seconds until the queue is drained, at the average build cost and `frame_time` per frame."""
+        if not self.queue:
+            return 0.0
+        per_frame = max(1, int(self.budget / self.cost))
+        return math.ceil(len(self.queue) / per_frame) * frame_time
+
+
+if __name__ == "__main__":
+    # build time, point counts and the closest pair for the game's samplers
+    for name, area, spacing in (("enemies", ENEMY_AREA, ENEMY_SPACING), ("humanoids", GROUND_AREA, HUMANOID_SPACING)):
+        start = time.perf_counter()
+        sampler = SpawnSampler(area, spacing, seed=1)
+        built = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            sampler.take(pg.Vector2(0, SCREEN_HEIGHT // 4), SCREEN_WIDTH // 2)
+        dealt = (time.perf_counter() - start) / 1000
+
+        points = sampler.points
+        closest = min(np.hypot(*(points[i + 1:] - points[i]).T).min() for i in range(len(points) - 1))
+        print(f"{name:9}: {len(sampler)} points in {built * 1000:.1f} ms, {dealt * 1e6:.1f} us/take, closest pair {closest:.1f} px")
+
+    # draining a queue of ~0.3 ms jobs under the default budget
+    def slow_build() -> None:
+        end = time.perf_counter() + 0.0003
+        while time.perf_counter() < end:
+            pass
+
+    scheduler = SpawnScheduler()
+    for _ in range(50):
+        scheduler.push(slow_build, lambda entity: None)
+    scheduler.run()
+    print(f"scheduler: eta {scheduler.eta(1 / FRAMES_PER_SECOND) * 1000:.0f} ms after the first frame")
+    while scheduler:
+        scheduler.run()
+    print(f"scheduler: {scheduler.built} spawns over {scheduler.frames} frames, {SPAWN_BUDGET_MS} ms budget each")
@@ -0,0 +1,371 @@
+"""
+Batched enemy steering.
+
+Instead of every lander / mutant / baiter doing its own Vector2 maths
+(normalize, atan2, cos, sin, a random roll...) each tick, EnemyGroup hands
+over everyone of one type and they're all steered in one vectorized step.
+
+The kernels (`*_kernel`) only work on arrays. A Flock keeps the arrays
+for one enemy type between ticks, and the `steer_*` functions run a
+kernel over a whole flock. Behaviour is the same as the old per-entity update methods.
+"""
+
+import typing
+
+import numpy as np
+
+import ecs
+import sectors
+import timestep
+
+from constants import *
+
+rng: np.random.Generator = np.random.default_rng()
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    """Unit vectors, zero vectors stay zero (like `v.normalize() if v else Vector2(0, 0)`)."""
+    length = np.hypot(vectors[:, 0], vectors[:, 1])
+    return vectors / np.where(length > 0, length, 1.0)[:, None]
+
+
+def _approach(vel: np.ndarray, desired: np.ndarray, acceleration: np.ndarray, max_speed: np.ndarray, dt: np.ndarray) -> None:
+    """velocity += (desired - velocity) * acceleration, then clamp to max speed. In place."""
+    vel += (desired - vel) * timestep.smoothing(acceleration, dt)[:, None]
+
+    speed = np.hypot(vel[:, 0], vel[:, 1])
+    too_fast = speed > max_speed
+    vel[too_fast] *= (max_speed[too_fast] / speed[too_fast])[:, None]
+
+
+def lander_kernel(pos: np.ndarray, vel: np.ndarray, target: np.ndarray, capturing: np.ndarray, deciding: np.ndarray,
+                  chase: np.ndarray, wander_angle: np.ndarray, wander_timer: np.ndarray, speed: np.ndarray,
+                  acceleration: np.ndarray, max_speed: np.ndarray, chase_distance: np.ndarray,
+                  chase_probability: np.ndarray, height: np.ndarray, dt: float | np.ndarray) -> None:
+    """Steers every lander at once (all arrays updated in place).
+
+    Attacking landers chase `target` (the player) when close and a coin flip
+    says so, otherwise they wander. Capturing landers fly straight at
+    `target` (their humanoid).
+
+    Only `deciding` landers (see ai.TimeSlicer) re-flip the chase coin or
+    re-roll their wander angle, the rest keep their last decision (`chase`).
+
+    `dt` can be one tick for everyone or a step per lander (see sectors.py),
+    same for the other kernels.
+    """
+    dt = np.broadcast_to(dt, len(pos))
+    to_target = target - pos
+    distance = np.hypot(to_target[:, 0], to_target[:, 1])
+    in_range = distance < chase_distance
+
+    attacking = ~capturing
+    flipping = deciding & attacking
+    chase[flipping] = rng.random(np.count_nonzero(flipping)) < chase_probability[flipping]
+
+    chasing = attacking & in_range & (chase > 0)
+    wandering = attacking & ~chasing
+
+    # wander angle re-roll every 30 frames (degrees of jitter when chasing, a whole new heading otherwise)
+    wander_timer[attacking] += timestep.frames(dt[attacking])
+    reroll = flipping & (wander_timer > 30)
+    wander_angle[reroll & chasing] = rng.uniform(-10, 10, np.count_nonzero(reroll & chasing))
+    wander_angle[reroll & wandering] = rng.uniform(0, 2 * np.pi, np.count_nonzero(reroll & wandering))
+    wander_timer[reroll] = 0
+
+    # chasers bounce off the top / bottom of the screen
+    above = chasing & (pos[:, 1] < 0)
+    pos[above, 1] = 0
+    vel[above, 1] = np.abs(vel[above, 1])
+    below = chasing & (pos[:, 1] > GAMEPLAY_HEIGHT - height)
+    pos[below, 1] = (GAMEPLAY_HEIGHT - height)[below]
+    vel[below, 1] = -np.abs(vel[below, 1])
+
+    # heading: towards the target (+ wander jitter when chasing) or the wander angle
+    direction = _normalized(to_target)
+    heading = np.arctan2(direction[:, 1], direction[:, 0])
+    heading = np.where(chasing, heading + np.radians(wander_angle), heading)
+    heading = np.where(wandering, wander_angle, heading)
+
+    desired = np.stack((np.cos(heading), np.sin(heading)), axis=1) * speed[:, None]
+    _approach(vel, desired, acceleration, max_speed, dt)
+    pos += vel * timestep.frames(dt)[:, None]
+
+    pos[:, 1] = np.clip(pos[:, 1], 0, GROUND_Y + 50 - height) # + 50 so landers can still reach humanoids
+
+
+def mutant_kernel(pos: np.ndarray, vel: np.ndarray, target: np.ndarray, oscillator: np.ndarray,
+                  zigzag_freq: np.ndarray, zigzag_amp: np.ndarray, speed: np.ndarray,
+                  acceleration: np.ndarray, max_speed: np.ndarray, shoot_chance: np.ndarray,
+                  height: np.ndarray, dt: float | np.ndarray) -> np.ndarray:
+    """Zig-zags every mutant towards `target` at once (arrays updated in place).
+
+    Returns:
+        np.ndarray: Boolean mask of mutants that want to shoot this tick.
+    """
+    dt = np.broadcast_to(dt, len(pos))
+    base_dir = _normalized(target - pos)
+
+    # zig-zag: wobble sideways (perpendicular to the chase direction) on a sine
+    oscillator += dt * zigzag_freq * 2 * np.pi
+    perp = np.stack((-base_dir[:, 1], base_dir[:, 0]), axis=1)
+    zigzag_dir = _normalized(base_dir + perp * (np.sin(oscillator) * zigzag_amp)[:, None])
+
+    _approach(vel, zigzag_dir * speed[:, None], acceleration, max_speed, dt)
+    pos += vel * dt[:, None] # mutants are tuned in px/second
+
+    pos[:, 1] = np.clip(pos[:, 1], 0, GAMEPLAY_HEIGHT - height)
+
+    return rng.random(len(pos)) < shoot_chance * dt
+
+
+def baiter_kernel(pos: np.ndarray, vel: np.ndarray, target: np.ndarray, speed: np.ndarray,
+                  acceleration: np.ndarray, max_speed: np.ndarray, height: np.ndarray, dt: float | np.ndarray) -> None:
+    """Pursues `target` with a bit of random jitter, for every baiter at once (in place)."""
+    dt = np.broadcast_to(dt, len(pos))
+    direction = _normalized(target - pos)
+
+    # randomize pod's direction slightly
+    angle_offset = rng.uniform(-0.15, 0.15, len(pos)) # radians
+    cos_theta, sin_theta = np.cos(angle_offset), np.sin(angle_offset)
+    direction = np.stack((direction[:, 0] * cos_theta - direction[:, 1] * sin_theta,
+                          direction[:, 0] * sin_theta + direction[:, 1] * cos_theta), axis=1)
+
+    _approach(vel, direction * speed[:, None], acceleration, max_speed, dt)
+    pos += vel * timestep.frames(dt)[:, None]
+
+    pos[:, 1] = np.clip(pos[:, 1], 0, GAMEPLAY_HEIGHT - height) # clamp vertically
+
+
+class Flock(ecs.Archetype):
+    """Steering state of every enemy of one type, kept in arrays between ticks (an ecs.Archetype).
+
+    Velocity and the per-type AI state (wander, zig-zag, tuning numbers)
+    only live here while a sprite is a member. Positions live here too, and
+    get written to the sprites (everything else reads `pos`) only for the
+    members that moved, so sleeping ones cost nothing. Only steering moves
+    enemies, if anything else does, call `sync`. Leaving the flock copies
+    it all back to the sprite.
+
+    Attributes:
+        fields (tuple[str, ...]): Per-enemy float columns (AI state), copied from the sprite's attributes when it joins.
+        members (list): Row i of every array belongs to members[i] (members know their row as `flock_row`).
+        pos (np.ndarray): (capacity, 2) positions, same as the members' `pos`.
+        vel (np.ndarray): (capacity, 2) velocities.
+        asleep (np.ndarray): Seconds since each member was last stepped (see sectors.py).
+        columns (dict[str, np.ndarray]): One array per field.
+    """
+
+    def __init__(self, name: str, fields: tuple[str, ...], capacity: int = 64) -> None:
+        super().__init__(name, (ecs.POSITION, ecs.VELOCITY, ecs.SLEEP, *ecs.ai_state(*fields)), capacity)
+        self.fields: tuple[str, ...] = fields
+
+    @property
+    def members(self) -> list:
+        return self.entities
+
+    @property
+    def pos(self) -> np.ndarray:
+        return self.arrays["pos"]
+
+    @property
+    def vel(self) -> np.ndarray:
+        return self.arrays["vel"]
+
+    @property
+    def asleep(self) -> np.ndarray:
+        return self.arrays["asleep"]
+
+    @property
+    def columns(self) -> dict[str, np.ndarray]:
+        return {name: self.arrays[name] for name in self.fields}
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """Live rows of one column (a view, writes go straight into the flock)."""
+        return self.column(field)
+
+    def velocities(self) -> np.ndarray:
+        return self.column("vel")
+
+    def add(self, sprite) -> None:
+        sprite.flock_row = self.append(sprite, pos=(sprite.pos.x, sprite.pos.y), vel=(sprite.velocity.x, sprite.velocity.y),
+                                       asleep=0.0, **{name: getattr(sprite, name) for name in self.fields})
+
+    def remove(self, sprite) -> None:
+        """Copies the sprite's state back onto it, then fills its row with the last member (O(1))."""
+        row = sprite.flock_row
+        sprite.velocity.update(*self.vel[row])
+        for name in self.fields:
+            setattr(sprite, name, float(self.arrays[name][row]))
+
+        moved = self.swap_remove(row)
+        if moved is not None:
+            moved.flock_row = row
+        sprite.flock_row = None
+
+    def positions(self) -> np.ndarray:
+        """Live rows of `pos` (a view, see `write_positions`)."""
+        return self.pos[:len(self.members)]
+
+    def sync(self, sprite) -> None:
+        """Picks up a member's `pos` after it was moved by hand (time it slept through doesn't count)."""
+        self.pos[sprite.flock_row] = (sprite.pos.x, sprite.pos.y)
+        self.asleep[sprite.flock_row] = 0.0
+
+    def write_positions(self, rows: np.ndarray | None = None) -> None:
+        """Copies positions (and rects) of the members that moved onto the sprites.
+
+        `prev_pos` goes along (see timestep.py), members left out didn't move
+        this tick (asleep, see sectors.py) and keep theirs.
+        """
+        members = self.members
+        pos = self.positions()
+        if rows is not None and len(rows) < len(members):
+            members = [members[i] for i in rows.tolist()]
+            pos = pos[rows]
+
+        for sprite, (x, y) in zip(members, pos.tolist()):
+            sprite.prev_pos.update(sprite.pos)
+            sprite.pos.update(x, y)
+            sprite.rect.topleft = (int(x), int(y))
+
+    def step(self, kernel: typing.Callable, fields: tuple[str, ...], rows: np.ndarray, pos: np.ndarray,
+             *per_row: np.ndarray, dt: float | np.ndarray):
+        """Runs `kernel(pos, vel, *per_row, *fields, dt)` on `rows` of the flock only.
+
+        With every row it runs straight on the flock's arrays, otherwise the
+        rows are gathered, stepped, and scattered back into `pos` and the flock.
+
+        Returns:
+            Whatever the kernel returns (per stepped row).
+        """
+        columns = [self[name] for name in fields]
+        vel = self.velocities()
+        if len(rows) == len(self.members):
+            return kernel(pos, vel, *per_row, *columns, dt)
+
+        sub_pos, sub_vel, sub_columns = pos[rows], vel[rows], [column[rows] for column in columns]
+        result = kernel(sub_pos, sub_vel, *(array[rows] for array in per_row), *sub_columns, dt)
+
+        pos[rows] = sub_pos
+        vel[rows] = sub_vel
+        for column, sub_column in zip(columns, sub_columns):
+            column[rows] = sub_column
+        return result
+
+    def schedule(self, pos: np.ndarray, dt: float, sector_map: sectors.SectorMap | None,
+                 at_most: int | np.ndarray = sectors.DORMANT) -> tuple[np.ndarray, float | np.ndarray]:
+        """Rows to step this tick and their step lengths (everyone, by `dt`, without a sector map)."""
+        n = len(self.members)
+        if sector_map is None:
+            return np.arange(n), dt
+        return sector_map.schedule(pos[:, 0], self.asleep[:n], dt, at_most)
+
+
+LANDER_FIELDS: tuple[str, ...] = ("chase", "wander_angle", "wander_timer", "speed", "acceleration", "max_speed",
+                                  "chase_distance", "chase_probability", "height")
+MUTANT_FIELDS: tuple[str, ...] = ("_oscillator", "_zigzag_freq", "_zigzag_amp", "speed", "acceleration",
+                                  "max_speed", "_shoot_chance_per_second", "height")
+BAITER_FIELDS: tuple[str, ...] = ("speed", "acceleration", "max_speed", "height")
+
+
+def steer_landers(flock: Flock, player_pos, capturing: typing.Iterable, dt: float, deciding: np.ndarray | None = None,
+                  sector_map: sectors.SectorMap | None = None) -> None:
+    """Landers (classes.Enemy): one `lander_kernel` step for the flock.
+
+    Arguments:
+        capturing (Iterable): Members currently going for a humanoid (they steer to their `target`).
+        deciding (np.ndarray | None): Rows allowed to make decisions this tick (ai.TimeSlicer.due), None = all of them.
+        sector_map (sectors.SectorMap | None): Lets far away landers sleep, None = everyone steps.
+    """
+    n = len(flock)
+    if not n:
+        return
+
+    pos = flock.positions()
+    target = np.empty((n, 2), dtype=np.float64)
+    target[:] = (player_pos.x, player_pos.y)
+    capturing_mask = np.zeros(n, dtype=bool)
+    for lander in capturing:
+        capturing_mask[lander.flock_row] = True
+        target[lander.flock_row] = (lander.target.pos.x, lander.target.pos.y)
+
+    deciding_mask = np.ones(n, dtype=bool)
+    if deciding is not None:
+        deciding_mask[:] = False
+        deciding_mask[deciding] = True
+
+    # landers that could chase the player or are carrying a humanoid off never sleep
+    reach = np.hypot(player_pos.x - pos[:, 0], player_pos.y - pos[:, 1]) < flock["chase_distance"]
+    at_most = np.where(capturing_mask | reach, sectors.ACTIVE, sectors.DORMANT)
+    rows, step = flock.schedule(pos, dt, sector_map, at_most)
+
+    flock.step(lander_kernel, LANDER_FIELDS, rows, pos, target, capturing_mask, deciding_mask, dt=step)
+
+    flock.write_positions(rows)
+
+
+def steer_mutants(flock: Flock, player_pos, dt: float, sector_map: sectors.SectorMap | None = None) -> list:
+    """Mutants: one `mutant_kernel` step for the flock.
+
+    Mutants home in on the player from anywhere, so far away ones still get
+    coarse steps instead of sleeping.
+
+    Returns:
+        list: Mutants that rolled a shot this tick (caller fires them).
+    """
+    n = len(flock)
+    if not n:
+        return []
+
+    pos = flock.positions()
+    target = np.broadcast_to(np.array((player_pos.x, player_pos.y), dtype=np.float64), (n, 2))
+    rows, step = flock.schedule(pos, dt, sector_map, sectors.COARSE)
+
+    shooting = flock.step(mutant_kernel, MUTANT_FIELDS, rows, pos, target, dt=step)
+
+    flock.write_positions(rows)
+    return [flock.members[i] for i in rows[shooting].tolist()]
+
+
+def steer_baiters(flock: Flock, player_pos, dt: float) -> None:
+    """Baiters: one `baiter_kernel` step for the whole flock (they're always near the player, so always active)."""
+    if not flock:
+        return
+
+    pos = flock.positions()
+    target = np.array((player_pos.x, player_pos.y), dtype=np.float64)
+
+    baiter_kernel(pos, flock.velocities(), target, *(flock[name] for name in BAITER_FIELDS), dt)
+
+    flock.write_positions()
+
+
+if __name__ == "__main__":
+    # quick benchmark: ms per tick to steer N landers (+ a third as many mutants)
+    import time
+
+    import pygame as pg
+
+    pg.display.set_mode((1, 1))
+    import classes
+
+    class _Player(object):
+        pos = pg.Vector2(0, GAMEPLAY_HEIGHT // 2)
+        state = None
+
+    import sectors
+
+    # spread over the whole world, with the camera on the player (sectors) or everyone always stepping
+    sector_map = sectors.SectorMap()
+    for count in (30, 100, 300, 1000):
+        for label, chosen_map in (("everyone", None), ("sectors", sector_map)):
+            group = classes.EnemyGroup()
+            group.add(*(classes.Enemy(x, 200) for x in np.linspace(-WORLD_WIDTH / 2, WORLD_WIDTH / 2, count)))
+            group.add(*(classes.Mutant(x, 300) for x in np.linspace(-WORLD_WIDTH / 2, WORLD_WIDTH / 2, count // 3)))
+
+            start = time.perf_counter()
+            for _ in range(200):
+                sector_map.update(_Player.pos.x)
+                group.update(_Player(), [], 1 / SIMULATION_RATE, 1, chosen_map)
+            print(f"{count:5} landers, {label:8}: {(time.perf_counter() - start) / 200 * 1000:.3f} ms/tick")
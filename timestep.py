@@ -0,0 +1,66 @@
+"""
+Fixed-timestep simulation clock.
+
+Gameplay is simulated in fixed ticks (SIMULATION_RATE per second) no matter
+how fast frames are drawn: frame time goes into an accumulator, whole ticks
+come out of it, and the leftover fraction of a tick (alpha) is used to draw
+everything between its last two simulated positions.
+"""
+
+from constants import *
+
+
+class FixedTimestep(object):
+    """Accumulator that turns variable frame times into fixed simulation ticks.
+
+    Attributes:
+        rate (int): Ticks per second.
+        dt (float): Length of one tick in seconds.
+        max_steps (int): Most ticks run for one frame, the rest of the backlog is dropped.
+        accumulator (float): Frame time not simulated yet (always < dt after `advance`).
+        ticks (int): Total ticks run so far.
+    """
+
+    def __init__(self, rate: int = SIMULATION_RATE, max_steps: int = MAX_SIMULATION_STEPS) -> None:
+        self.rate: int = rate
+        self.dt: float = 1 / rate
+        self.max_steps: int = max_steps
+        self.accumulator: float = 0.0
+        self.ticks: int = 0
+
+    def advance(self, frame_dt: float) -> int:
+        """Adds a frame's worth of time and returns how many ticks to simulate now."""
+        self.accumulator += frame_dt
+        steps = int(self.accumulator / self.dt)
+
+        if steps > self.max_steps:
+            # can't keep up (or the window was dragged), slow down instead of spiraling
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+
+        self.ticks += steps
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far we are between the previous tick and the latest one, in [0, 1)."""
+        return self.accumulator / self.dt
+
+    def reset(self) -> None:
+        self.accumulator = 0.0
+
+
+def frames(dt: float) -> float:
+    """`dt` in frames at TUNED_RATE, for anything tuned in px/frame (pos += velocity * frames(dt))."""
+    return dt * TUNED_RATE
+
+
+def smoothing(factor: float, dt: float) -> float:
+    """Per-frame lerp factor (a += (b - a) * factor) converted so it behaves the same at any tick length."""
+    return 1 - (1 - factor) ** frames(dt)
+
+
+def lerp(a: float, b: float, alpha: float) -> float:
+    return a + (b - a) * alpha